@@ -0,0 +1,65 @@
+"""Compare modes of bulk exchange: python benchmarks/bulk_exchange.py [SIZE]"""
+
+import random
+import sys
+import timeit
+from collections.abc import Callable
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from currency_exchange.domain import bulk
+from currency_exchange.domain.bulk import (
+    RATE_SCALE,
+    FixedPointColumn,
+    exchange_fixed,
+    exchange_float,
+)
+
+DISTINCT_RATES = 50
+REPEAT = 5
+CENT = Decimal("0.01")
+
+
+def main(size: int) -> None:
+    generator = random.Random(42)
+    amounts = [Decimal(generator.randint(1, 10**9)).scaleb(-2) for _ in range(size)]
+    rates = [
+        Decimal(generator.randint(1, 10**10)).scaleb(-RATE_SCALE)
+        for _ in range(DISTINCT_RATES)
+    ]
+    indices = [generator.randrange(DISTINCT_RATES) for _ in range(size)]
+
+    fixed_amounts = FixedPointColumn.from_decimals(amounts, 2)
+    fixed_rates = FixedPointColumn.from_decimals(rates, RATE_SCALE)
+    float_amounts = [float(amount) for amount in amounts]
+    float_rates = [float(rate) for rate in rates]
+
+    cases: dict[str, Callable[[], object]] = {
+        "decimal": lambda: [
+            amount * rates[index]
+            for amount, index in zip(amounts, indices, strict=True)
+        ],
+        "decimal quantized": lambda: [
+            (amount * rates[index]).quantize(CENT, ROUND_HALF_EVEN)
+            for amount, index in zip(amounts, indices, strict=True)
+        ],
+        "fixed": lambda: exchange_fixed(fixed_amounts, fixed_rates, indices),
+        "fixed with conversions": lambda: exchange_fixed(
+            FixedPointColumn.from_decimals(amounts, 2), fixed_rates, indices
+        ).to_decimals(),
+        "float": lambda: exchange_float(float_amounts, float_rates, indices),
+    }
+    if bulk.np is not None:
+        numpy_amounts = bulk.np.asarray(float_amounts)
+        numpy_indices = bulk.np.asarray(indices)
+        cases["float numpy arrays"] = lambda: exchange_float(
+            numpy_amounts, float_rates, numpy_indices
+        )
+
+    print(f"{size} amounts, {DISTINCT_RATES} rates, numpy: {bulk.np is not None}")
+    for name, case in cases.items():
+        seconds = min(timeit.repeat(case, number=1, repeat=REPEAT))
+        print(f"{name:>24}: {seconds * 1000:9.2f} ms {seconds / size * 1e9:8.1f} ns")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,185 @@
+"""Cost of rate lookups by currency codes before and after integer currency keys
+
+python benchmarks/currency_joins.py [CURRENCIES]
+
+Builds a database at schema version 2 (UUID keys) with a full mesh of
+rates between all currencies, times lookups of random pairs and a join of
+all rates, migrates it to integer keys and times them again.
+"""
+
+import random
+import sqlite3
+import sys
+import tempfile
+import timeit
+from collections.abc import Callable
+from pathlib import Path
+from uuid import uuid4
+
+from currency_exchange.infrastructure.database.converters import register_decimal
+from currency_exchange.infrastructure.database.migrations.runner import migrate
+from currency_exchange.infrastructure.database.profile import SQLiteProfile
+from currency_exchange.infrastructure.database.repo import (
+    SQLiteExchangeRateRepository,
+)
+
+LOOKUPS = 2000
+REPEAT = 5
+
+# SQLiteExchangeRateRepository.get_by_currency_codes at schema version 2
+UUID_KEYS_QUERY = """
+    SELECT
+        exchange_rates.id,
+        exchange_rates.rate,
+        base_currency.id,
+        base_currency.code,
+        base_currency.sign,
+        base_currency.name,
+        target_currency.id,
+        target_currency.code,
+        target_currency.sign,
+        target_currency.name
+    FROM exchange_rates
+    LEFT JOIN currencies as base_currency
+    ON exchange_rates.base_currency == base_currency.id
+    LEFT JOIN currencies as target_currency
+    ON exchange_rates.target_currency == target_currency.id
+    WHERE base_currency.code = ? AND target_currency.code = ?
+"""
+
+# Join of all rates, as get_all() does, at schema versions 2 and 3
+UUID_KEYS_FULL_JOIN = """
+    SELECT sum(length(base_currency.code) + length(target_currency.code))
+    FROM exchange_rates
+    JOIN currencies as base_currency
+    ON exchange_rates.base_currency == base_currency.id
+    JOIN currencies as target_currency
+    ON exchange_rates.target_currency == target_currency.id
+"""
+INTEGER_KEYS_FULL_JOIN = """
+    SELECT sum(length(base_currency.code) + length(target_currency.code))
+    FROM exchange_rates
+    JOIN currencies as base_currency
+    ON base_currency.key = exchange_rates.base_currency
+    JOIN currencies as target_currency
+    ON target_currency.key = exchange_rates.target_currency
+"""
+
+
+def main(size: int) -> None:
+    register_decimal()
+    generator = random.Random(42)
+    codes = [_code(number) for number in range(size)]
+    pairs = [tuple(generator.sample(codes, 2)) for _ in range(LOOKUPS)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(
+            Path(directory) / "currency_exchange.db",
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
+        SQLiteProfile().apply(connection)
+        migrate(connection, 2)
+        _fill(connection, codes, generator)
+        print(f"{size} currencies, {size * (size - 1)} rates, {LOOKUPS} lookups")
+
+        _report(
+            "uuid keys",
+            lambda: [
+                connection.execute(UUID_KEYS_QUERY, pair).fetchone() for pair in pairs
+            ],
+        )
+        _plan(connection, UUID_KEYS_QUERY)
+        _report_full_join(connection, UUID_KEYS_FULL_JOIN)
+
+        seconds = timeit.timeit(lambda: migrate(connection), number=1)
+        print(f"migration to integer keys: {seconds:.2f} s")
+
+        repo = SQLiteExchangeRateRepository(connection)
+        statements: list[str] = []
+        connection.set_trace_callback(statements.append)
+        repo.get_by_currency_codes(*pairs[0])
+        connection.set_trace_callback(None)
+        integer_keys_query = (
+            statements[0]
+            .replace(f"'{pairs[0][0]}'", "?", 1)
+            .replace(f"'{pairs[0][1]}'", "?", 1)
+        )
+        _report(
+            "integer keys",
+            lambda: [
+                connection.execute(integer_keys_query, pair).fetchone()
+                for pair in pairs
+            ],
+        )
+        _plan(connection, integer_keys_query)
+        _report_full_join(connection, INTEGER_KEYS_FULL_JOIN)
+        _report(
+            "integer keys, repository",
+            lambda: [repo.get_by_currency_codes(*pair) for pair in pairs],
+        )
+        connection.close()
+
+
+def _code(number: int) -> str:
+    letters = []
+    for _ in range(3):
+        number, letter = divmod(number, 26)
+        letters.append(chr(ord("A") + letter))
+    return "".join(letters)
+
+
+def _fill(
+    connection: sqlite3.Connection,
+    codes: list[str],
+    generator: random.Random,
+) -> None:
+    ids = [uuid4().bytes for _ in codes]
+    with connection:
+        connection.executemany(
+            "INSERT INTO currencies (id, code, sign, name) VALUES (?, ?, '', '');",
+            zip(ids, codes, strict=True),
+        )
+        connection.executemany(
+            """
+            INSERT INTO exchange_rates (id, base_currency, target_currency, rate)
+            VALUES (?, ?, ?, ?);
+            """,
+            (
+                (
+                    uuid4().bytes,
+                    base_id,
+                    target_id,
+                    f"{generator.uniform(0.01, 100):.6f}",
+                )
+                for base_id in ids
+                for target_id in ids
+                if base_id != target_id
+            ),
+        )
+
+
+def _report(name: str, case: Callable[[], object]) -> None:
+    seconds = min(timeit.repeat(case, number=1, repeat=REPEAT))
+    print(f"{name:>26}: {seconds / LOOKUPS * 1e6:9.1f} us per lookup")
+
+
+def _report_full_join(connection: sqlite3.Connection, query: str) -> None:
+    seconds = min(
+        timeit.repeat(lambda: connection.execute(query).fetchone(), number=1, repeat=3)
+    )
+    (pages,) = connection.execute("PRAGMA page_count;").fetchone()
+    (free_pages,) = connection.execute("PRAGMA freelist_count;").fetchone()
+    (page_size,) = connection.execute("PRAGMA page_size;").fetchone()
+    print(
+        f"{'join of all rates':>26}: {seconds * 1000:9.1f} ms,"
+        f" data {(pages - free_pages) * page_size / 2**20:.1f} MiB"
+    )
+
+
+def _plan(connection: sqlite3.Connection, query: str) -> None:
+    for *_, detail in connection.execute(f"EXPLAIN QUERY PLAN {query}", ("A", "B")):
+        print(f"{'':>28}{detail}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
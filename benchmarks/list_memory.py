@@ -0,0 +1,102 @@
+"""Peak memory of GET /exchangeRates serialized whole and streamed
+
+python benchmarks/list_memory.py [CURRENCIES]
+
+Builds a full mesh of rates between all currencies and measures the peak
+of Python allocations while the body is produced: by the repository,
+DTOs, asdict and one json.dumps as before streaming responses, and by
+rows of the cursor encoded piece by piece, and the time without tracing.
+"""
+
+import json
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict
+from pathlib import Path
+from uuid import uuid4
+
+from currency_exchange.application.models import ExchangeRateDTO, ListExchangeRates
+from currency_exchange.infrastructure.database.converters import register_decimal
+from currency_exchange.infrastructure.database.migrations.runner import migrate
+from currency_exchange.infrastructure.database.queries import (
+    SQLiteExchangeRateQueries,
+)
+from currency_exchange.infrastructure.database.repo import (
+    SQLiteExchangeRateRepository,
+)
+from simple_server.encoder import SimpleEncoder, encode_rows
+
+
+def main(size: int) -> None:
+    register_decimal()
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(
+            Path(directory) / "currency_exchange.db",
+            detect_types=sqlite3.PARSE_DECLTYPES,
+        )
+        migrate(connection, offline=True)
+        _fill(connection, size)
+        print(f"{size} currencies, {size * (size - 1)} rates")
+
+        def whole() -> int:
+            rates = SQLiteExchangeRateRepository(connection).get_all()
+            body = [asdict(ExchangeRateDTO.from_domain(rate)) for rate in rates]
+            return len(json.dumps(body, cls=SimpleEncoder).encode())
+
+        def streamed() -> int:
+            page = SQLiteExchangeRateQueries(connection).list_exchange_rates(
+                ListExchangeRates()
+            )
+            return sum(len(piece) for piece in encode_rows(page.items))
+
+        _report("whole body", whole)
+        _report("streamed", streamed)
+        connection.close()
+
+
+def _fill(connection: sqlite3.Connection, size: int) -> None:
+    codes = [_code(number) for number in range(size)]
+    with connection:
+        connection.executemany(
+            "INSERT INTO currencies (id, code, sign, name) VALUES (?, ?, '', ?);",
+            ((uuid4().bytes, code, f"Currency {code}") for code in codes),
+        )
+        connection.execute(
+            """
+            INSERT INTO exchange_rates (base_currency, target_currency, id, rate)
+            SELECT base.key, target.key, randomblob(16), '1.5'
+            FROM currencies AS base JOIN currencies AS target
+            ON base.key != target.key;
+            """
+        )
+
+
+def _code(number: int) -> str:
+    letters = []
+    for _ in range(3):
+        number, letter = divmod(number, 26)
+        letters.append(chr(ord("A") + letter))
+    return "".join(letters)
+
+
+def _report(name: str, case: Callable[[], int]) -> None:
+    started = time.perf_counter()
+    length = case()
+    seconds = time.perf_counter() - started
+    # Traced separately, tracing slows allocations down several times
+    tracemalloc.start()
+    case()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:>12}: {length / 2**20:6.1f} MiB of JSON in {seconds:.2f} s,"
+        f" peak {peak / 2**20:7.1f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300)
@@ -0,0 +1,106 @@
+"""CPU time per response body of DTOs: asdict with SimpleEncoder and serializers
+
+python benchmarks/serializers.py [REPEATS]
+
+Encodes bodies of GET /currency, GET /exchangeRate, GET /exchange and of a
+POST /exchange/batch of 1000 items both ways and prints process time per
+body, the best of five rounds.
+"""
+
+import json
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import asdict
+from decimal import Decimal
+from typing import Any
+
+from currency_exchange.application.models import (
+    CurrencyDTO,
+    ExchangedCurrencyDTO,
+    ExchangeRateDTO,
+)
+from currency_exchange.domain.models import Currency, ExchangeRate
+from currency_exchange.domain.value_objects import (
+    CurrencyCode,
+    CurrencyName,
+    CurrencySign,
+    Rate,
+)
+from currency_exchange.presentation.serializers import (
+    array_json,
+    currency_json,
+    exchange_rate_json,
+    exchanged_currency_json,
+)
+from simple_server.encoder import SimpleEncoder
+
+ROUNDS = 5
+BATCH_SIZE = 1000
+
+
+def main(repeats: int) -> None:
+    dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign("$"))
+    euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign("€"))
+    exchange_rate = ExchangeRateDTO.from_domain(
+        ExchangeRate(dollar, euro, Rate(Decimal("0.92")))
+    )
+    exchanged = ExchangedCurrencyDTO(
+        exchange_rate.baseCurrency,
+        exchange_rate.targetCurrency,
+        exchange_rate.rate,
+        Decimal("10"),
+        Decimal("9.2"),
+        ["USD", "EUR"],
+    )
+    batch = [exchanged] * BATCH_SIZE
+
+    cases: list[tuple[str, Callable[[], bytes], Callable[[], bytes], int]] = [
+        (
+            "currency",
+            lambda: _dumps(asdict(CurrencyDTO.from_domain(euro))),
+            lambda: currency_json(CurrencyDTO.from_domain(euro)),
+            repeats,
+        ),
+        (
+            "exchange rate",
+            lambda: _dumps(asdict(exchange_rate)),
+            lambda: exchange_rate_json(exchange_rate),
+            repeats,
+        ),
+        (
+            "exchange",
+            lambda: _dumps(asdict(exchanged)),
+            lambda: exchanged_currency_json(exchanged),
+            repeats,
+        ),
+        (
+            f"batch of {BATCH_SIZE}",
+            lambda: _dumps([asdict(item) for item in batch]),
+            lambda: array_json(map(exchanged_currency_json, batch)),
+            max(repeats // BATCH_SIZE, 10),
+        ),
+    ]
+    for name, before, after, count in cases:
+        print(
+            f"{name:>14}: {_per_call(before, count):8.2f} us ->"
+            f" {_per_call(after, count):8.2f} us"
+        )
+
+
+def _dumps(body: Any) -> bytes:
+    return json.dumps(body, cls=SimpleEncoder).encode()
+
+
+def _per_call(case: Callable[[], bytes], count: int) -> float:
+    best = float("inf")
+    for _ in range(ROUNDS):
+        started = time.process_time()
+        for _ in range(count):
+            case()
+        best = min(best, time.process_time() - started)
+    return best / count * 1e6
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -1,10 +1,21 @@
+from dataclasses import replace
+
 from currency_exchange.application.models import (
     CreateCurrency,
     CurrencyDTO,
+    ListCurrencies,
+    PageDTO,
+)
+from currency_exchange.application.queries import (
+    CURRENCY_FIELDS,
+    CurrencyQueries,
+    check_page_size,
+    select_fields,
 )
 from currency_exchange.application.repo import (
     CurrencyRepository,
 )
+from currency_exchange.application.versions import DataVersion
 from currency_exchange.domain.models import Currency
 from currency_exchange.domain.value_objects import (
     CurrencyCode,
@@ -14,15 +25,20 @@ from currency_exchange.domain.value_objects import (
 
 
 class GetCurrenciesInteractor:
-    def __init__(self, currency_repo: CurrencyRepository):
-        self._currency_repo = currency_repo
-
-    def __call__(self) -> list[CurrencyDTO]:
-        currencies = self._currency_repo.get_all()
-
-        currencies_dto = [CurrencyDTO.from_domain(currency) for currency in currencies]
+    def __init__(self, currency_queries: CurrencyQueries):
+        self._currency_queries = currency_queries
+
+    def __call__(self, list_currencies: ListCurrencies) -> PageDTO:
+        check_page_size(list_currencies.limit)
+        fields = select_fields(
+            list_currencies.fields,
+            CURRENCY_FIELDS,
+            CURRENCY_FIELDS,
+        )
 
-        return currencies_dto
+        return self._currency_queries.list_currencies(
+            replace(list_currencies, fields=fields),
+        )
 
 
 class GetCurrencyInteractor:
@@ -37,8 +53,13 @@ class GetCurrencyInteractor:
 
 
 class CreateCurrencyInteracotor:
-    def __init__(self, currency_repo: CurrencyRepository) -> None:
+    def __init__(
+        self,
+        currency_repo: CurrencyRepository,
+        data_version: DataVersion,
+    ) -> None:
         self._currency_repo = currency_repo
+        self._data_version = data_version
 
     def __call__(self, create_currency: CreateCurrency) -> CurrencyDTO:
         currency = Currency(
@@ -48,16 +69,23 @@ class CreateCurrencyInteracotor:
         )
 
         self._currency_repo.add(currency)
+        self._data_version.bump()
 
         return CurrencyDTO.from_domain(currency)
 
 
 class DeleteCurrencyInteractor:
-    def __init__(self, currency_repo: CurrencyRepository) -> None:
+    def __init__(
+        self,
+        currency_repo: CurrencyRepository,
+        data_version: DataVersion,
+    ) -> None:
         self._currency_repo = currency_repo
+        self._data_version = data_version
 
     def __call__(self, code: str) -> None:
         currency_code = CurrencyCode(code)
 
         currency = self._currency_repo.get_by_code(currency_code.value)
         self._currency_repo.remove(currency)
+        self._data_version.bump()
@@ -1,37 +1,65 @@
+from collections.abc import Sequence
+from dataclasses import replace
+from decimal import Decimal
+
 from currency_exchange.application.exceptions import ExchangeRateNotFoundError
 from currency_exchange.application.models import (
     CreateExchangeRateDTO,
     CurrencyDTO,
     ExchangeCurrencyDTO,
     ExchangedCurrencyDTO,
+    ExchangeErrorDTO,
     ExchangeRateDTO,
     GetExchangeRate,
+    ListExchangeRates,
+    PageDTO,
+)
+from currency_exchange.application.queries import (
+    DEFAULT_EXCHANGE_RATE_FIELDS,
+    EXCHANGE_RATE_FIELDS,
+    ExchangeRateQueries,
+    check_page_size,
+    select_fields,
 )
 from currency_exchange.application.repo import (
     CurrencyRepository,
     ExchangeRateRepository,
 )
+from currency_exchange.application.resolvers import ExchangeRateResolver
+from currency_exchange.application.versions import DataVersion
+from currency_exchange.domain.graph import ConversionPath
 from currency_exchange.domain.models import ExchangeRate
 from currency_exchange.domain.services import (
+    exchange_currencies,
     exchange_currency,
-    merge_exchange_rate,
-    reverse_exchange_rate,
 )
 from currency_exchange.domain.value_objects import CurrencyCode, Rate
 
 
 class GetExchangeRatesInteractor:
-    def __init__(self, exchange_rate_repo: ExchangeRateRepository):
-        self._exchange_rate_repo = exchange_rate_repo
-
-    def __call__(self) -> list[ExchangeRateDTO]:
-        exchange_rates = self._exchange_rate_repo.get_all()
-
-        exchange_rates_dto = [
-            ExchangeRateDTO.from_domain(exchange_rate)
-            for exchange_rate in exchange_rates
-        ]
-        return exchange_rates_dto
+    def __init__(self, exchange_rate_queries: ExchangeRateQueries):
+        self._exchange_rate_queries = exchange_rate_queries
+
+    def __call__(self, list_exchange_rates: ListExchangeRates) -> PageDTO:
+        check_page_size(list_exchange_rates.limit)
+        fields = select_fields(
+            list_exchange_rates.fields,
+            EXCHANGE_RATE_FIELDS,
+            DEFAULT_EXCHANGE_RATE_FIELDS,
+        )
+        base_code = list_exchange_rates.base_code
+        target_code = list_exchange_rates.target_code
+
+        return self._exchange_rate_queries.list_exchange_rates(
+            replace(
+                list_exchange_rates,
+                fields=fields,
+                base_code=None if base_code is None else CurrencyCode(base_code).value,
+                target_code=(
+                    None if target_code is None else CurrencyCode(target_code).value
+                ),
+            ),
+        )
 
 
 class GetExchangeRateInteractor:
@@ -57,9 +85,11 @@ class CreateExchangeRateInteractor:
         self,
         exchange_rate_repo: ExchangeRateRepository,
         currency_repo: CurrencyRepository,
+        data_version: DataVersion,
     ):
         self._exchange_rate_repo = exchange_rate_repo
         self._currency_repo = currency_repo
+        self._data_version = data_version
 
     def __call__(self, exchange_rate_dto: CreateExchangeRateDTO) -> ExchangeRateDTO:
         codes = (
@@ -75,6 +105,7 @@ class CreateExchangeRateInteractor:
         )
 
         self._exchange_rate_repo.add(exchange_rate)
+        self._data_version.bump()
         return ExchangeRateDTO.from_domain(exchange_rate)
 
 
@@ -83,9 +114,11 @@ class UpdateExchangeRateInteractor:
         self,
         exchange_rate_repo: ExchangeRateRepository,
         currency_repo: CurrencyRepository,
+        data_version: DataVersion,
     ):
         self._exchange_rate_repo = exchange_rate_repo
         self._currency_repo = currency_repo
+        self._data_version = data_version
 
     def __call__(self, exchange_rate_dto: CreateExchangeRateDTO) -> ExchangeRateDTO:
         codes = (
@@ -97,18 +130,14 @@ class UpdateExchangeRateInteractor:
         exchange_rate.rate = Rate(exchange_rate_dto.rate)
 
         self._exchange_rate_repo.add(exchange_rate)
+        self._data_version.bump()
 
         return ExchangeRateDTO.from_domain(exchange_rate)
 
 
 class ExchangeCurrencyInteractor:
-    def __init__(
-        self,
-        exchange_rate_repo: ExchangeRateRepository,
-        related_currency_code: str,
-    ) -> None:
-        self._exchange_rate_repo = exchange_rate_repo
-        self._related_currency_code = related_currency_code
+    def __init__(self, exchange_rate_resolver: ExchangeRateResolver) -> None:
+        self._exchange_rate_resolver = exchange_rate_resolver
 
     def __call__(
         self,
@@ -118,30 +147,86 @@ class ExchangeCurrencyInteractor:
             CurrencyCode(exchange_currency_dto.base_currency_code).value,
             CurrencyCode(exchange_currency_dto.target_currency_code).value,
         )
+        path = self._exchange_rate_resolver.resolve(*codes)
+        return self._exchange(path, exchange_currency_dto.amount)
+
+    def batch(
+        self,
+        exchange_currency_dtos: Sequence[ExchangeCurrencyDTO],
+    ) -> list[ExchangedCurrencyDTO | ExchangeErrorDTO]:
+        """Exchange every amount, each distinct pair is resolved once
+
+        Pairs are compared by their normalized codes. Amounts of a pair are
+        multiplied by its rate together and share its currency DTOs. Results
+        are in the order of dtos, an invalid code or a pair that can't be
+        exchanged gives an error for each of its amounts.
+        """
+        pairs = [self._pair(dto) for dto in exchange_currency_dtos]
+        amounts: dict[tuple[str, str], list[Decimal]] = {}
+        for pair, dto in zip(pairs, exchange_currency_dtos, strict=True):
+            if not isinstance(pair, ExchangeErrorDTO):
+                amounts.setdefault(pair, []).append(dto.amount)
+        results = {
+            pair: iter(self._exchange_pair(pair, pair_amounts))
+            for pair, pair_amounts in amounts.items()
+        }
+        return [
+            pair if isinstance(pair, ExchangeErrorDTO) else next(results[pair])
+            for pair in pairs
+        ]
+
+    def _pair(
+        self,
+        exchange_currency_dto: ExchangeCurrencyDTO,
+    ) -> tuple[str, str] | ExchangeErrorDTO:
         try:
-            exchange_rate = self._exchange_rate_repo.get_by_currency_codes(*codes)
+            return (
+                CurrencyCode(exchange_currency_dto.base_currency_code).value,
+                CurrencyCode(exchange_currency_dto.target_currency_code).value,
+            )
+        except ValueError as ex:
+            return ExchangeErrorDTO(str(ex))
+
+    def _exchange_pair(
+        self,
+        pair: tuple[str, str],
+        amounts: list[Decimal],
+    ) -> Sequence[ExchangedCurrencyDTO | ExchangeErrorDTO]:
+        path = self._resolve(*pair)
+        if isinstance(path, ExchangeErrorDTO):
+            return [path] * len(amounts)
+
+        exchange_rate = path.exchange_rate
+        base_currency = CurrencyDTO.from_domain(exchange_rate.base_currency)
+        target_currency = CurrencyDTO.from_domain(exchange_rate.target_currency)
+        codes = list(path.codes)
+        return [
+            ExchangedCurrencyDTO(
+                base_currency,
+                target_currency,
+                exchange_rate.rate.value,
+                amount,
+                converted_amount,
+                codes,
+            )
+            for amount, converted_amount in zip(
+                amounts, exchange_currencies(exchange_rate, amounts), strict=True
+            )
+        ]
+
+    def _resolve(
+        self,
+        base_code: str,
+        target_code: str,
+    ) -> ConversionPath | ExchangeErrorDTO:
+        try:
+            return self._exchange_rate_resolver.resolve(base_code, target_code)
         except ExchangeRateNotFoundError:
-            try:
-                reversed_exchange_rate = self._exchange_rate_repo.get_by_currency_codes(
-                    codes[1], codes[0]
-                )
-            except ExchangeRateNotFoundError:
-                base_exchange_rate, target_exchange_rate = (
-                    self._exchange_rate_repo.get_related_exchanges_by_currency_codes(
-                        *codes, self._related_currency_code
-                    )
-                )
-                exchange_rate = merge_exchange_rate(
-                    base_exchange_rate, target_exchange_rate
-                )
-
-            else:
-                exchange_rate = reverse_exchange_rate(reversed_exchange_rate)
-
-        converted_amount = exchange_currency(
-            exchange_rate,
-            exchange_currency_dto.amount,
-        )
+            return ExchangeErrorDTO(f"Can't exchange from {base_code} to {target_code}")
+
+    def _exchange(self, path: ConversionPath, amount: Decimal) -> ExchangedCurrencyDTO:
+        exchange_rate = path.exchange_rate
+        converted_amount = exchange_currency(exchange_rate, amount)
 
         base_currency = CurrencyDTO.from_domain(exchange_rate.base_currency)
         target_currency = CurrencyDTO.from_domain(
@@ -152,6 +237,7 @@ class ExchangeCurrencyInteractor:
             base_currency,
             target_currency,
             exchange_rate.rate.value,
-            exchange_currency_dto.amount,
+            amount,
             converted_amount,
+            list(path.codes),
         )
@@ -0,0 +1,24 @@
+from currency_exchange.application.models import (
+    CacheStatsDTO,
+    ConnectionPoolStatsDTO,
+)
+from currency_exchange.application.monitoring import (
+    CacheMonitor,
+    ConnectionPoolMonitor,
+)
+
+
+class GetConnectionPoolStatsInteractor:
+    def __init__(self, pool_monitor: ConnectionPoolMonitor) -> None:
+        self._pool_monitor = pool_monitor
+
+    def __call__(self) -> ConnectionPoolStatsDTO:
+        return self._pool_monitor.stats()
+
+
+class GetCacheStatsInteractor:
+    def __init__(self, cache_monitor: CacheMonitor) -> None:
+        self._cache_monitor = cache_monitor
+
+    def __call__(self) -> CacheStatsDTO:
+        return self._cache_monitor.stats()
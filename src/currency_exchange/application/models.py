@@ -1,6 +1,8 @@
+from collections.abc import Iterable
 from dataclasses import dataclass
+from datetime import datetime
 from decimal import Decimal
-from typing import Self
+from typing import Any, Self
 
 from currency_exchange.domain.models import Currency, CurrencyId, ExchangeRate
 
@@ -67,9 +69,67 @@ class ExchangedCurrencyDTO:
     rate: Decimal
     amount: Decimal
     convertedAmount: Decimal
+    path: list[str]
+
+
+@dataclass
+class ExchangeErrorDTO:
+    message: str
 
 
 @dataclass
 class GetExchangeRate:
     base_code: str
     target_code: str
+
+
+@dataclass
+class ListCurrencies:
+    limit: int | None = None
+    after: str | None = None
+    fields: list[str] | None = None
+
+
+@dataclass
+class ListExchangeRates:
+    limit: int | None = None
+    after: str | None = None
+    fields: list[str] | None = None
+    base_code: str | None = None
+    target_code: str | None = None
+    updated_since: datetime | None = None
+
+
+@dataclass
+class PageDTO:
+    """Items projected to the requested fields and the cursor of the next page
+
+    Without a limit items are produced lazily by the database, while the
+    connection of the request is in use. A nested object with all its fields
+    selected may be its DTO instead of a dict.
+    """
+
+    items: Iterable[dict[str, Any]]
+    next_cursor: str | None = None
+
+
+@dataclass
+class ConnectionPoolStatsDTO:
+    size: int
+    idle: int
+    in_use: int
+    max_size: int
+    checkouts: int
+    waits: int
+    timeouts: int
+    creations: int
+    discards: int
+
+
+@dataclass
+class CacheStatsDTO:
+    size: int
+    hits: int
+    misses: int
+    reloads: int
+    invalidations: int
@@ -0,0 +1,14 @@
+from typing import Protocol
+
+from currency_exchange.application.models import (
+    CacheStatsDTO,
+    ConnectionPoolStatsDTO,
+)
+
+
+class ConnectionPoolMonitor(Protocol):
+    def stats(self) -> ConnectionPoolStatsDTO: ...
+
+
+class CacheMonitor(Protocol):
+    def stats(self) -> CacheStatsDTO: ...
@@ -0,0 +1,76 @@
+from collections.abc import Sequence
+from typing import Protocol
+
+from currency_exchange.application.models import (
+    ListCurrencies,
+    ListExchangeRates,
+    PageDTO,
+)
+
+MAX_PAGE_SIZE = 1000
+
+CURRENCY_FIELDS = ("id", "name", "code", "sign")
+EXCHANGE_RATE_FIELDS = (
+    *(f"baseCurrency.{field}" for field in CURRENCY_FIELDS),
+    *(f"targetCurrency.{field}" for field in CURRENCY_FIELDS),
+    "rate",
+    "updatedAt",
+)
+# Fields of ExchangeRateDTO, updatedAt is returned on request only
+DEFAULT_EXCHANGE_RATE_FIELDS = EXCHANGE_RATE_FIELDS[:-1]
+
+
+class CurrencyQueries(Protocol):
+    def list_currencies(self, query: ListCurrencies) -> PageDTO:
+        """Page of currencies ordered by code, fields of query are known ones"""
+        ...
+
+
+class ExchangeRateQueries(Protocol):
+    def list_exchange_rates(self, query: ListExchangeRates) -> PageDTO:
+        """Page of rates ordered by currency pair, fields of query are known ones
+
+        Raise ValueError for a malformed cursor.
+        """
+        ...
+
+
+def select_fields(
+    requested: Sequence[str] | None,
+    known: Sequence[str],
+    default: Sequence[str],
+) -> list[str]:
+    """Known fields named by requested ones, in the order of ``known``
+
+    A name selects a field with all fields nested in it.
+
+    >>> select_fields(["rate", "targetCurrency"], EXCHANGE_RATE_FIELDS, ())
+    ['targetCurrency.id', 'targetCurrency.name', 'targetCurrency.code', \
+'targetCurrency.sign', 'rate']
+    >>> select_fields(None, CURRENCY_FIELDS, ["code"])
+    ['code']
+    """
+    if requested is None:
+        return list(default)
+    if not requested:
+        raise ValueError("Fields must not be empty")
+
+    selected: set[str] = set()
+    for name in requested:
+        matched = {
+            field for field in known if field == name or field.startswith(f"{name}.")
+        }
+        if not matched:
+            raise ValueError(
+                f"Unknown field <{name}>, known fields <{', '.join(known)}>"
+            )
+        selected |= matched
+    return [field for field in known if field in selected]
+
+
+def check_page_size(limit: int | None) -> None:
+    """Raise ValueError for a limit out of 1..MAX_PAGE_SIZE, None is no limit"""
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(
+            f"Limit must be from 1 to {MAX_PAGE_SIZE}, got <{limit}>",
+        )
@@ -1,11 +1,19 @@
+from collections.abc import Iterator
+from dataclasses import dataclass
 from typing import Protocol
 
+from currency_exchange.domain.cross_rates import CrossRateMatrix
+from currency_exchange.domain.graph import ExchangeRateGraph, PathPolicy
 from currency_exchange.domain.models import Currency, ExchangeRate
 
 
 class CurrencyRepository(Protocol):
     def get_all(self) -> list[Currency]: ...
 
+    def iter_all(self) -> Iterator[Currency]:
+        """Like get_all, without holding all of them at once"""
+        ...
+
     def get_by_code(self, code: str) -> Currency: ...
 
     def get_pair(self, codes: tuple[str, str]) -> tuple[Currency, Currency]: ...
@@ -15,20 +23,42 @@ class CurrencyRepository(Protocol):
     def remove(self, currency: Currency) -> None: ...
 
 
+@dataclass
+class ConversionLegs:
+    """Stored rates a conversion may use: direct, reverse or via a pivot"""
+
+    direct: ExchangeRate | None = None
+    reverse: ExchangeRate | None = None
+    to_pivot: ExchangeRate | None = None
+    from_pivot: ExchangeRate | None = None
+
+
 class ExchangeRateRepository(Protocol):
     def get_all(self) -> list[ExchangeRate]: ...
 
+    def iter_all(self) -> Iterator[ExchangeRate]:
+        """Like get_all, without holding all of them at once"""
+        ...
+
     def get_by_currency_codes(self, base_code: str, target_code: str) -> ExchangeRate:
         """Raise ExchangeRateNotFoundError"""
         ...
 
-    def get_related_exchanges_by_currency_codes(
+    def get_conversion_legs(
         self,
         base_code: str,
         target_code: str,
         related_code: str,
-    ) -> tuple[ExchangeRate, ExchangeRate]:
-        """Raise ExchangeRateNotFoundError"""
+    ) -> ConversionLegs:
+        """Return all legs of the pair at once, missing ones are None"""
+        ...
+
+    def get_graph(self) -> ExchangeRateGraph:
+        """Return the graph of all exchange rates"""
+        ...
+
+    def get_cross_rates(self, policy: PathPolicy) -> CrossRateMatrix:
+        """Return best paths between all pairs of currencies"""
         ...
 
     def add(self, exchange_rate: ExchangeRate) -> None: ...
@@ -0,0 +1,93 @@
+from typing import Protocol, override
+
+from currency_exchange.application.exceptions import ExchangeRateNotFoundError
+from currency_exchange.application.repo import ExchangeRateRepository
+from currency_exchange.domain.graph import ConversionPath, PathPolicy
+from currency_exchange.domain.services import (
+    merge_exchange_rate,
+    reverse_exchange_rate,
+)
+
+
+class ExchangeRateResolver(Protocol):
+    def resolve(self, base_code: str, target_code: str) -> ConversionPath:
+        """Raise ExchangeRateNotFoundError"""
+        ...
+
+
+class PivotExchangeRateResolver(ExchangeRateResolver):
+    """Direct rate, then the reverse rate, then a cross rate via one currency"""
+
+    def __init__(
+        self,
+        exchange_rate_repo: ExchangeRateRepository,
+        related_currency_code: str,
+    ) -> None:
+        self._exchange_rate_repo = exchange_rate_repo
+        self._related_currency_code = related_currency_code
+
+    @override
+    def resolve(self, base_code: str, target_code: str) -> ConversionPath:
+        legs = self._exchange_rate_repo.get_conversion_legs(
+            base_code, target_code, self._related_currency_code
+        )
+        if legs.direct is not None:
+            return ConversionPath((base_code, target_code), legs.direct)
+        if legs.reverse is not None:
+            return ConversionPath(
+                (base_code, target_code),
+                reverse_exchange_rate(legs.reverse),
+            )
+        if legs.to_pivot is None or legs.from_pivot is None:
+            raise ExchangeRateNotFoundError(
+                f"No exchange rate from <{base_code}> to <{target_code}>"
+                f" directly or via <{self._related_currency_code}>"
+            )
+        return ConversionPath(
+            (base_code, self._related_currency_code, target_code),
+            merge_exchange_rate(legs.to_pivot, legs.from_pivot),
+        )
+
+
+class GraphExchangeRateResolver(ExchangeRateResolver):
+    """Path of any length over the graph of all exchange rates"""
+
+    def __init__(
+        self,
+        exchange_rate_repo: ExchangeRateRepository,
+        policy: PathPolicy = "fewest_hops",
+    ) -> None:
+        self._exchange_rate_repo = exchange_rate_repo
+        self._policy: PathPolicy = policy
+
+    @override
+    def resolve(self, base_code: str, target_code: str) -> ConversionPath:
+        graph = self._exchange_rate_repo.get_graph()
+        path = graph.find_path(base_code, target_code, self._policy)
+        if path is None:
+            raise ExchangeRateNotFoundError(
+                f"No conversion path from <{base_code}> to <{target_code}>"
+            )
+        return path
+
+
+class MatrixExchangeRateResolver(ExchangeRateResolver):
+    """Lookup in precomputed cross rates of all pairs of currencies"""
+
+    def __init__(
+        self,
+        exchange_rate_repo: ExchangeRateRepository,
+        policy: PathPolicy = "fewest_hops",
+    ) -> None:
+        self._exchange_rate_repo = exchange_rate_repo
+        self._policy: PathPolicy = policy
+
+    @override
+    def resolve(self, base_code: str, target_code: str) -> ConversionPath:
+        cross_rates = self._exchange_rate_repo.get_cross_rates(self._policy)
+        path = cross_rates.find_path(base_code, target_code)
+        if path is None:
+            raise ExchangeRateNotFoundError(
+                f"No conversion path from <{base_code}> to <{target_code}>"
+            )
+        return path
@@ -0,0 +1,7 @@
+from typing import Protocol
+
+
+class DataVersion(Protocol):
+    def bump(self) -> None:
+        """Mark a successful write, responses cached before it are stale"""
+        ...
@@ -1,6 +1,88 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from tomllib import load
+from typing import Final, Literal
+
+from currency_exchange.domain.graph import PATH_POLICIES, PathPolicy
+from currency_exchange.infrastructure.database.profile import (
+    JournalMode,
+    SQLiteProfile,
+    Synchronous,
+    TempStore,
+)
+from simple_server.server import Engine, ServeMode, ServeOptions
+
+type ExchangeStrategy = Literal["pivot", "graph", "matrix"]
+
+EXCHANGE_STRATEGIES: Final = frozenset({"pivot", "graph", "matrix"})
+
+
+@dataclass
+class DatabaseConfig:
+    path: str = "currency_exchange.db"
+    pool_min_size: int = 1
+    pool_max_size: int = 8
+    pool_timeout: float = 5.0
+    journal_mode: JournalMode = "WAL"
+    synchronous: Synchronous = "NORMAL"
+    cache_size: int = -16_000
+    mmap_size: int = 128 * 1024 * 1024
+    temp_store: TempStore = "MEMORY"
+    busy_timeout: int = 5000
+    wal_autocheckpoint: int = 1000
+    checkpoint_interval: float = 60.0
+
+    @property
+    def profile(self) -> SQLiteProfile:
+        return SQLiteProfile(
+            journal_mode=self.journal_mode,
+            synchronous=self.synchronous,
+            cache_size=self.cache_size,
+            mmap_size=self.mmap_size,
+            temp_store=self.temp_store,
+            busy_timeout=self.busy_timeout,
+            wal_autocheckpoint=self.wal_autocheckpoint,
+        )
+
+
+@dataclass
+class CacheConfig:
+    exchange_rates: bool = True
+    check_interval: float = 0.5
+    responses: bool = True
+    responses_max_entries: int = 256
+
+
+@dataclass
+class CompressionConfig:
+    enabled: bool = True
+    minimum_size: int = 1024
+    level: int = 1
+
+
+@dataclass
+class LoggingConfig:
+    level: str = "INFO"
+    access_sample_rate: float = 1.0
+
+
+@dataclass
+class ExchangeConfig:
+    strategy: ExchangeStrategy = "matrix"
+    pivot_currency: str = "USD"
+    path_policy: PathPolicy = "fewest_hops"
+
+    def __post_init__(self) -> None:
+        if self.strategy not in EXCHANGE_STRATEGIES:
+            raise ValueError(
+                f"Exchange strategy must be one of {sorted(EXCHANGE_STRATEGIES)},"
+                f" got <{self.strategy}>"
+            )
+        if self.path_policy not in PATH_POLICIES:
+            raise ValueError(
+                f"Path policy must be one of {sorted(PATH_POLICIES)},"
+                f" got <{self.path_policy}>"
+            )
 
 
 @dataclass
@@ -11,10 +93,53 @@ class Config:
     allow_methods: list[str]
     allow_headers: list[str]
     allow_credentials: bool
+    engine: Engine = "threaded"
+    mode: ServeMode = "single"
+    workers: int = 1
+    threads: int = 1
+    keep_alive_timeout: float = 5.0
+    max_keep_alive_requests: int = 1000
+    database: DatabaseConfig = field(default_factory=DatabaseConfig)
+    cache: CacheConfig = field(default_factory=CacheConfig)
+    compression: CompressionConfig = field(default_factory=CompressionConfig)
+    logging: LoggingConfig = field(default_factory=LoggingConfig)
+    exchange: ExchangeConfig = field(default_factory=ExchangeConfig)
+
+    def __post_init__(self) -> None:
+        # The matrix is kept with the rate cache, without it the matrix would be
+        # built on every request, while the graph finds the same paths
+        if self.exchange.strategy == "matrix" and not self.cache.exchange_rates:
+            self.exchange.strategy = "graph"
+
+    @property
+    def serve_options(self) -> ServeOptions:
+        return ServeOptions(
+            engine=self.engine,
+            mode=self.mode,
+            workers=self.workers,
+            threads=self.threads,
+            keep_alive_timeout=self.keep_alive_timeout,
+            max_keep_alive_requests=self.max_keep_alive_requests,
+        )
+
+
+def load_default_config() -> Config:
+    """Load config.toml or config.example.toml if it doesn't exist"""
+    try:
+        return load_config(Path("config.toml"))
+    except FileNotFoundError:
+        return load_config()
 
 
 def load_config(path: Path = Path("config.example.toml")) -> Config:
     with path.open("rb") as file:
         data = load(file)
-    config = Config(**data.get("server", {}))
+    config = Config(
+        **data.get("server", {}),
+        database=DatabaseConfig(**data.get("database", {})),
+        cache=CacheConfig(**data.get("cache", {})),
+        compression=CompressionConfig(**data.get("compression", {})),
+        logging=LoggingConfig(**data.get("logging", {})),
+        exchange=ExchangeConfig(**data.get("exchange", {})),
+    )
     return config
@@ -0,0 +1,191 @@
+from collections.abc import Sequence
+from dataclasses import dataclass, replace
+
+from currency_exchange.domain.graph import (
+    ConversionPath,
+    Edge,
+    ExchangeRateGraph,
+    PathCost,
+    PathPolicy,
+    check_policy,
+    conversion_path,
+    path_cost,
+    policy_key,
+)
+from currency_exchange.domain.models import ExchangeRate
+
+type PairCodes = tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Cell:
+    cost: PathCost
+    edges: tuple[Edge, ...]
+    path: ConversionPath
+
+
+class CrossRateMatrix:
+    """Best conversion paths between all pairs of currencies
+
+    Rows and columns are indexed by ordinals of currency codes, so a lookup
+    is two list indexings. The matrix is immutable, with_rate() returns a
+    new one and recomputes only the cells the changed rate affects.
+    """
+
+    def __init__(
+        self,
+        policy: PathPolicy,
+        ordinals: dict[str, int],
+        rows: list[list[Cell | None]],
+        stored: frozenset[PairCodes],
+    ) -> None:
+        check_policy(policy)
+        self._policy: PathPolicy = policy
+        self._ordinals = ordinals
+        self._rows = rows
+        self._stored = stored
+
+    @classmethod
+    def from_graph(
+        cls,
+        graph: ExchangeRateGraph,
+        policy: PathPolicy = "fewest_hops",
+    ) -> "CrossRateMatrix":
+        """Build the matrix by a search from every currency"""
+        ordinals = {code: ordinal for ordinal, code in enumerate(graph.codes)}
+        rows: list[list[Cell | None]] = []
+        stored = set()
+        for code in ordinals:
+            row: list[Cell | None] = [None] * len(ordinals)
+            for target_code, edges in graph.paths_from(code, policy).items():
+                row[ordinals[target_code]] = _make_cell(edges)
+                # A stored rate is always the best path of its pair
+                if len(edges) == 1 and not edges[0].inverted:
+                    stored.add((code, target_code))
+            rows.append(row)
+        return cls(policy, ordinals, rows, frozenset(stored))
+
+    @property
+    def policy(self) -> PathPolicy:
+        return self._policy
+
+    def __len__(self) -> int:
+        """Number of currencies"""
+        return len(self._ordinals)
+
+    def find_path(self, base_code: str, target_code: str) -> ConversionPath | None:
+        cell = self._cell(base_code, target_code)
+        return None if cell is None else cell.path
+
+    def with_rate(self, exchange_rate: ExchangeRate) -> "CrossRateMatrix":
+        """Return the matrix with a created or updated stored rate"""
+        base_code, target_code = _pair(exchange_rate)
+
+        ordinals = dict(self._ordinals)
+        rows = [row.copy() for row in self._rows]
+        for code in (base_code, target_code):
+            if code not in ordinals:
+                ordinals[code] = len(ordinals)
+                for row in rows:
+                    row.append(None)
+                rows.append([None] * len(ordinals))
+
+        if (base_code, target_code) in self._stored:
+            _update_rate(rows, exchange_rate)
+        elif base_code != target_code:
+            self._insert_rate(ordinals, rows, exchange_rate)
+        return CrossRateMatrix(
+            self._policy,
+            ordinals,
+            rows,
+            self._stored | {(base_code, target_code)},
+        )
+
+    def _insert_rate(
+        self,
+        ordinals: dict[str, int],
+        rows: list[list[Cell | None]],
+        exchange_rate: ExchangeRate,
+    ) -> None:
+        """Relax every pair of the new rows through the edges of a new rate
+
+        A best path uses a new rate at most once, so a better path is a path
+        of this matrix to one end of the rate, the rate and a path of this
+        matrix from its other end.
+        """
+        base_code, target_code = _pair(exchange_rate)
+        new_edges = (
+            Edge(base_code, target_code, exchange_rate, inverted=False),
+            Edge(target_code, base_code, exchange_rate, inverted=True),
+        )
+        for source_code, source_ordinal in ordinals.items():
+            heads = [self._head(source_code, edge.source_code) for edge in new_edges]
+            if heads == [None, None]:
+                continue
+            row = rows[source_ordinal]
+            for destination_code, ordinal in ordinals.items():
+                if destination_code == source_code:
+                    continue
+                best = row[ordinal]
+                for edge, head in zip(new_edges, heads, strict=True):
+                    tail = self._head(edge.target_code, destination_code)
+                    if head is None or tail is None:
+                        continue
+                    cost = (
+                        head[0] + 1 + tail[0],
+                        head[1] + edge.inverted + tail[1],
+                    )
+                    if best is None or policy_key(cost, self._policy) < policy_key(
+                        best.cost, self._policy
+                    ):
+                        best = _make_cell((*head[2], edge, *tail[2]))
+                row[ordinal] = best
+
+    def _head(
+        self,
+        base_code: str,
+        target_code: str,
+    ) -> tuple[int, int, tuple[Edge, ...]] | None:
+        """Cost and edges of the best path, an empty one between equal codes"""
+        if base_code == target_code:
+            return 0, 0, ()
+        cell = self._cell(base_code, target_code)
+        if cell is None:
+            return None
+        return *cell.cost, cell.edges
+
+    def _cell(self, base_code: str, target_code: str) -> Cell | None:
+        base_ordinal = self._ordinals.get(base_code)
+        target_ordinal = self._ordinals.get(target_code)
+        if base_ordinal is None or target_ordinal is None:
+            return None
+        return self._rows[base_ordinal][target_ordinal]
+
+
+def _make_cell(edges: Sequence[Edge]) -> Cell:
+    return Cell(path_cost(edges), tuple(edges), conversion_path(edges))
+
+
+def _pair(exchange_rate: ExchangeRate) -> PairCodes:
+    return (
+        exchange_rate.base_currency.code.value,
+        exchange_rate.target_currency.code.value,
+    )
+
+
+def _update_rate(rows: list[list[Cell | None]], exchange_rate: ExchangeRate) -> None:
+    """Paths don't depend on rate values, only cells using the rate change"""
+    pair = _pair(exchange_rate)
+    for row in rows:
+        for ordinal, cell in enumerate(row):
+            if cell is None or all(
+                _pair(edge.exchange_rate) != pair for edge in cell.edges
+            ):
+                continue
+            edges = tuple(
+                replace(edge, exchange_rate=exchange_rate)
+                if _pair(edge.exchange_rate) == pair
+                else edge
+                for edge in cell.edges
+            )
+            row[ordinal] = Cell(cell.cost, edges, conversion_path(edges))
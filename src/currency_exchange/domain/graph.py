@@ -0,0 +1,200 @@
+import heapq
+import itertools
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from functools import reduce
+from typing import Final, Literal
+
+from currency_exchange.domain.models import ExchangeRate
+from currency_exchange.domain.services import (
+    merge_exchange_rate,
+    reverse_exchange_rate,
+)
+
+type PathPolicy = Literal["fewest_hops", "precision"]
+# Number of edges and how many of them go against the stored rate
+type PathCost = tuple[int, int]
+
+PATH_POLICIES: Final = frozenset({"fewest_hops", "precision"})
+
+
+@dataclass(frozen=True)
+class Edge:
+    """Stored exchange rate from ``source_code`` to ``target_code``
+
+    An inverted edge goes against the stored rate and uses its reverse.
+    """
+
+    source_code: str
+    target_code: str
+    exchange_rate: ExchangeRate
+    inverted: bool
+
+    def oriented(self) -> ExchangeRate:
+        if self.inverted:
+            return reverse_exchange_rate(self.exchange_rate)
+        return self.exchange_rate
+
+
+@dataclass(frozen=True)
+class ConversionPath:
+    """Currency codes of a conversion and the rate merged along them"""
+
+    codes: tuple[str, ...]
+    exchange_rate: ExchangeRate
+
+
+def conversion_path(edges: Sequence[Edge]) -> ConversionPath:
+    """Merge rates of non empty sequence of consecutive edges"""
+    return ConversionPath(
+        (edges[0].source_code, *(edge.target_code for edge in edges)),
+        reduce(merge_exchange_rate, (edge.oriented() for edge in edges)),
+    )
+
+
+def path_cost(edges: Sequence[Edge]) -> PathCost:
+    return len(edges), sum(edge.inverted for edge in edges)
+
+
+def policy_key(cost: PathCost, policy: PathPolicy) -> PathCost:
+    """Order of costs by the policy, the lesser is the better"""
+    hops, inversions = cost
+    if policy == "precision":
+        return inversions, hops
+    return hops, inversions
+
+
+def check_policy(policy: PathPolicy) -> None:
+    if policy not in PATH_POLICIES:
+        raise ValueError(
+            f"Path policy must be one of {sorted(PATH_POLICIES)}, got <{policy}>"
+        )
+
+
+class ExchangeRateGraph:
+    """Currencies as nodes, stored rates and their inverses as edges
+
+    Adjacency is built once, found paths are memoized, so repeated lookups
+    don't search again. The graph and its paths must not be mutated.
+
+    Policies of find_path():
+
+    - ``fewest_hops`` - shortest path, at equal length the one with fewer
+      reversed rates
+    - ``precision`` - fewest reversed rates, at equal count the shortest one.
+      Products of stored rates are exact, but a reversed rate is a division
+      rounded to the decimal context precision.
+    """
+
+    def __init__(self, exchange_rates: Iterable[ExchangeRate]) -> None:
+        adjacency: dict[str, list[Edge]] = {}
+        for exchange_rate in exchange_rates:
+            base_code = exchange_rate.base_currency.code.value
+            target_code = exchange_rate.target_currency.code.value
+            adjacency.setdefault(base_code, []).append(
+                Edge(base_code, target_code, exchange_rate, inverted=False)
+            )
+            adjacency.setdefault(target_code, []).append(
+                Edge(target_code, base_code, exchange_rate, inverted=True)
+            )
+        # Stored rates go first, so among equal paths the search keeps them
+        self._adjacency = {
+            code: tuple(sorted(edges, key=lambda edge: edge.inverted))
+            for code, edges in adjacency.items()
+        }
+        self._paths: dict[tuple[str, str, PathPolicy], ConversionPath | None] = {}
+
+    def __len__(self) -> int:
+        """Number of stored rates"""
+        return sum(len(edges) for edges in self._adjacency.values()) // 2
+
+    @property
+    def codes(self) -> list[str]:
+        """Codes of currencies having at least one rate"""
+        return list(self._adjacency)
+
+    def find_path(
+        self,
+        base_code: str,
+        target_code: str,
+        policy: PathPolicy = "fewest_hops",
+    ) -> ConversionPath | None:
+        check_policy(policy)
+        key = (base_code, target_code, policy)
+        try:
+            return self._paths[key]
+        except KeyError:
+            pass
+
+        path = None
+        if (
+            base_code != target_code
+            and base_code in self._adjacency
+            and target_code in self._adjacency
+        ):
+            previous = self._search(base_code, policy, target_code)
+            if target_code in previous:
+                path = conversion_path(_edges_to(previous, base_code, target_code))
+        self._paths[key] = path
+        return path
+
+    def paths_from(
+        self,
+        base_code: str,
+        policy: PathPolicy = "fewest_hops",
+    ) -> dict[str, list[Edge]]:
+        """Edges of the best paths to every currency reachable from base_code"""
+        check_policy(policy)
+        if base_code not in self._adjacency:
+            return {}
+        previous = self._search(base_code, policy)
+        return {
+            target_code: _edges_to(previous, base_code, target_code)
+            for target_code in previous
+        }
+
+    def _search(
+        self,
+        base_code: str,
+        policy: PathPolicy,
+        target_code: str | None = None,
+    ) -> dict[str, Edge]:
+        """Dijkstra search over (hops, inversions) compared by the policy
+
+        Return the last edge of the best path to every reached currency,
+        with ``target_code`` the search stops once it is reached.
+        """
+        start = policy_key((0, 0), policy)
+        best = {base_code: start}
+        previous: dict[str, Edge] = {}
+        # The counter keeps pops of equal costs in insertion order
+        order = itertools.count()
+        queue = [(start, next(order), base_code, (0, 0))]
+        while queue:
+            current_key, _, code, (hops, inversions) = heapq.heappop(queue)
+            if code == target_code:
+                break
+            if current_key > best[code]:
+                continue
+            for edge in self._adjacency[code]:
+                cost = (hops + 1, inversions + edge.inverted)
+                key = policy_key(cost, policy)
+                if edge.target_code in best and best[edge.target_code] <= key:
+                    continue
+                best[edge.target_code] = key
+                previous[edge.target_code] = edge
+                heapq.heappush(queue, (key, next(order), edge.target_code, cost))
+        return previous
+
+
+def _edges_to(
+    previous: dict[str, Edge], base_code: str, target_code: str
+) -> list[Edge]:
+    edges = []
+    code = target_code
+    while code != base_code:
+        edge = previous[code]
+        edges.append(edge)
+        code = edge.source_code
+    edges.reverse()
+    return edges
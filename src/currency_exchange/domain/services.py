@@ -1,3 +1,4 @@
+from collections.abc import Iterable
 from decimal import Decimal
 
 from currency_exchange.domain.exceptions import (
@@ -11,6 +12,14 @@ def exchange_currency(exchange_rate: ExchangeRate, amount: Decimal) -> Decimal:
     return exchange_rate.rate.value * amount
 
 
+def exchange_currencies(
+    exchange_rate: ExchangeRate,
+    amounts: Iterable[Decimal],
+) -> list[Decimal]:
+    """exchange_currency of every amount by one rate, in a single C-level pass"""
+    return list(map(exchange_rate.rate.value.__mul__, amounts))
+
+
 def reverse_exchange_rate(exchange_rate: ExchangeRate) -> ExchangeRate:
     reverse_rate_value = 1 / exchange_rate.rate.value
     reverse_rate = Rate(reverse_rate_value)
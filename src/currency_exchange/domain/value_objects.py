@@ -30,6 +30,12 @@ class Rate(ValueObject[Decimal]):
 class CurrencyCode(ValueObject[str]):
     value: str
 
+    @override
+    def __post_init__(self) -> None:
+        # ISO 4217 codes are upper case, usd and USD are the same currency
+        object.__setattr__(self, "value", self.value.upper())
+        super().__post_init__()
+
     @override
     def _validate(self) -> None:
         count_letters = 3
@@ -0,0 +1,227 @@
+import threading
+import time
+from collections.abc import Iterator
+from copy import copy
+from typing import Protocol, override
+
+from currency_exchange.application.exceptions import ExchangeRateNotFoundError
+from currency_exchange.application.models import CacheStatsDTO
+from currency_exchange.application.monitoring import CacheMonitor
+from currency_exchange.application.repo import ConversionLegs, ExchangeRateRepository
+from currency_exchange.domain.cross_rates import CrossRateMatrix
+from currency_exchange.domain.graph import ExchangeRateGraph, PathPolicy
+from currency_exchange.domain.models import ExchangeRate
+
+type PairCodes = tuple[str, str]
+type RatesTable = dict[PairCodes, ExchangeRate]
+
+
+class VersionedExchangeRateRepository(ExchangeRateRepository, Protocol):
+    def get_data_version(self) -> int:
+        """Return a number that changes whenever exchange rates change"""
+        ...
+
+
+class ExchangeRateCache(CacheMonitor):
+    """Whole exchange rate table of the process indexed by currency codes
+
+    The table is reloaded when the data version of the storage differs from
+    the version it was loaded at. The version is checked at most once per
+    ``check_interval`` seconds, so changes made by other processes are seen
+    with at most that delay, changes of this process are written through.
+    """
+
+    def __init__(self, check_interval: float = 0.5) -> None:
+        self._check_interval = check_interval
+        self._rates: dict[PairCodes, ExchangeRate] = {}
+        # The graph together with the table it was built from
+        self._graph: tuple[RatesTable, ExchangeRateGraph] | None = None
+        self._cross_rates: dict[PathPolicy, tuple[RatesTable, CrossRateMatrix]] = {}
+        self._version: int | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+        # Counted by every read, apart from _lock held by reloads
+        self._counters_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._reloads = 0
+        self._invalidations = 0
+
+    def rates(
+        self, repo: VersionedExchangeRateRepository
+    ) -> dict[PairCodes, ExchangeRate]:
+        """Return the fresh table, cached rates must not be mutated"""
+        now = time.monotonic()
+        is_checked = now - self._checked_at < self._check_interval
+        if self._version is not None and is_checked:
+            return self._rates
+
+        version = repo.get_data_version()
+        with self._lock:
+            self._checked_at = now
+            if version == self._version:
+                return self._rates
+            if self._version is not None:
+                self._invalidations += 1
+            # Loaded outside of any write, a concurrent write bumps the
+            # version again and the next check reloads the table.
+            self._rates = {
+                _codes(exchange_rate): exchange_rate
+                for exchange_rate in repo.iter_all()
+            }
+            self._version = version
+            self._reloads += 1
+            return self._rates
+
+    def graph(self, repo: VersionedExchangeRateRepository) -> ExchangeRateGraph:
+        """Return the graph of the fresh table, built once per its change"""
+        return self._graph_of(self.rates(repo))
+
+    def cross_rates(
+        self,
+        repo: VersionedExchangeRateRepository,
+        policy: PathPolicy,
+    ) -> CrossRateMatrix:
+        """Return cross rates of the fresh table
+
+        The matrix is built once per reload of the table, rates written
+        through update it incrementally.
+        """
+        rates = self.rates(repo)
+        cross_rates = self._cross_rates.get(policy)
+        if cross_rates is None or cross_rates[0] is not rates:
+            cross_rates = (
+                rates,
+                CrossRateMatrix.from_graph(self._graph_of(rates), policy),
+            )
+            self._cross_rates[policy] = cross_rates
+        return cross_rates[1]
+
+    def _graph_of(self, rates: RatesTable) -> ExchangeRateGraph:
+        graph = self._graph
+        if graph is None or graph[0] is not rates:
+            graph = (rates, ExchangeRateGraph(rates.values()))
+            self._graph = graph
+        return graph[1]
+
+    def get(
+        self,
+        repo: VersionedExchangeRateRepository,
+        codes: PairCodes,
+    ) -> ExchangeRate | None:
+        exchange_rate = self.rates(repo).get(codes)
+        with self._counters_lock:
+            if exchange_rate is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return None if exchange_rate is None else copy(exchange_rate)
+
+    def put(
+        self,
+        exchange_rate: ExchangeRate,
+        version_before: int,
+        version_after: int,
+    ) -> None:
+        """Write the rate through if nobody else changed the storage meanwhile"""
+        with self._lock:
+            if self._version is None:
+                return
+            if self._version != version_before or version_after != version_before + 1:
+                self._version = None
+                self._invalidations += 1
+                return
+            stored_rate = copy(exchange_rate)
+            rates = dict(self._rates)
+            rates[_codes(stored_rate)] = stored_rate
+            self._cross_rates = {
+                policy: (rates, matrix.with_rate(stored_rate))
+                for policy, (table, matrix) in self._cross_rates.items()
+                if table is self._rates
+            }
+            self._rates = rates
+            self._version = version_after
+
+    @override
+    def stats(self) -> CacheStatsDTO:
+        with self._counters_lock:
+            hits, misses = self._hits, self._misses
+        with self._lock:
+            return CacheStatsDTO(
+                size=len(self._rates),
+                hits=hits,
+                misses=misses,
+                reloads=self._reloads,
+                invalidations=self._invalidations,
+            )
+
+
+class CachingExchangeRateRepository(ExchangeRateRepository):
+    """Serves reads of the decorated repository from ExchangeRateCache"""
+
+    def __init__(
+        self,
+        exchange_rate_repo: VersionedExchangeRateRepository,
+        cache: ExchangeRateCache,
+    ) -> None:
+        self._exchange_rate_repo = exchange_rate_repo
+        self._cache = cache
+
+    @override
+    def get_all(self) -> list[ExchangeRate]:
+        return list(self.iter_all())
+
+    @override
+    def iter_all(self) -> Iterator[ExchangeRate]:
+        # A reload replaces the table, the one being iterated doesn't change
+        rates = self._cache.rates(self._exchange_rate_repo)
+        return (copy(rate) for rate in rates.values())
+
+    @override
+    def get_by_currency_codes(self, base_code: str, target_code: str) -> ExchangeRate:
+        exchange_rate = self._cache.get(
+            self._exchange_rate_repo, (base_code, target_code)
+        )
+        if exchange_rate is None:
+            raise ExchangeRateNotFoundError(
+                f"Not found exchange rate from <{base_code}> to <{target_code}>",
+            )
+        return exchange_rate
+
+    @override
+    def get_conversion_legs(
+        self,
+        base_code: str,
+        target_code: str,
+        related_code: str,
+    ) -> ConversionLegs:
+        repo = self._exchange_rate_repo
+        return ConversionLegs(
+            direct=self._cache.get(repo, (base_code, target_code)),
+            reverse=self._cache.get(repo, (target_code, base_code)),
+            to_pivot=self._cache.get(repo, (base_code, related_code)),
+            from_pivot=self._cache.get(repo, (related_code, target_code)),
+        )
+
+    @override
+    def get_graph(self) -> ExchangeRateGraph:
+        return self._cache.graph(self._exchange_rate_repo)
+
+    @override
+    def get_cross_rates(self, policy: PathPolicy) -> CrossRateMatrix:
+        return self._cache.cross_rates(self._exchange_rate_repo, policy)
+
+    @override
+    def add(self, exchange_rate: ExchangeRate) -> None:
+        version_before = self._exchange_rate_repo.get_data_version()
+        self._exchange_rate_repo.add(exchange_rate)
+        version_after = self._exchange_rate_repo.get_data_version()
+        self._cache.put(exchange_rate, version_before, version_after)
+
+
+def _codes(exchange_rate: ExchangeRate) -> PairCodes:
+    return (
+        exchange_rate.base_currency.code.value,
+        exchange_rate.target_currency.code.value,
+    )
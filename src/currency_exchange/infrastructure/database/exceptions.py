@@ -0,0 +1,7 @@
+class ConnectionPoolTimeoutError(Exception): ...
+
+
+class ConnectionPoolClosedError(Exception): ...
+
+
+class MigrationError(Exception): ...
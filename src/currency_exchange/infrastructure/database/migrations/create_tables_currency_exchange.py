@@ -1,28 +1,14 @@
-from sqlite3 import Connection, connect
+from sqlite3 import Connection
 
-
-def up() -> None:
-    db_path = "currency_exchange.db"
-    connection = connect(db_path)
-    try:
-        upgrade(connection)
-    finally:
-        connection.close()
-
-
-def down() -> None:
-    db_path = "currency_exchange.db"
-    connection = connect(db_path)
-    try:
-        downgrade(connection)
-    finally:
-        connection.close()
+from currency_exchange.infrastructure.database.migrations.transactions import (
+    execute_script,
+)
 
 
 def upgrade(connection: Connection) -> None:
-    with connection as conn:
-        conn.executescript(
-            """
+    execute_script(
+        connection,
+        """
         CREATE TABLE IF NOT EXISTS currencies (
             id BLOB(16) PRIMARY KEY,
             code TEXT UNIQUE CHECK(length(code) <= 3),
@@ -45,18 +31,67 @@ def upgrade(connection: Connection) -> None:
 
         CREATE UNIQUE INDEX IF NOT EXISTS exchange_rates_currencies
         ON exchange_rates(base_currency, target_currency);
+
+        CREATE TABLE IF NOT EXISTS data_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+
+        INSERT OR IGNORE INTO data_versions (name) VALUES ('exchange_rates');
+
+        CREATE TRIGGER IF NOT EXISTS exchange_rates_version_insert
+        AFTER INSERT ON exchange_rates
+        BEGIN
+            UPDATE data_versions SET version = version + 1
+            WHERE name = 'exchange_rates';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS exchange_rates_version_update
+        AFTER UPDATE ON exchange_rates
+        BEGIN
+            UPDATE data_versions SET version = version + 1
+            WHERE name = 'exchange_rates';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS exchange_rates_version_delete
+        AFTER DELETE ON exchange_rates
+        BEGIN
+            UPDATE data_versions SET version = version + 1
+            WHERE name = 'exchange_rates';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS currencies_version_update
+        AFTER UPDATE ON currencies
+        BEGIN
+            UPDATE data_versions SET version = version + 1
+            WHERE name = 'exchange_rates';
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS currencies_version_delete
+        AFTER DELETE ON currencies
+        BEGIN
+            UPDATE data_versions SET version = version + 1
+            WHERE name = 'exchange_rates';
+        END;
         """,
-        )
+    )
 
 
 def downgrade(connection: Connection) -> None:
-    with connection as conn:
-        conn.executescript(
-            """
+    execute_script(
+        connection,
+        """
+        DROP TRIGGER IF EXISTS currencies_version_delete;
+        DROP TRIGGER IF EXISTS currencies_version_update;
+        DROP TRIGGER IF EXISTS exchange_rates_version_delete;
+        DROP TRIGGER IF EXISTS exchange_rates_version_update;
+        DROP TRIGGER IF EXISTS exchange_rates_version_insert;
+        DROP TABLE IF EXISTS data_versions;
+
         DROP INDEX IF EXISTS exchange_rates_target_currency;
         DROP INDEX IF EXISTS exchange_rates_base_currency;
 
         DROP TABLE IF EXISTS exchange_rates;
         DROP TABLE IF EXISTS currencies;
         """,
-        )
+    )
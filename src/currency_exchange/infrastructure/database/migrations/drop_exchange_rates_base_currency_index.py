@@ -0,0 +1,16 @@
+from sqlite3 import Connection
+
+
+def upgrade(connection: Connection) -> None:
+    """The unique index on (base_currency, target_currency) serves lookups
+    by base_currency, a separate index only slows down writes"""
+    connection.execute("DROP INDEX IF EXISTS exchange_rates_base_currency;")
+
+
+def downgrade(connection: Connection) -> None:
+    connection.execute(
+        """
+        CREATE INDEX IF NOT EXISTS exchange_rates_base_currency
+        ON exchange_rates(base_currency);
+        """
+    )
@@ -0,0 +1,26 @@
+from sqlite3 import Connection
+
+from currency_exchange.infrastructure.database.migrations.transactions import (
+    execute_script,
+)
+
+
+def upgrade(connection: Connection) -> None:
+    """Time of the last write of a rate, ISO 8601 in UTC
+
+    ADD COLUMN can't default to the current time, so existing rates get
+    the time of the migration and writes set it explicitly.
+    """
+    execute_script(
+        connection,
+        """
+        ALTER TABLE exchange_rates ADD COLUMN updated_at TEXT;
+
+        UPDATE exchange_rates
+        SET updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now');
+        """,
+    )
+
+
+def downgrade(connection: Connection) -> None:
+    connection.execute("ALTER TABLE exchange_rates DROP COLUMN updated_at;")
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from sqlite3 import Connection
+
+from currency_exchange.domain.bulk import RATE_SCALE
+from currency_exchange.infrastructure.database.rates import RateColumn
+
+
+def upgrade(connection: Connection) -> None:
+    """Store rates as INTEGER in millionths, rounded half to even
+
+    A column already converted is left as it is.
+    """
+    if RateColumn.detect(connection).scale is not None:
+        return
+    _convert_column(connection, "INTEGER", RateColumn(RATE_SCALE))
+
+
+def downgrade(connection: Connection) -> None:
+    """Store rates as DECIMAL(16, 6) again"""
+    if RateColumn.detect(connection).scale is None:
+        return
+    _convert_column(connection, "DECIMAL(16, 6)", RateColumn())
+
+
+def _convert_column(connection: Connection, rate_type: str, target: RateColumn) -> None:
+    """Replace the column by a new one of ``rate_type``
+
+    SQLite can't change the type of a column, but a column without
+    indexes can be dropped (SQLite 3.35+), so indexes and triggers of
+    the table stay as they are.
+    """
+    source = RateColumn.detect(connection)
+    # CAST has no declared type, so no converter parses the value
+    rows = connection.execute(
+        "SELECT id, CAST(rate AS TEXT) FROM exchange_rates;"
+    ).fetchall()
+    connection.execute(
+        f"ALTER TABLE exchange_rates ADD COLUMN converted_rate {rate_type};"
+    )
+    connection.executemany(
+        "UPDATE exchange_rates SET converted_rate = ? WHERE id = ?;",
+        [(_convert(rate, source, target), id_) for id_, rate in rows],
+    )
+    connection.execute("ALTER TABLE exchange_rates DROP COLUMN rate;")
+    connection.execute(
+        "ALTER TABLE exchange_rates RENAME COLUMN converted_rate TO rate;"
+    )
+
+
+def _convert(rate: str, source: RateColumn, target: RateColumn) -> str | int:
+    value = target.to_storage(
+        source.from_storage(int(rate) if source.scale is not None else Decimal(rate))
+    )
+    return str(value) if isinstance(value, Decimal) else value
@@ -0,0 +1,155 @@
+from sqlite3 import Connection
+
+from currency_exchange.infrastructure.database.migrations.transactions import (
+    execute_script,
+)
+
+VERSION_TRIGGERS = """
+    CREATE TRIGGER exchange_rates_version_insert
+    AFTER INSERT ON exchange_rates
+    BEGIN
+        UPDATE data_versions SET version = version + 1
+        WHERE name = 'exchange_rates';
+    END;
+
+    CREATE TRIGGER exchange_rates_version_update
+    AFTER UPDATE ON exchange_rates
+    BEGIN
+        UPDATE data_versions SET version = version + 1
+        WHERE name = 'exchange_rates';
+    END;
+
+    CREATE TRIGGER exchange_rates_version_delete
+    AFTER DELETE ON exchange_rates
+    BEGIN
+        UPDATE data_versions SET version = version + 1
+        WHERE name = 'exchange_rates';
+    END;
+
+    CREATE TRIGGER currencies_version_update
+    AFTER UPDATE ON currencies
+    BEGIN
+        UPDATE data_versions SET version = version + 1
+        WHERE name = 'exchange_rates';
+    END;
+
+    CREATE TRIGGER currencies_version_delete
+    AFTER DELETE ON currencies
+    BEGIN
+        UPDATE data_versions SET version = version + 1
+        WHERE name = 'exchange_rates';
+    END;
+"""
+
+
+def upgrade(connection: Connection) -> None:
+    """Key currencies by an integer rowid, UUIDs stay the public ids
+
+    Rates are a WITHOUT ROWID table clustered by the pair of currency
+    keys, so a rate of a pair is one seek in the primary key. The
+    covering index of currencies by code holds all their columns and
+    the key, so a lookup by a pair of codes doesn't read the tables.
+    """
+    rate_type = _rate_type(connection)
+    execute_script(
+        connection,
+        f"""
+        CREATE TABLE currencies_keyed (
+            key INTEGER PRIMARY KEY,
+            id BLOB(16) NOT NULL UNIQUE,
+            code TEXT UNIQUE CHECK(length(code) <= 3),
+            sign TEXT CHECK(length(code) <= 5),
+            name TEXT CHECK(length(code) <= 30)
+        );
+
+        INSERT INTO currencies_keyed (key, id, code, sign, name)
+        SELECT rowid, id, code, sign, name FROM currencies ORDER BY rowid;
+
+        CREATE TABLE exchange_rates_keyed (
+            base_currency INTEGER NOT NULL
+                REFERENCES currencies_keyed(key) ON DELETE CASCADE,
+            target_currency INTEGER NOT NULL
+                REFERENCES currencies_keyed(key) ON DELETE CASCADE,
+            id BLOB(16) NOT NULL UNIQUE,
+            rate {rate_type},
+            PRIMARY KEY (base_currency, target_currency)
+        ) WITHOUT ROWID;
+
+        INSERT INTO exchange_rates_keyed (base_currency, target_currency, id, rate)
+        SELECT base_currency.key, target_currency.key, exchange_rates.id, rate
+        FROM exchange_rates
+        JOIN currencies_keyed AS base_currency
+        ON base_currency.id = exchange_rates.base_currency
+        JOIN currencies_keyed AS target_currency
+        ON target_currency.id = exchange_rates.target_currency;
+
+        DROP TABLE exchange_rates;
+        DROP TABLE currencies;
+        ALTER TABLE currencies_keyed RENAME TO currencies;
+        ALTER TABLE exchange_rates_keyed RENAME TO exchange_rates;
+
+        CREATE INDEX exchange_rates_target_currency
+        ON exchange_rates(target_currency);
+
+        CREATE INDEX currencies_code_covering
+        ON currencies(code, id, sign, name);
+        """,
+    )
+    execute_script(connection, VERSION_TRIGGERS)
+
+
+def downgrade(connection: Connection) -> None:
+    rate_type = _rate_type(connection)
+    execute_script(
+        connection,
+        f"""
+        CREATE TABLE currencies_by_id (
+            id BLOB(16) PRIMARY KEY,
+            code TEXT UNIQUE CHECK(length(code) <= 3),
+            sign TEXT CHECK(length(code) <= 5),
+            name TEXT CHECK(length(code) <= 30)
+        );
+
+        INSERT INTO currencies_by_id (id, code, sign, name)
+        SELECT id, code, sign, name FROM currencies ORDER BY key;
+
+        CREATE TABLE exchange_rates_by_id (
+            id BLOB(16) PRIMARY KEY,
+            base_currency BLOB(16)
+                REFERENCES currencies_by_id(id) ON DELETE CASCADE,
+            target_currency BLOB(16)
+                REFERENCES currencies_by_id(id) ON DELETE CASCADE,
+            rate {rate_type}
+        );
+
+        INSERT INTO exchange_rates_by_id (id, base_currency, target_currency, rate)
+        SELECT exchange_rates.id, base_currency.id, target_currency.id, rate
+        FROM exchange_rates
+        JOIN currencies AS base_currency
+        ON base_currency.key = exchange_rates.base_currency
+        JOIN currencies AS target_currency
+        ON target_currency.key = exchange_rates.target_currency;
+
+        DROP TABLE exchange_rates;
+        DROP TABLE currencies;
+        ALTER TABLE currencies_by_id RENAME TO currencies;
+        ALTER TABLE exchange_rates_by_id RENAME TO exchange_rates;
+
+        CREATE INDEX exchange_rates_target_currency
+        ON exchange_rates(target_currency);
+
+        CREATE UNIQUE INDEX exchange_rates_currencies
+        ON exchange_rates(base_currency, target_currency);
+        """,
+    )
+    execute_script(connection, VERSION_TRIGGERS)
+
+
+def _rate_type(connection: Connection) -> str:
+    """DECIMAL(16, 6) or INTEGER after the fixed point rates migration"""
+    for _, name, declared_type, *_ in connection.execute(
+        "PRAGMA table_info(exchange_rates);"
+    ):
+        if name == "rate":
+            return str(declared_type)
+    return "DECIMAL(16, 6)"
@@ -0,0 +1,272 @@
+import argparse
+import sys
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from logging import getLogger
+from sqlite3 import Connection, connect
+
+from currency_exchange.config import load_default_config
+from currency_exchange.infrastructure.database.exceptions import MigrationError
+from currency_exchange.infrastructure.database.migrations import (
+    create_tables_currency_exchange,
+    drop_exchange_rates_base_currency_index,
+    exchange_rates_updated_at,
+    fixed_point_rates,
+    integer_currency_keys,
+)
+from currency_exchange.infrastructure.database.migrations.transactions import (
+    transaction,
+)
+
+logger = getLogger(__name__)
+
+type Step = Callable[[Connection], None]
+
+# Journal modes in which building an index doesn't block readers
+ONLINE_JOURNAL_MODES = frozenset({"wal", "memory"})
+
+SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    """Numbered change of the schema
+
+    Every step runs in its own transaction together with the update of
+    schema_version, so a failed step leaves the previous version. Steps
+    must not commit, use execute_script() instead of executescript().
+
+    An ``online`` migration only creates or drops indexes and may run
+    while servers use the database. SQLite can't build an index without
+    the write lock, so readers go on in WAL mode, writers wait for the
+    build up to their busy_timeout, and the runner refuses other journal
+    modes, where readers would wait too. The index statistics are
+    refreshed after the build.
+    """
+
+    version: int
+    name: str
+    upgrade: Step
+    downgrade: Step
+    online: bool = False
+
+
+def index_migration(version: int, name: str, index: str, definition: str) -> Migration:
+    """Online migration creating ``index`` by ``definition`` of CREATE INDEX
+
+    >>> migration = index_migration(
+    ...     3, "index rates", "rates_pair", "ON rates(base, target)"
+    ... )
+    >>> migration.online
+    True
+    """
+
+    def upgrade(connection: Connection) -> None:
+        connection.execute(f"CREATE INDEX IF NOT EXISTS {index} {definition};")
+
+    def downgrade(connection: Connection) -> None:
+        connection.execute(f"DROP INDEX IF EXISTS {index};")
+
+    return Migration(version, name, upgrade, downgrade, online=True)
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(
+        1,
+        "create tables",
+        create_tables_currency_exchange.upgrade,
+        create_tables_currency_exchange.downgrade,
+    ),
+    Migration(
+        2,
+        "drop exchange_rates_base_currency index",
+        drop_exchange_rates_base_currency_index.upgrade,
+        drop_exchange_rates_base_currency_index.downgrade,
+    ),
+    Migration(
+        3,
+        "integer currency keys",
+        integer_currency_keys.upgrade,
+        integer_currency_keys.downgrade,
+    ),
+    Migration(
+        4,
+        "exchange_rates updated_at",
+        exchange_rates_updated_at.upgrade,
+        exchange_rates_updated_at.downgrade,
+    ),
+    index_migration(
+        5,
+        "index exchange_rates updated_at",
+        "exchange_rates_updated_at",
+        "ON exchange_rates(updated_at)",
+    ),
+    Migration(
+        6,
+        "fixed point rates",
+        fixed_point_rates.upgrade,
+        fixed_point_rates.downgrade,
+    ),
+)
+
+
+def current_version(connection: Connection) -> int:
+    """Latest applied version, 0 for a database without migrations"""
+    exists = connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version';"
+    ).fetchone()
+    if not exists:
+        return 0
+    (version,) = connection.execute(
+        "SELECT coalesce(max(version), 0) FROM schema_version;"
+    ).fetchone()
+    return int(version)
+
+
+def migrate(
+    connection: Connection,
+    target: int | None = None,
+    migrations: Sequence[Migration] = MIGRATIONS,
+    *,
+    offline: bool = False,
+) -> None:
+    """Apply or roll back migrations one by one up to ``target``, the latest
+    by default
+
+    The version is read again under the write lock before every step,
+    so runners started at once don't apply a migration twice. ``offline``
+    means nobody else uses the database, so online migrations may run in
+    any journal mode.
+    """
+    by_version = {migration.version: migration for migration in migrations}
+    if sorted(by_version) != list(range(1, len(migrations) + 1)):
+        raise MigrationError("Migrations must be numbered 1, 2, 3... without gaps")
+    if target is None:
+        target = len(migrations)
+    if not 0 <= target <= len(migrations):
+        raise MigrationError(
+            f"Target version must be from 0 to {len(migrations)}, got <{target}>"
+        )
+
+    with transaction(connection):
+        connection.execute(SCHEMA_VERSION_TABLE)
+
+    while True:
+        with transaction(connection):
+            version = current_version(connection)
+            if version > len(migrations):
+                raise MigrationError(
+                    f"Database version <{version}> is newer than known migrations"
+                )
+            if version == target:
+                return
+            migration = by_version[version + 1 if version < target else version]
+            if migration.online and not offline:
+                _check_online(connection)
+            if version < target:
+                migration.upgrade(connection)
+                connection.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (?, ?);",
+                    (migration.version, migration.name),
+                )
+            else:
+                migration.downgrade(connection)
+                connection.execute(
+                    "DELETE FROM schema_version WHERE version = ?;",
+                    (migration.version,),
+                )
+        if migration.online:
+            connection.execute("PRAGMA optimize;")
+        logger.info(
+            "%s migration %s %s",
+            "Applied" if version < target else "Rolled back",
+            migration.version,
+            migration.name,
+        )
+
+
+def migration_status(
+    connection: Connection,
+    migrations: Sequence[Migration] = MIGRATIONS,
+) -> list[tuple[Migration, bool]]:
+    """Known migrations and whether each is applied"""
+    version = current_version(connection)
+    return [(migration, migration.version <= version) for migration in migrations]
+
+
+def up() -> None:
+    parser = _parser("Apply all migrations")
+    args = parser.parse_args()
+    _migrate(parser, None, offline=args.offline)
+
+
+def down() -> None:
+    parser = _parser("Roll back all migrations")
+    args = parser.parse_args()
+    _migrate(parser, 0, offline=args.offline)
+
+
+def to() -> None:
+    parser = _parser("Apply or roll back migrations up to a version")
+    parser.add_argument("version", type=int, help="0 rolls back all migrations")
+    args = parser.parse_args()
+    _migrate(parser, args.version, offline=args.offline)
+
+
+def status() -> None:
+    with _connect() as connection:
+        for migration, applied in migration_status(connection):
+            sys.stdout.write(
+                f"{migration.version:>4} {'applied' if applied else 'pending':<8}"
+                f" {migration.name}\n"
+            )
+
+
+def _parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="the database isn't in use, build indexes in any journal mode",
+    )
+    return parser
+
+
+def _migrate(
+    parser: argparse.ArgumentParser,
+    target: int | None,
+    *,
+    offline: bool,
+) -> None:
+    with _connect() as connection:
+        try:
+            migrate(connection, target, offline=offline)
+        except MigrationError as ex:
+            parser.error(str(ex))
+
+
+@contextmanager
+def _connect() -> Iterator[Connection]:
+    database_config = load_default_config().database
+    connection = connect(database_config.path)
+    try:
+        database_config.profile.apply(connection)
+        yield connection
+    finally:
+        connection.close()
+
+
+def _check_online(connection: Connection) -> None:
+    (journal_mode,) = connection.execute("PRAGMA journal_mode;").fetchone()
+    if journal_mode.lower() not in ONLINE_JOURNAL_MODES:
+        raise MigrationError(
+            f"Index builds block readers in <{journal_mode}> journal mode,"
+            " switch the database to WAL"
+        )
@@ -0,0 +1,41 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from sqlite3 import Connection, complete_statement
+
+from currency_exchange.infrastructure.database.exceptions import MigrationError
+
+
+def execute_script(connection: Connection, script: str) -> None:
+    """Execute statements of a script one by one in the current transaction
+
+    Unlike Connection.executescript() it doesn't commit first.
+    """
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if complete_statement(statement):
+            connection.execute(statement)
+            statement = ""
+    if statement.strip():
+        raise MigrationError(f"Incomplete statement <{statement.strip()}>")
+
+
+@contextmanager
+def transaction(connection: Connection) -> Iterator[None]:
+    """Explicit transaction taking the write lock at once
+
+    The sqlite3 module commits implicitly before DDL in its default mode,
+    so it is switched to autocommit and statements are issued by hand.
+    """
+    isolation_level = connection.isolation_level
+    connection.isolation_level = None
+    try:
+        connection.execute("BEGIN IMMEDIATE;")
+        try:
+            yield
+        except BaseException:
+            connection.execute("ROLLBACK;")
+            raise
+        connection.execute("COMMIT;")
+    finally:
+        connection.isolation_level = isolation_level
@@ -0,0 +1,223 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from logging import getLogger
+from sqlite3 import Connection, connect
+from typing import override
+
+from currency_exchange.application.models import ConnectionPoolStatsDTO
+from currency_exchange.application.monitoring import ConnectionPoolMonitor
+from currency_exchange.infrastructure.database.exceptions import (
+    ConnectionPoolClosedError,
+    ConnectionPoolTimeoutError,
+)
+from currency_exchange.infrastructure.database.profile import (
+    CheckpointMode,
+    SQLiteProfile,
+    checkpoint,
+)
+
+logger = getLogger(__name__)
+
+
+class ConnectionLease:
+    """Connection borrowed from the pool until release()"""
+
+    def __init__(self, pool: "SQLiteConnectionPool", connection: Connection) -> None:
+        self._pool = pool
+        self.connection = connection
+
+    def release(self) -> None:
+        self._pool.release(self.connection)
+
+
+class SQLiteConnectionPool(ConnectionPoolMonitor):
+    """Bounded pool of SQLite connections shared by the threads of a process
+
+    At least ``min_size`` connections are kept open and at most ``max_size``
+    are open at once; acquire() waits up to ``timeout`` seconds for a free
+    one. ``setup`` runs once per new connection, by default it applies
+    SQLiteProfile(). Returned connections are rolled back if a transaction
+    was left open and discarded if they fail a health check.
+
+    Commits checkpoint the WAL passively, but a checkpoint can't complete
+    while readers use the old snapshot, so under constant reads the WAL keeps
+    growing. With ``checkpoint_interval`` a background thread retries a
+    passive checkpoint every that many seconds, close() truncates the WAL.
+
+    Connections must not be shared by processes, create the pool after fork.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        database: str,
+        *,
+        min_size: int = 1,
+        max_size: int = 8,
+        timeout: float = 5.0,
+        setup: Callable[[Connection], None] | None = None,
+        checkpoint_interval: float | None = None,
+    ) -> None:
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError(
+                f"Pool size must be 0 <= min_size <= max_size and max_size >= 1,"
+                f" got <{min_size}, {max_size}>"
+            )
+        self._database = database
+        self._max_size = max_size
+        self._timeout = timeout
+        self._setup = setup or SQLiteProfile().apply
+        self._checkpoint_interval = checkpoint_interval
+        self._checkpointer: threading.Thread | None = None
+
+        self._idle: deque[Connection] = deque()
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stopped = threading.Event()
+
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._creations = 0
+        self._discards = 0
+
+        for _ in range(min_size):
+            self._idle.append(self._create())
+            self._size += 1
+
+    def lease(self) -> ConnectionLease:
+        return ConnectionLease(self, self.acquire())
+
+    def acquire(self) -> Connection:
+        """Borrow a connection, raise ConnectionPoolTimeoutError"""
+        with self._condition:
+            if self._checkpointer is None and self._checkpoint_interval:
+                self._start_checkpointer(self._checkpoint_interval)
+            deadline = None
+            while not self._idle and self._size >= self._max_size:
+                if self._closed:
+                    raise ConnectionPoolClosedError
+                if deadline is None:
+                    self._waits += 1
+                    deadline = time.monotonic() + self._timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    self._timeouts += 1
+                    raise ConnectionPoolTimeoutError(
+                        f"No free connection in {self._timeout} seconds"
+                    )
+            if self._closed:
+                raise ConnectionPoolClosedError
+            self._checkouts += 1
+            if self._idle:
+                # The most recently used connection has the warmest page cache
+                return self._idle.pop()
+            self._size += 1
+
+        try:
+            return self._create()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, connection: Connection) -> None:
+        healthy = self._is_healthy(connection)
+        with self._condition:
+            if healthy and not self._closed:
+                self._idle.append(connection)
+                self._condition.notify()
+                return
+            self._size -= 1
+            if not healthy:
+                self._discards += 1
+            self._condition.notify()
+        connection.close()
+
+    def checkpoint(self, mode: CheckpointMode = "PASSIVE") -> None:
+        connection = self.acquire()
+        try:
+            checkpoint(connection, mode)
+        finally:
+            self.release(connection)
+
+    def close(self) -> None:
+        """Close idle connections, connections in use are closed on release"""
+        self._stopped.set()
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+            checkpointer = self._checkpointer
+        if checkpointer is not None:
+            checkpointer.join()
+        if idle:
+            try:
+                checkpoint(idle[0], "TRUNCATE")
+            except sqlite3.Error:
+                logger.exception("Error while checkpointing %s", self._database)
+        for connection in idle:
+            connection.close()
+
+    @override
+    def stats(self) -> ConnectionPoolStatsDTO:
+        with self._condition:
+            return ConnectionPoolStatsDTO(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                max_size=self._max_size,
+                checkouts=self._checkouts,
+                waits=self._waits,
+                timeouts=self._timeouts,
+                creations=self._creations,
+                discards=self._discards,
+            )
+
+    def _start_checkpointer(self, interval: float) -> None:
+        def run() -> None:
+            while not self._stopped.wait(interval):
+                try:
+                    self.checkpoint()
+                except ConnectionPoolClosedError:
+                    return
+                except (ConnectionPoolTimeoutError, sqlite3.Error):
+                    logger.exception("Error while checkpointing %s", self._database)
+
+        self._checkpointer = threading.Thread(
+            target=run,
+            name="sqlite_checkpointer",
+            daemon=True,
+        )
+        self._checkpointer.start()
+
+    def _create(self) -> Connection:
+        connection = connect(
+            self._database,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        try:
+            self._setup(connection)
+        except BaseException:
+            connection.close()
+            raise
+        with self._condition:
+            self._creations += 1
+        return connection
+
+    def _is_healthy(self, connection: Connection) -> bool:
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+            connection.execute("SELECT 1;").fetchone()
+        except sqlite3.Error:
+            logger.warning("Discard broken connection to %s", self._database)
+            return False
+        return True
@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from sqlite3 import Connection
+from typing import Final, Literal
+
+type JournalMode = Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"]
+type Synchronous = Literal["OFF", "NORMAL", "FULL", "EXTRA"]
+type TempStore = Literal["DEFAULT", "FILE", "MEMORY"]
+type CheckpointMode = Literal["PASSIVE", "FULL", "RESTART", "TRUNCATE"]
+
+JOURNAL_MODES: Final = frozenset(
+    {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+)
+SYNCHRONOUS: Final = frozenset({"OFF", "NORMAL", "FULL", "EXTRA"})
+TEMP_STORES: Final = frozenset({"DEFAULT", "FILE", "MEMORY"})
+CHECKPOINT_MODES: Final = frozenset({"PASSIVE", "FULL", "RESTART", "TRUNCATE"})
+
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """PRAGMA settings applied to every connection
+
+    With the WAL journal readers don't block the writer nor each other,
+    ``synchronous=NORMAL`` is durable enough for WAL and fsyncs only on
+    checkpoints. ``cache_size`` is in KiB when negative, in pages otherwise.
+    ``wal_autocheckpoint`` is the WAL size in pages that triggers a passive
+    checkpoint on commit.
+
+    PRAGMA values can't be bound as parameters, so they are validated:
+
+    >>> SQLiteProfile(synchronous="SOMETIMES")
+    Traceback (most recent call last):
+        ...
+    ValueError: synchronous must be one of ['EXTRA', 'FULL', 'NORMAL', 'OFF'], got <SOMETIMES>
+    """  # noqa: E501
+
+    journal_mode: JournalMode = "WAL"
+    synchronous: Synchronous = "NORMAL"
+    cache_size: int = -16_000
+    mmap_size: int = 128 * 1024 * 1024
+    temp_store: TempStore = "MEMORY"
+    busy_timeout: int = 5000
+    wal_autocheckpoint: int = 1000
+    foreign_keys: bool = True
+
+    def __post_init__(self) -> None:
+        for name, value, allowed in (
+            ("journal_mode", self.journal_mode, JOURNAL_MODES),
+            ("synchronous", self.synchronous, SYNCHRONOUS),
+            ("temp_store", self.temp_store, TEMP_STORES),
+        ):
+            if value not in allowed:
+                raise ValueError(
+                    f"{name} must be one of {sorted(allowed)}, got <{value}>"
+                )
+        for name, number in (
+            ("cache_size", self.cache_size),
+            ("mmap_size", self.mmap_size),
+            ("busy_timeout", self.busy_timeout),
+            ("wal_autocheckpoint", self.wal_autocheckpoint),
+        ):
+            if not isinstance(number, int):
+                raise TypeError(f"{name} must be integer, got <{number!r}>")
+
+    def apply(self, connection: Connection) -> None:
+        """Apply the profile, journal_mode is persisted in the database file"""
+        connection.execute(f"PRAGMA busy_timeout = {self.busy_timeout};")
+        connection.execute(f"PRAGMA journal_mode = {self.journal_mode};")
+        connection.executescript(
+            f"""
+            PRAGMA synchronous = {self.synchronous};
+            PRAGMA cache_size = {self.cache_size};
+            PRAGMA mmap_size = {self.mmap_size};
+            PRAGMA temp_store = {self.temp_store};
+            PRAGMA wal_autocheckpoint = {self.wal_autocheckpoint};
+            PRAGMA foreign_keys = {"ON" if self.foreign_keys else "OFF"};
+            """
+        )
+
+
+def checkpoint(connection: Connection, mode: CheckpointMode = "PASSIVE") -> None:
+    """Copy WAL frames into the database, TRUNCATE also empties the WAL file"""
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f"Unknown checkpoint mode <{mode}>")
+    connection.execute(f"PRAGMA wal_checkpoint({mode});").fetchone()
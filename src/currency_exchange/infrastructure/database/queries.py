@@ -0,0 +1,265 @@
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import closing
+from datetime import UTC, datetime
+from sqlite3 import Connection
+from typing import Any, override
+from uuid import UUID
+
+from currency_exchange.application.models import (
+    ListCurrencies,
+    ListExchangeRates,
+    PageDTO,
+)
+from currency_exchange.application.queries import (
+    CURRENCY_FIELDS,
+    DEFAULT_EXCHANGE_RATE_FIELDS,
+    CurrencyQueries,
+    ExchangeRateQueries,
+)
+from currency_exchange.infrastructure.database.rates import RateColumn
+from currency_exchange.infrastructure.database.registry import CurrencyRegistry
+
+type Row = Sequence[Any]
+
+# Field of a page -> expression of the SELECT list, only these are put in SQL
+CURRENCY_COLUMNS = {field: field for field in CURRENCY_FIELDS}
+EXCHANGE_RATE_COLUMNS = {
+    **{f"baseCurrency.{field}": f"base_currency.{field}" for field in CURRENCY_FIELDS},
+    **{
+        f"targetCurrency.{field}": f"target_currency.{field}"
+        for field in CURRENCY_FIELDS
+    },
+    "rate": "exchange_rates.rate",
+    "updatedAt": "exchange_rates.updated_at",
+}
+
+
+class SQLiteCurrencyQueries(CurrencyQueries):
+    def __init__(self, connection: Connection) -> None:
+        self._conn = connection
+
+    @override
+    def list_currencies(self, query: ListCurrencies) -> PageDTO:
+        """Keyset page by code, read from the covering index of codes only"""
+        fields = query.fields or CURRENCY_FIELDS
+        columns = ", ".join(CURRENCY_COLUMNS[field] for field in fields)
+        conditions: list[str] = []
+        parameters: list[Any] = []
+        if query.after is not None:
+            conditions.append("code > ?")
+            parameters.append(query.after)
+
+        sql = f"""
+            SELECT code, {columns}
+            FROM currencies INDEXED BY currencies_code_covering
+            {_where(conditions)}
+            ORDER BY code
+            {_limit(query.limit, parameters)};
+        """
+        project = _projection(fields, {"id": _uuid})
+        if query.limit is None:
+            return PageDTO(_stream(self._conn, sql, parameters, project))
+
+        with self._conn as conn, closing(conn.cursor()) as cur:
+            rows = cur.execute(sql, parameters).fetchall()
+        return _page(rows, query.limit, project, lambda row: str(row[0]))
+
+
+class SQLiteExchangeRateQueries(ExchangeRateQueries):
+    def __init__(
+        self,
+        connection: Connection,
+        currencies: CurrencyRegistry | None = None,
+    ) -> None:
+        self._conn = connection
+        self._currencies = currencies or CurrencyRegistry()
+
+    @override
+    def list_exchange_rates(self, query: ListExchangeRates) -> PageDTO:
+        """Keyset page by the primary key, the pair of currency keys
+
+        Currencies are joined only for requested fields of them. Filters
+        by codes compare keys, so they use the primary key or the index of
+        target currencies, and the index of updated_at is there for
+        updated_since when statistics show it is selective.
+        """
+        fields = query.fields or DEFAULT_EXCHANGE_RATE_FIELDS
+        columns = ", ".join(EXCHANGE_RATE_COLUMNS[field] for field in fields)
+        joins = [
+            f"""
+            JOIN currencies AS {alias}
+            ON {alias}.key = exchange_rates.{alias}
+            """
+            for prefix, alias in (
+                ("baseCurrency.", "base_currency"),
+                ("targetCurrency.", "target_currency"),
+            )
+            if any(field.startswith(prefix) for field in fields)
+        ]
+        conditions: list[str] = []
+        parameters: list[Any] = []
+        if query.after is not None:
+            conditions.append(
+                "(exchange_rates.base_currency, exchange_rates.target_currency)"
+                " > (?, ?)"
+            )
+            parameters.extend(_parse_pair_cursor(query.after))
+        for column, code in (
+            ("base_currency", query.base_code),
+            ("target_currency", query.target_code),
+        ):
+            if code is not None:
+                conditions.append(
+                    f"exchange_rates.{column}"
+                    " = (SELECT key FROM currencies WHERE code = ?)"
+                )
+                parameters.append(code)
+        if query.updated_since is not None:
+            conditions.append("exchange_rates.updated_at >= ?")
+            parameters.append(_timestamp(query.updated_since))
+
+        sql = f"""
+            SELECT
+                exchange_rates.base_currency,
+                exchange_rates.target_currency,
+                {columns}
+            FROM exchange_rates
+            {"".join(joins)}
+            {_where(conditions)}
+            ORDER BY exchange_rates.base_currency, exchange_rates.target_currency
+            {_limit(query.limit, parameters)};
+        """
+        # A currency with all fields is the shared DTO of the registry
+        currency = (CURRENCY_FIELDS, self._currencies.get_dto)
+        project = _projection(
+            fields,
+            {"id": _uuid, "rate": RateColumn.from_storage},
+            {"baseCurrency": currency, "targetCurrency": currency},
+        )
+        if query.limit is None:
+            return PageDTO(_stream(self._conn, sql, parameters, project))
+
+        with self._conn as conn, closing(conn.cursor()) as cur:
+            rows = cur.execute(sql, parameters).fetchall()
+        return _page(rows, query.limit, project, lambda row: f"{row[0]}.{row[1]}")
+
+
+def _where(conditions: list[str]) -> str:
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _limit(limit: int | None, parameters: list[Any]) -> str:
+    """One row more than the page to know if there is a next page"""
+    if limit is None:
+        return ""
+    parameters.append(limit + 1)
+    return "LIMIT ?"
+
+
+def _stream(
+    connection: Connection,
+    sql: str,
+    parameters: list[Any],
+    project: Callable[[Row], dict[str, Any]],
+) -> Iterator[dict[str, Any]]:
+    """Items projected one by one as the cursor steps through rows"""
+    with closing(connection.cursor()) as cur:
+        for row in cur.execute(sql, parameters):
+            yield project(row)
+
+
+def _page(
+    rows: list[Any],
+    limit: int | None,
+    project: Callable[[Row], dict[str, Any]],
+    cursor: Callable[[Row], str],
+) -> PageDTO:
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = cursor(rows[-1])
+    return PageDTO([project(row) for row in rows], next_cursor)
+
+
+def _projection(
+    fields: Sequence[str],
+    converters: dict[str, Callable[[Any], Any]],
+    objects: dict[str, tuple[Sequence[str], Callable[..., Any]]] | None = None,
+) -> Callable[[Row], dict[str, Any]]:
+    """Build nested items of fields from rows, after the columns of the cursor
+
+    >>> project = _projection(["rate", "baseCurrency.code"], {"rate": float})
+    >>> project((1, 2, "0.5", "USD"))
+    {'rate': 0.5, 'baseCurrency': {'code': 'USD'}}
+
+    A field of ``objects`` with all its fields selected, in their order, is
+    one value built from their columns:
+
+    >>> pair = (("base", "target"), lambda *codes: "/".join(codes))
+    >>> _projection(["pair.base", "pair.target"], {}, {"pair": pair})((1, "A", "B"))
+    {'pair': 'A/B'}
+    """
+    objects = objects or {}
+    # Parents, name, number of columns and the converter of the value
+    steps: list[tuple[tuple[str, ...], str, int, Callable[..., Any] | None]] = []
+    index = 0
+    while index < len(fields):
+        *parents, name = fields[index].split(".")
+        if len(parents) == 1 and parents[0] in objects:
+            object_fields, build = objects[parents[0]]
+            end = index + len(object_fields)
+            if list(fields[index:end]) == [
+                f"{parents[0]}.{field}" for field in object_fields
+            ]:
+                steps.append(((), parents[0], len(object_fields), build))
+                index = end
+                continue
+        steps.append((tuple(parents), name, 1, converters.get(name)))
+        index += 1
+    width = sum(size for _, _, size, _ in steps)
+
+    def project(row: Row) -> dict[str, Any]:
+        item: dict[str, Any] = {}
+        values = row[len(row) - width :]
+        position = 0
+        for parents, name, size, converter in steps:
+            target = item
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            if size == 1:
+                value = values[position]
+                target[name] = value if converter is None else converter(value)
+            else:
+                target[name] = converter(*values[position : position + size])  # type: ignore[misc]
+            position += size
+        return item
+
+    return project
+
+
+def _uuid(value: bytes) -> UUID:
+    return UUID(bytes=value)
+
+
+def _parse_pair_cursor(cursor: str) -> tuple[int, int]:
+    """Keys of the last pair of a page
+
+    >>> _parse_pair_cursor("3.14")
+    (3, 14)
+    """
+    try:
+        base_key, target_key = (int(key) for key in cursor.split("."))
+    except ValueError:
+        raise ValueError(f"Malformed cursor <{cursor}>") from None
+    return (base_key, target_key)
+
+
+def _timestamp(moment: datetime) -> str:
+    """Format of updated_at, a naive moment is in UTC
+
+    >>> _timestamp(datetime(2024, 5, 1, 12, 30, 0, 250_000))
+    '2024-05-01T12:30:00.250Z'
+    """
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return moment.astimezone(UTC).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+from decimal import ROUND_HALF_EVEN, Decimal
+from sqlite3 import Connection
+from typing import Self
+
+from currency_exchange.domain.bulk import RATE_SCALE
+
+
+@dataclass(frozen=True)
+class RateColumn:
+    """Storage format of exchange_rates.rate
+
+    By default rates are DECIMAL(16, 6) text parsed by the decimal
+    converter. After the fixed point migration they are integers of
+    ``10 ** -scale`` units, read without string parsing. Values are read
+    by their type, so a reader doesn't need to know the format, while a
+    writer detects it in its write transaction:
+
+    >>> column = RateColumn(scale=6)
+    >>> column.to_storage(Decimal("0.9"))
+    900000
+    >>> column.from_storage(900000)
+    Decimal('0.900000')
+    """
+
+    scale: int | None = None
+
+    @classmethod
+    def detect(cls, connection: Connection) -> Self:
+        """Read the format from the declared type of the column"""
+        for _, name, declared_type, *_ in connection.execute(
+            "PRAGMA table_info(exchange_rates);"
+        ):
+            if name == "rate" and declared_type.upper() == "INTEGER":
+                return cls(RATE_SCALE)
+        return cls()
+
+    def to_storage(self, rate: Decimal) -> Decimal | int:
+        if self.scale is None:
+            return rate
+        value = int(rate.scaleb(self.scale).to_integral_value(ROUND_HALF_EVEN))
+        if value <= 0:
+            raise ValueError(
+                f"Rate must be at least {Decimal(1).scaleb(-self.scale)}, got <{rate}>"
+            )
+        return value
+
+    @staticmethod
+    def from_storage(value: Decimal | int) -> Decimal:
+        """Rate of a value in either format
+
+        The decimal converter returns values of the DECIMAL column as
+        Decimal, an int comes only from the INTEGER column.
+        """
+        if isinstance(value, Decimal):
+            return value
+        return Decimal(value).scaleb(-RATE_SCALE)
@@ -0,0 +1,57 @@
+from uuid import UUID
+
+from currency_exchange.application.models import CurrencyDTO
+from currency_exchange.domain.models import Currency
+from currency_exchange.domain.value_objects import (
+    CurrencyCode,
+    CurrencyName,
+    CurrencySign,
+)
+
+type CurrencyRow = tuple[bytes, str, str, str]
+
+
+class CurrencyRegistry:
+    """One Currency per distinct row of currencies, shared by repositories
+
+    Rates repeat the same currencies row after row, so a mapped row is a
+    dictionary lookup. The whole row is the key: a currency changed by a
+    write is another row and another object, so entries never go stale and
+    no version is needed. Currencies of the registry must not be mutated.
+    Rows of the list queries get a shared CurrencyDTO of the currency the
+    same way, so its JSON fragment is cached by the serializers. After
+    ``max_size`` rows, many renamed currencies, it starts over.
+    """
+
+    def __init__(self, max_size: int = 10_000) -> None:
+        self._max_size = max_size
+        self._currencies: dict[CurrencyRow, Currency] = {}
+        self._dtos: dict[CurrencyRow, CurrencyDTO] = {}
+
+    def get(self, id_: bytes, code: str, sign: str, name: str) -> Currency:
+        """Currency of the row id, code, sign, name in the order of columns"""
+        row = (id_, code, sign, name)
+        currency = self._currencies.get(row)
+        if currency is None:
+            currency = Currency(
+                CurrencyName(name),
+                CurrencyCode(code),
+                CurrencySign(sign),
+                UUID(bytes=id_),
+            )
+            if len(self._currencies) >= self._max_size:
+                self._currencies = {}
+            # A race only builds the same currency twice, dict writes are atomic
+            self._currencies[row] = currency
+        return currency
+
+    def get_dto(self, id_: bytes, name: str, code: str, sign: str) -> CurrencyDTO:
+        """DTO of the row id, name, code, sign in the order of CURRENCY_FIELDS"""
+        row = (id_, code, sign, name)
+        dto = self._dtos.get(row)
+        if dto is None:
+            dto = CurrencyDTO.from_domain(self.get(id_, code, sign, name))
+            if len(self._dtos) >= self._max_size:
+                self._dtos = {}
+            self._dtos[row] = dto
+        return dto
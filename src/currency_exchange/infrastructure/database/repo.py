@@ -1,3 +1,4 @@
+from collections.abc import Iterator
 from contextlib import closing
 from sqlite3 import Connection, IntegrityError
 from typing import Any, override
@@ -10,41 +11,42 @@ from currency_exchange.application.exceptions import (
     ExchangeRateNotFoundError,
 )
 from currency_exchange.application.repo import (
+    ConversionLegs,
     CurrencyRepository,
     ExchangeRateRepository,
 )
+from currency_exchange.domain.cross_rates import CrossRateMatrix
+from currency_exchange.domain.graph import ExchangeRateGraph, PathPolicy
 from currency_exchange.domain.models import Currency, ExchangeRate
 from currency_exchange.domain.value_objects import (
-    CurrencyCode,
-    CurrencyName,
-    CurrencySign,
     Rate,
 )
+from currency_exchange.infrastructure.database.migrations.transactions import (
+    transaction,
+)
+from currency_exchange.infrastructure.database.rates import RateColumn
+from currency_exchange.infrastructure.database.registry import CurrencyRegistry
 
 
 class SQLiteCurrencyRepository(CurrencyRepository):
-    def __init__(self, conntection: Connection) -> None:
+    def __init__(
+        self,
+        conntection: Connection,
+        currencies: CurrencyRegistry | None = None,
+    ) -> None:
         self._conn = conntection
+        self._currencies = currencies or CurrencyRegistry()
 
     @override
     def get_all(self) -> list[Currency]:
-        with self._conn as conn, closing(conn.cursor()) as cur:
-            result = cur.execute(
-                """SELECT id, code, sign, name FROM currencies;"""
-            ).fetchall()
+        return list(self.iter_all())
 
-        result_currencies: list[Currency] = []
-        for row in result:
-            id_, code, sign, name = row
-            result_currencies.append(
-                Currency(
-                    CurrencyName(name),
-                    CurrencyCode(code),
-                    CurrencySign(sign),
-                    UUID(bytes=id_),
-                )
-            )
-        return result_currencies
+    @override
+    def iter_all(self) -> Iterator[Currency]:
+        with closing(self._conn.cursor()) as cur:
+            cur.execute("SELECT id, code, sign, name FROM currencies;")
+            for row in cur:
+                yield self._currencies.get(*row)
 
     @override
     def get_by_code(self, code: str) -> Currency:
@@ -61,14 +63,7 @@ class SQLiteCurrencyRepository(CurrencyRepository):
         if not result:
             raise CurrencyNotFoundError(f"Currency with code <{code}> was not found")
 
-        id_, code, sign, name = result
-        currency = Currency(
-            CurrencyName(name),
-            CurrencyCode(code),
-            CurrencySign(sign),
-            UUID(bytes=id_),
-        )
-        return currency
+        return self._currencies.get(*result)
 
     @override
     def get_pair(self, codes: tuple[str, str]) -> tuple[Currency, Currency]:
@@ -96,22 +91,10 @@ class SQLiteCurrencyRepository(CurrencyRepository):
                 f"Currency with code <{codes[1]}> was not found"
             ) from None
 
-        id_, code, sign, name = base_currencies_row
-        base_currencies = Currency(
-            CurrencyName(name),
-            CurrencyCode(code),
-            CurrencySign(sign),
-            UUID(bytes=id_),
-        )
-
-        id_, code, sign, name = target_currencies_row
-        target_currencies = Currency(
-            CurrencyName(name),
-            CurrencyCode(code),
-            CurrencySign(sign),
-            UUID(bytes=id_),
+        return (
+            self._currencies.get(*base_currencies_row),
+            self._currencies.get(*target_currencies_row),
         )
-        return (base_currencies, target_currencies)
 
     @override
     def add(self, currency: Currency) -> None:
@@ -152,13 +135,23 @@ class SQLiteCurrencyRepository(CurrencyRepository):
 
 
 class SQLiteExchangeRateRepository(ExchangeRateRepository):
-    def __init__(self, conntection: Connection) -> None:
+    def __init__(
+        self,
+        conntection: Connection,
+        currencies: CurrencyRegistry | None = None,
+    ) -> None:
         self._conn = conntection
+        self._currencies = currencies or CurrencyRegistry()
 
     @override
     def get_all(self) -> list[ExchangeRate]:
-        with self._conn as conn, closing(conn.cursor()) as cur:
-            result = cur.execute(
+        return list(self.iter_all())
+
+    @override
+    def iter_all(self) -> Iterator[ExchangeRate]:
+        """Rates mapped one by one as the cursor steps through them"""
+        with closing(self._conn.cursor()) as cur:
+            cur.execute(
                 """
                 SELECT
                     exchange_rates.id,
@@ -172,21 +165,22 @@ class SQLiteExchangeRateRepository(ExchangeRateRepository):
                     target_currency.sign,
                     target_currency.name
                 FROM exchange_rates
-                LEFT JOIN currencies as base_currency
-                ON exchange_rates.base_currency == base_currency.id
-                LEFT JOIN currencies as target_currency
-                ON exchange_rates.target_currency == target_currency.id;
+                JOIN currencies as base_currency
+                ON base_currency.key = exchange_rates.base_currency
+                JOIN currencies as target_currency
+                ON target_currency.key = exchange_rates.target_currency;
                 """
-            ).fetchall()
-
-        result_exchange_rate: list[ExchangeRate] = []
-        for row in result:
-            exchange_rate = self._map_row(row)
-            result_exchange_rate.append(exchange_rate)
-        return result_exchange_rate
+            )
+            for row in cur:
+                yield self._map_row(row)
 
     @override
     def get_by_currency_codes(self, base_code: str, target_code: str) -> ExchangeRate:
+        """Answered by the covering index of codes and the primary key of rates
+
+        The planner prefers the unique index of codes without statistics,
+        INDEXED BY keeps the covering one and fails if it is dropped.
+        """
         with self._conn as conn, closing(conn.cursor()) as cur:
             result = cur.execute(
                 """
@@ -201,12 +195,14 @@ class SQLiteExchangeRateRepository(ExchangeRateRepository):
                     target_currency.code,
                     target_currency.sign,
                     target_currency.name
-                FROM exchange_rates
-                LEFT JOIN currencies as base_currency
-                ON exchange_rates.base_currency == base_currency.id
-                LEFT JOIN currencies as target_currency
-                ON exchange_rates.target_currency == target_currency.id
-                WHERE base_currency.code = ? AND target_currency.code = ?
+                FROM currencies as base_currency
+                INDEXED BY currencies_code_covering
+                JOIN currencies as target_currency
+                INDEXED BY currencies_code_covering
+                JOIN exchange_rates
+                ON exchange_rates.base_currency = base_currency.key
+                AND exchange_rates.target_currency = target_currency.key
+                WHERE base_currency.code = ? AND target_currency.code = ?;
                 """,
                 (base_code, target_code),
             ).fetchone()
@@ -219,13 +215,25 @@ class SQLiteExchangeRateRepository(ExchangeRateRepository):
         return self._map_row(result)
 
     @override
-    def get_related_exchanges_by_currency_codes(
-        self, base_code: str, target_code: str, related_code: str
-    ) -> tuple[ExchangeRate, ExchangeRate]:
+    def get_conversion_legs(
+        self,
+        base_code: str,
+        target_code: str,
+        related_code: str,
+    ) -> ConversionLegs:
+        """One query for all legs, currencies and rates are joined by integer keys"""
         with self._conn as conn, closing(conn.cursor()) as cur:
             result = cur.execute(
                 """
+                WITH legs(leg, base_code, target_code) AS (
+                    VALUES
+                        ('direct', :base, :target),
+                        ('reverse', :target, :base),
+                        ('to_pivot', :base, :related),
+                        ('from_pivot', :related, :target)
+                )
                 SELECT
+                    legs.leg,
                     exchange_rates.id,
                     exchange_rates.rate,
                     base_currency.id,
@@ -236,60 +244,66 @@ class SQLiteExchangeRateRepository(ExchangeRateRepository):
                     target_currency.code,
                     target_currency.sign,
                     target_currency.name
-                FROM exchange_rates
-                LEFT JOIN currencies as base_currency
-                ON exchange_rates.base_currency == base_currency.id
-                LEFT JOIN currencies as target_currency
-                ON exchange_rates.target_currency == target_currency.id
-                WHERE
-                    base_currency.code = ? AND target_currency.code = ?
-                    OR base_currency.code = ? AND target_currency.code = ?
+                FROM legs
+                JOIN currencies as base_currency
+                INDEXED BY currencies_code_covering
+                ON base_currency.code = legs.base_code
+                JOIN currencies as target_currency
+                INDEXED BY currencies_code_covering
+                ON target_currency.code = legs.target_code
+                JOIN exchange_rates
+                ON exchange_rates.base_currency = base_currency.key
+                AND exchange_rates.target_currency = target_currency.key;
                 """,
-                (base_code, related_code, related_code, target_code),
-            ).fetchmany(2)
-
-        base_exchange_rate = None
-        target_exchange_rate = None
-
-        for row in result:
-            exchange_rate = self._map_row(row)
-            if exchange_rate.base_currency.code.value == base_code:
-                base_exchange_rate = exchange_rate
-            elif exchange_rate.target_currency.code.value == target_code:
-                target_exchange_rate = exchange_rate
+                {"base": base_code, "target": target_code, "related": related_code},
+            ).fetchall()
 
-        if base_exchange_rate is None:
-            raise ExchangeRateNotFoundError(
-                f"Exchange Rate with code pair <{base_code}>-<{related_code}>"
-                " was not found"
-            )
+        legs = ConversionLegs()
+        for leg, *row in result:
+            setattr(legs, leg, self._map_row(row))
+        return legs
 
-        if target_exchange_rate is None:
-            raise ExchangeRateNotFoundError(
-                f"ExchangeRate with code pair <{related_code}>-<{target_code}>"
-                " was not found"
-            )
+    @override
+    def get_graph(self) -> ExchangeRateGraph:
+        return ExchangeRateGraph(self.iter_all())
 
-        return (base_exchange_rate, target_exchange_rate)
+    @override
+    def get_cross_rates(self, policy: PathPolicy) -> CrossRateMatrix:
+        return CrossRateMatrix.from_graph(self.get_graph(), policy)
 
     @override
     def add(self, exchange_rate: ExchangeRate) -> None:
+        """Insert or update the rate in the format of the column
+
+        The format is read under the write lock, so a migration of the
+        column can't change it between the check and the write.
+        """
         query = """
-            INSERT INTO exchange_rates (id,base_currency,target_currency,rate)
-            VALUES (?, ?, ?, ?)
+            INSERT INTO exchange_rates (
+                id, base_currency, target_currency, rate, updated_at
+            )
+            VALUES (
+                ?,
+                (SELECT key FROM currencies WHERE id = ?),
+                (SELECT key FROM currencies WHERE id = ?),
+                ?,
+                strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            )
             ON CONFLICT(id) DO UPDATE SET
                 base_currency = excluded.base_currency,
                 target_currency = excluded.target_currency,
-                rate = excluded.rate;
+                rate = excluded.rate,
+                updated_at = excluded.updated_at;
         """
-        parameters = (
-            exchange_rate.id.bytes,
-            exchange_rate.base_currency.id.bytes,
-            exchange_rate.target_currency.id.bytes,
-            exchange_rate.rate.value,
-        )
 
-        with self._conn as conn, closing(conn.cursor()) as cur:
+        with transaction(self._conn), closing(self._conn.cursor()) as cur:
+            rate_column = RateColumn.detect(self._conn)
+            parameters = (
+                exchange_rate.id.bytes,
+                exchange_rate.base_currency.id.bytes,
+                exchange_rate.target_currency.id.bytes,
+                rate_column.to_storage(exchange_rate.rate.value),
+            )
             try:
                 cur.execute(query, parameters)
             except IntegrityError as ex:
@@ -306,6 +320,16 @@ class SQLiteExchangeRateRepository(ExchangeRateRepository):
                     f"Exchange rate from {base_code} to {target_code} already exists"
                 ) from None
 
+    def get_data_version(self) -> int:
+        """Version bumped by triggers on changes of rates and currencies"""
+        with self._conn as conn, closing(conn.cursor()) as cur:
+            result = cur.execute(
+                """
+                SELECT version FROM data_versions WHERE name = 'exchange_rates';
+                """
+            ).fetchone()
+        return int(result[0])
+
     def _map_row(self, row: Any) -> ExchangeRate:
         (
             exchange_rates_id,
@@ -320,23 +344,22 @@ class SQLiteExchangeRateRepository(ExchangeRateRepository):
             target_currency_name,
         ) = row
 
-        base_currency = Currency(
-            id=UUID(bytes=base_currency_id),
-            code=CurrencyCode(base_currency_code),
-            name=CurrencyName(base_currency_name),
-            sign=CurrencySign(base_currency_sign),
+        base_currency = self._currencies.get(
+            base_currency_id,
+            base_currency_code,
+            base_currency_sign,
+            base_currency_name,
         )
-
-        target_currency = Currency(
-            id=UUID(bytes=target_currency_id),
-            code=CurrencyCode(target_currency_code),
-            name=CurrencyName(target_currency_name),
-            sign=CurrencySign(target_currency_sign),
+        target_currency = self._currencies.get(
+            target_currency_id,
+            target_currency_code,
+            target_currency_sign,
+            target_currency_name,
         )
 
         return ExchangeRate(
             id=UUID(bytes=exchange_rates_id),
-            rate=Rate(exchange_rates_rate),
+            rate=Rate(RateColumn.from_storage(exchange_rates_rate)),
             base_currency=base_currency,
             target_currency=target_currency,
         )
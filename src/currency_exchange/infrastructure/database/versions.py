@@ -0,0 +1,90 @@
+import threading
+import time
+from contextlib import closing
+from sqlite3 import Connection
+from typing import override
+
+from currency_exchange.application.versions import DataVersion
+from currency_exchange.infrastructure.database.pool import SQLiteConnectionPool
+
+RESPONSES_VERSION = "responses"
+
+
+class ResponseVersion:
+    """Version of the data behind cached responses, shared by a process
+
+    current() reads the version at most once per ``check_interval`` seconds,
+    so bumps of other processes are seen with at most that delay, bumps of
+    this process at once. The connection is taken from the pool only for
+    the read, callers must not hold a lease of their own.
+    """
+
+    def __init__(
+        self,
+        pool: SQLiteConnectionPool,
+        check_interval: float = 0.5,
+    ) -> None:
+        self._pool = pool
+        self._check_interval = check_interval
+        self._version: int | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self._check_interval:
+            return self._version
+
+        connection = self._pool.acquire()
+        try:
+            version = read_version(connection, RESPONSES_VERSION)
+        finally:
+            self._pool.release(connection)
+        return self._update(version, now)
+
+    def bumped(self, version: int) -> None:
+        """Take the version a write of this process has bumped to"""
+        self._update(version, time.monotonic())
+
+    def _update(self, version: int, checked_at: float) -> int:
+        with self._lock:
+            # Versions only grow, a read started before a bump is older
+            if self._version is None or version > self._version:
+                self._version = version
+            self._checked_at = checked_at
+            return self._version
+
+
+class SQLiteDataVersion(DataVersion):
+    def __init__(
+        self,
+        connection: Connection,
+        response_version: ResponseVersion,
+    ) -> None:
+        self._conn = connection
+        self._response_version = response_version
+
+    @override
+    def bump(self) -> None:
+        with self._conn as conn, closing(conn.cursor()) as cur:
+            # fetchall() steps RETURNING to the end, so the statement is
+            # finished before the commit
+            ((version,),) = cur.execute(
+                """
+                INSERT INTO data_versions (name, version) VALUES (?, 1)
+                ON CONFLICT (name) DO UPDATE SET version = version + 1
+                RETURNING version;
+                """,
+                (RESPONSES_VERSION,),
+            ).fetchall()
+        self._response_version.bumped(version)
+
+
+def read_version(connection: Connection, name: str) -> int:
+    """Version of data_versions, 0 until the first bump"""
+    with connection as conn, closing(conn.cursor()) as cur:
+        result = cur.execute(
+            "SELECT version FROM data_versions WHERE name = ?;",
+            (name,),
+        ).fetchone()
+    return 0 if result is None else int(result[0])
@@ -1,3 +1,4 @@
+from collections.abc import Iterator
 from typing import override
 
 from currency_exchange.application.exceptions import (
@@ -5,9 +6,12 @@ from currency_exchange.application.exceptions import (
     ExchangeRateNotFoundError,
 )
 from currency_exchange.application.repo import (
+    ConversionLegs,
     CurrencyRepository,
     ExchangeRateRepository,
 )
+from currency_exchange.domain.cross_rates import CrossRateMatrix
+from currency_exchange.domain.graph import ExchangeRateGraph, PathPolicy
 from currency_exchange.domain.models import Currency, ExchangeRate
 
 
@@ -19,6 +23,10 @@ class InMemoryCurrencyRepository(CurrencyRepository):
     def get_all(self) -> list[Currency]:
         return self._currency_list
 
+    @override
+    def iter_all(self) -> Iterator[Currency]:
+        return iter(list(self._currency_list))
+
     @override
     def get_by_code(self, code: str) -> Currency:
         filtered_currency = filter(
@@ -57,6 +65,10 @@ class InMemoryExchangeRateRepository(ExchangeRateRepository):
     def get_all(self) -> list[ExchangeRate]:
         return list(self._exchange_rates)
 
+    @override
+    def iter_all(self) -> Iterator[ExchangeRate]:
+        return iter(self.get_all())
+
     @override
     def get_by_currency_codes(self, base_code: str, target_code: str) -> ExchangeRate:
         filtered_exchange_rates = filter(
@@ -75,12 +87,33 @@ class InMemoryExchangeRateRepository(ExchangeRateRepository):
         return exchange_rate
 
     @override
-    def get_related_exchanges_by_currency_codes(
-        self, base_code: str, target_code: str, related_code: str
-    ) -> tuple[ExchangeRate, ExchangeRate]:
-        base_exchange_rate = self.get_by_currency_codes(base_code, related_code)
-        target_exchange_rate = self.get_by_currency_codes(related_code, target_code)
-        return base_exchange_rate, target_exchange_rate
+    def get_conversion_legs(
+        self,
+        base_code: str,
+        target_code: str,
+        related_code: str,
+    ) -> ConversionLegs:
+        rates = {
+            (
+                exchange_rate.base_currency.code.value,
+                exchange_rate.target_currency.code.value,
+            ): exchange_rate
+            for exchange_rate in self._exchange_rates
+        }
+        return ConversionLegs(
+            direct=rates.get((base_code, target_code)),
+            reverse=rates.get((target_code, base_code)),
+            to_pivot=rates.get((base_code, related_code)),
+            from_pivot=rates.get((related_code, target_code)),
+        )
+
+    @override
+    def get_graph(self) -> ExchangeRateGraph:
+        return ExchangeRateGraph(self._exchange_rates)
+
+    @override
+    def get_cross_rates(self, policy: PathPolicy) -> CrossRateMatrix:
+        return CrossRateMatrix.from_graph(self.get_graph(), policy)
 
     @override
     def add(self, exchange_rate: ExchangeRate) -> None:
@@ -1,4 +1,6 @@
-from sqlite3 import PARSE_DECLTYPES, Connection, connect
+from collections.abc import Callable
+from sqlite3 import Connection
+from typing import cast
 
 from currency_exchange.application.interactors.currencies import (
     CreateCurrencyInteracotor,
@@ -13,50 +15,167 @@ from currency_exchange.application.interactors.exchange_rates import (
     GetExchangeRatesInteractor,
     UpdateExchangeRateInteractor,
 )
+from currency_exchange.application.interactors.monitoring import (
+    GetCacheStatsInteractor,
+    GetConnectionPoolStatsInteractor,
+)
+from currency_exchange.application.monitoring import (
+    CacheMonitor,
+    ConnectionPoolMonitor,
+)
+from currency_exchange.application.queries import (
+    CurrencyQueries,
+    ExchangeRateQueries,
+)
 from currency_exchange.application.repo import (
     CurrencyRepository,
     ExchangeRateRepository,
 )
+from currency_exchange.application.resolvers import (
+    ExchangeRateResolver,
+    GraphExchangeRateResolver,
+    MatrixExchangeRateResolver,
+    PivotExchangeRateResolver,
+)
+from currency_exchange.application.versions import DataVersion
+from currency_exchange.config import (
+    CacheConfig,
+    Config,
+    DatabaseConfig,
+    ExchangeConfig,
+)
+from currency_exchange.infrastructure.cache import (
+    CachingExchangeRateRepository,
+    ExchangeRateCache,
+)
+from currency_exchange.infrastructure.database.pool import (
+    ConnectionLease,
+    SQLiteConnectionPool,
+)
+from currency_exchange.infrastructure.database.queries import (
+    SQLiteCurrencyQueries,
+    SQLiteExchangeRateQueries,
+)
+from currency_exchange.infrastructure.database.registry import CurrencyRegistry
 from currency_exchange.infrastructure.database.repo import (
     SQLiteCurrencyRepository,
     SQLiteExchangeRateRepository,
 )
+from currency_exchange.infrastructure.database.versions import (
+    ResponseVersion,
+    SQLiteDataVersion,
+)
 from simple_di.container import Container
 from simple_di.integration import FromSimpleDi
 
 
-def factory_sqlite_connection() -> Connection:
-    connection = connect("currency_exchange.db", detect_types=PARSE_DECLTYPES)
-    connection.execute("PRAGMA foreign_keys = ON;")
-    return connection
+def factory_sqlite_pool(config: FromSimpleDi[DatabaseConfig]) -> SQLiteConnectionPool:
+    return SQLiteConnectionPool(
+        config.path,
+        min_size=config.pool_min_size,
+        max_size=config.pool_max_size,
+        timeout=config.pool_timeout,
+        setup=config.profile.apply,
+        checkpoint_interval=config.checkpoint_interval or None,
+    )
+
+
+def deliter_sqlite_pool(pool: SQLiteConnectionPool) -> None:
+    pool.close()
+
+
+def factory_pool_monitor(
+    pool: FromSimpleDi[SQLiteConnectionPool],
+) -> ConnectionPoolMonitor:
+    return pool
+
+
+def factory_connection_lease(
+    pool: FromSimpleDi[SQLiteConnectionPool],
+) -> ConnectionLease:
+    return pool.lease()
+
+
+def deliter_connection_lease(lease: ConnectionLease) -> None:
+    lease.release()
 
 
-def deliter_sqlite_connection(connection: Connection) -> None:
-    connection.close()
+def factory_sqlite_connection(lease: FromSimpleDi[ConnectionLease]) -> Connection:
+    return lease.connection
 
 
 def factory_sqlite_currency_repo(
     connection: FromSimpleDi[Connection],
+    currencies: FromSimpleDi[CurrencyRegistry],
 ) -> CurrencyRepository:
-    return SQLiteCurrencyRepository(connection)
+    return SQLiteCurrencyRepository(connection, currencies)
 
 
 def factory_sqlite_exchange_rate_repo(
     connection: FromSimpleDi[Connection],
+    currencies: FromSimpleDi[CurrencyRegistry],
 ) -> ExchangeRateRepository:
-    return SQLiteExchangeRateRepository(connection)
+    return SQLiteExchangeRateRepository(connection, currencies)
+
+
+def factory_sqlite_currency_queries(
+    connection: FromSimpleDi[Connection],
+) -> CurrencyQueries:
+    return SQLiteCurrencyQueries(connection)
+
+
+def factory_sqlite_exchange_rate_queries(
+    connection: FromSimpleDi[Connection],
+    currencies: FromSimpleDi[CurrencyRegistry],
+) -> ExchangeRateQueries:
+    return SQLiteExchangeRateQueries(connection, currencies)
+
+
+def factory_exchange_rate_cache(
+    config: FromSimpleDi[CacheConfig],
+) -> ExchangeRateCache:
+    return ExchangeRateCache(config.check_interval)
+
+
+def factory_cache_monitor(cache: FromSimpleDi[ExchangeRateCache]) -> CacheMonitor:
+    return cache
+
+
+def factory_caching_exchange_rate_repo(
+    connection: FromSimpleDi[Connection],
+    currencies: FromSimpleDi[CurrencyRegistry],
+    cache: FromSimpleDi[ExchangeRateCache],
+) -> ExchangeRateRepository:
+    return CachingExchangeRateRepository(
+        SQLiteExchangeRateRepository(connection, currencies), cache
+    )
+
+
+def factory_response_version(
+    pool: FromSimpleDi[SQLiteConnectionPool],
+    config: FromSimpleDi[CacheConfig],
+) -> ResponseVersion:
+    return ResponseVersion(pool, config.check_interval)
+
+
+def factory_sqlite_data_version(
+    connection: FromSimpleDi[Connection],
+    response_version: FromSimpleDi[ResponseVersion],
+) -> DataVersion:
+    return SQLiteDataVersion(connection, response_version)
 
 
 def factory_create_currency_interactor(
     currency_repo: FromSimpleDi[CurrencyRepository],
+    data_version: FromSimpleDi[DataVersion],
 ) -> CreateCurrencyInteracotor:
-    return CreateCurrencyInteracotor(currency_repo)
+    return CreateCurrencyInteracotor(currency_repo, data_version)
 
 
 def factory_get_currencies_interactor(
-    currency_repo: FromSimpleDi[CurrencyRepository],
+    currency_queries: FromSimpleDi[CurrencyQueries],
 ) -> GetCurrenciesInteractor:
-    return GetCurrenciesInteractor(currency_repo)
+    return GetCurrenciesInteractor(currency_queries)
 
 
 def factory_get_currency_interactor(
@@ -67,20 +186,42 @@ def factory_get_currency_interactor(
 
 def factory_delete_currency_interactor(
     currency_repo: FromSimpleDi[CurrencyRepository],
+    data_version: FromSimpleDi[DataVersion],
 ) -> DeleteCurrencyInteractor:
-    return DeleteCurrencyInteractor(currency_repo)
+    return DeleteCurrencyInteractor(currency_repo, data_version)
 
 
-def factory_exchange_interactor(
+def factory_pivot_exchange_rate_resolver(
+    exchange_rate_repo: FromSimpleDi[ExchangeRateRepository],
+    config: FromSimpleDi[ExchangeConfig],
+) -> ExchangeRateResolver:
+    return PivotExchangeRateResolver(exchange_rate_repo, config.pivot_currency)
+
+
+def factory_graph_exchange_rate_resolver(
+    exchange_rate_repo: FromSimpleDi[ExchangeRateRepository],
+    config: FromSimpleDi[ExchangeConfig],
+) -> ExchangeRateResolver:
+    return GraphExchangeRateResolver(exchange_rate_repo, config.path_policy)
+
+
+def factory_matrix_exchange_rate_resolver(
     exchange_rate_repo: FromSimpleDi[ExchangeRateRepository],
+    config: FromSimpleDi[ExchangeConfig],
+) -> ExchangeRateResolver:
+    return MatrixExchangeRateResolver(exchange_rate_repo, config.path_policy)
+
+
+def factory_exchange_interactor(
+    exchange_rate_resolver: FromSimpleDi[ExchangeRateResolver],
 ) -> ExchangeCurrencyInteractor:
-    return ExchangeCurrencyInteractor(exchange_rate_repo, "USD")
+    return ExchangeCurrencyInteractor(exchange_rate_resolver)
 
 
 def factory_get_exchange_rates_interactor(
-    exchange_rate_repo: FromSimpleDi[ExchangeRateRepository],
+    exchange_rate_queries: FromSimpleDi[ExchangeRateQueries],
 ) -> GetExchangeRatesInteractor:
-    return GetExchangeRatesInteractor(exchange_rate_repo)
+    return GetExchangeRatesInteractor(exchange_rate_queries)
 
 
 def factory_get_exchange_rate_interactor(
@@ -92,32 +233,84 @@ def factory_get_exchange_rate_interactor(
 def factory_create_exchange_rate_interactor(
     exchange_rate_repo: FromSimpleDi[ExchangeRateRepository],
     currency_repo: FromSimpleDi[CurrencyRepository],
+    data_version: FromSimpleDi[DataVersion],
 ) -> CreateExchangeRateInteractor:
-    return CreateExchangeRateInteractor(exchange_rate_repo, currency_repo)
+    return CreateExchangeRateInteractor(exchange_rate_repo, currency_repo, data_version)
 
 
 def factory_update_exchange_rate_interactor(
     exchange_rate_repo: FromSimpleDi[ExchangeRateRepository],
     currency_repo: FromSimpleDi[CurrencyRepository],
+    data_version: FromSimpleDi[DataVersion],
 ) -> UpdateExchangeRateInteractor:
-    return UpdateExchangeRateInteractor(exchange_rate_repo, currency_repo)
+    return UpdateExchangeRateInteractor(exchange_rate_repo, currency_repo, data_version)
+
+
+def factory_get_connection_pool_stats_interactor(
+    pool_monitor: FromSimpleDi[ConnectionPoolMonitor],
+) -> GetConnectionPoolStatsInteractor:
+    return GetConnectionPoolStatsInteractor(pool_monitor)
+
+
+def factory_get_cache_stats_interactor(
+    cache_monitor: FromSimpleDi[CacheMonitor],
+) -> GetCacheStatsInteractor:
+    return GetCacheStatsInteractor(cache_monitor)
 
 
-def add_dependencies(container: Container) -> None:
+def add_dependencies(container: Container, config: Config) -> None:
+    container.add(DatabaseConfig, lambda: config.database)
+    container.add(CacheConfig, lambda: config.cache)
+    container.add(ExchangeConfig, lambda: config.exchange)
+    container.add(SQLiteConnectionPool, factory_sqlite_pool, deliter_sqlite_pool)
+    container.add(ConnectionPoolMonitor, factory_pool_monitor)
     container.add(
-        Connection,
-        factory_sqlite_connection,
-        deliter_sqlite_connection,
+        ConnectionLease,
+        factory_connection_lease,
+        deliter_connection_lease,
         scope="REQUEST",
     )
+    container.add(Connection, factory_sqlite_connection, scope="REQUEST")
+    container.add(CurrencyRegistry, CurrencyRegistry)
     container.add(
         CurrencyRepository,
         factory_sqlite_currency_repo,
         scope="REQUEST",
     )
     container.add(
-        ExchangeRateRepository,
-        factory_sqlite_exchange_rate_repo,
+        CurrencyQueries,
+        factory_sqlite_currency_queries,
+        scope="REQUEST",
+    )
+    container.add(
+        ExchangeRateQueries,
+        factory_sqlite_exchange_rate_queries,
+        scope="REQUEST",
+    )
+    container.add(ExchangeRateCache, factory_exchange_rate_cache)
+    container.add(CacheMonitor, factory_cache_monitor)
+    if config.cache.exchange_rates:
+        container.add(
+            ExchangeRateRepository,
+            factory_caching_exchange_rate_repo,
+            scope="REQUEST",
+        )
+    else:
+        container.add(
+            ExchangeRateRepository,
+            factory_sqlite_exchange_rate_repo,
+            scope="REQUEST",
+        )
+    container.add(ResponseVersion, factory_response_version)
+    container.add(DataVersion, factory_sqlite_data_version, scope="REQUEST")
+    exchange_rate_resolver_factories = {
+        "pivot": factory_pivot_exchange_rate_resolver,
+        "graph": factory_graph_exchange_rate_resolver,
+        "matrix": factory_matrix_exchange_rate_resolver,
+    }
+    container.add(
+        ExchangeRateResolver,
+        exchange_rate_resolver_factories[config.exchange.strategy],
         scope="REQUEST",
     )
 
@@ -166,3 +359,26 @@ def add_dependencies(container: Container) -> None:
         factory_update_exchange_rate_interactor,
         scope="REQUEST",
     )
+    container.add(
+        GetConnectionPoolStatsInteractor,
+        factory_get_connection_pool_stats_interactor,
+        scope="REQUEST",
+    )
+    container.add(
+        GetCacheStatsInteractor,
+        factory_get_cache_stats_interactor,
+        scope="REQUEST",
+    )
+
+
+def response_version(container: Container) -> Callable[[], int]:
+    """Version of cached responses, resolved on the first call
+
+    So in the processes mode the pool is created by every worker, not by
+    the parent before the fork.
+    """
+
+    def current() -> int:
+        return cast(ResponseVersion, container.get(ResponseVersion)).current()
+
+    return current
@@ -0,0 +1,77 @@
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import override
+
+FORMAT = "%(asctime)s.%(msecs)03d %(levelname)s %(name)s: %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class QueueLogHandler(QueueHandler):
+    """Put records to a queue, a thread formats and writes them with ``handlers``
+
+    A request thread only appends the record: messages are formatted by the
+    thread, so arguments of log calls must not be changed after the call.
+    The thread is stopped before fork, a child forked while it writes could
+    inherit a held lock of the stream, and started again in the parent and
+    in the child, which gets its own queue. close() writes the records left
+    in the queue.
+    """
+
+    def __init__(self, *handlers: logging.Handler) -> None:
+        super().__init__(queue.SimpleQueue())
+        self._handlers = handlers
+        self._listener: QueueListener | None = self._start_listener()
+        os.register_at_fork(
+            before=self._stop_before_fork,
+            after_in_parent=self._restart_in_parent,
+            after_in_child=self._restart_in_child,
+        )
+
+    @override
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler formats here, for handlers in another process
+        return record
+
+    @override
+    def close(self) -> None:
+        listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in self._handlers:
+                handler.close()
+        super().close()
+
+    def _start_listener(self) -> QueueListener:
+        listener = QueueListener(
+            self.queue, *self._handlers, respect_handler_level=True
+        )
+        listener.start()
+        return listener
+
+    def _stop_before_fork(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+
+    def _restart_in_parent(self) -> None:
+        if self._listener is not None:
+            self._listener = self._start_listener()
+
+    def _restart_in_child(self) -> None:
+        if self._listener is None:
+            return
+        # Records queued during fork are written by the parent
+        self.queue = queue.SimpleQueue()
+        self._listener = self._start_listener()
+
+
+def setup_logging(level: int | str = logging.INFO) -> None:
+    """Log records of all loggers to stdout through QueueLogHandler
+
+    The queue is drained at exit by logging.shutdown().
+    """
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(FORMAT, DATE_FORMAT))
+    logging.basicConfig(handlers=[QueueLogHandler(stream_handler)], level=level)
@@ -1,35 +1,44 @@
-import logging
-import sys
-from pathlib import Path
-
-from currency_exchange.config import load_config
+from currency_exchange.config import load_default_config
 from currency_exchange.infrastructure.database.converters import (
     register_decimal,
 )
-from currency_exchange.ioc import add_dependencies
+from currency_exchange.ioc import add_dependencies, response_version
+from currency_exchange.logs import setup_logging
 from currency_exchange.presentation.handlers.currencies import currency_router
 from currency_exchange.presentation.handlers.exchange import exchange_router
 from currency_exchange.presentation.handlers.exchange_rates import exchange_rates_router
+from currency_exchange.presentation.handlers.monitoring import monitoring_router
 from simple_di import Container
 from simple_di.integration import setup
-from simple_server import CORSMiddleware, SimpleApp
+from simple_server import (
+    AccessLogMiddleware,
+    CompressionMiddleware,
+    CORSMiddleware,
+    ResponseCacheMiddleware,
+    SimpleApp,
+)
+
+# GET routes whose responses change only with writes of the data
+CACHED_PATHS = (
+    "/currencies",
+    "/currency/{code}",
+    "/exchangeRates",
+    "/exchangeRate/{pair_code}",
+    "/exchange",
+)
 
 
 def main() -> None:
-    try:
-        config = load_config(Path("config.toml"))
-    except FileNotFoundError:
-        config = load_config()
-
-    logging.basicConfig(
-        stream=sys.stdout,
-        format="%(asctime)s.%(msecs)03d %(levelname)s %(name)s: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        level=logging.INFO,
-    )
+    config = load_default_config()
+
+    setup_logging(config.logging.level)
     register_decimal()
 
     app = SimpleApp("CurrencyExchange")
+    # First, it times all the other middlewares
+    app.add_middleware(
+        AccessLogMiddleware(sample_rate=config.logging.access_sample_rate)
+    )
 
     cors_middleware = CORSMiddleware(
         allow_origins=config.allow_origins,
@@ -42,13 +51,32 @@ def main() -> None:
     app.include_router(exchange_router)
     app.include_router(currency_router)
     app.include_router(exchange_rates_router)
+    app.include_router(monitoring_router)
 
     container = Container()
-    add_dependencies(container)
+    add_dependencies(container, config)
+    if config.cache.responses:
+        # Before DI, a cached response doesn't enter a request scope
+        app.add_middleware(
+            ResponseCacheMiddleware(
+                response_version(container),
+                CACHED_PATHS,
+                max_entries=config.cache.responses_max_entries,
+                vary=["Accept-Encoding"] if config.compression.enabled else [],
+            )
+        )
+    if config.compression.enabled:
+        # Inside the response cache, which keeps compressed bodies
+        app.add_middleware(
+            CompressionMiddleware(
+                minimum_size=config.compression.minimum_size,
+                level=config.compression.level,
+            )
+        )
     setup(app, container)
 
     try:
-        app.run(config.host, config.port)
+        app.run(config.host, config.port, config.serve_options)
     finally:
         container.close()
 
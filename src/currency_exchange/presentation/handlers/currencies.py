@@ -1,6 +1,3 @@
-import logging
-from dataclasses import asdict
-
 from currency_exchange.application.exceptions import (
     CurrencyCodeAlreadyExistsError,
     CurrencyNotFoundError,
@@ -11,13 +8,22 @@ from currency_exchange.application.interactors.currencies import (
     GetCurrenciesInteractor,
     GetCurrencyInteractor,
 )
-from currency_exchange.application.models import CreateCurrency
+from currency_exchange.application.models import CreateCurrency, ListCurrencies
+from currency_exchange.presentation.handlers.pages import (
+    next_page_headers,
+    parse_fields,
+    parse_limit,
+)
+from currency_exchange.presentation.serializers import (
+    array_json,
+    currency_json,
+    item_json,
+)
 from simple_di.integration import FromSimpleDi, inject
 from simple_server import Request, Router
-from simple_server.types import Response
+from simple_server.types import Response, StreamingResponse
 
 currency_router = Router("currency_router")
-logger = logging.getLogger(__name__)
 
 
 @currency_router.route("GET", "/currencies")
@@ -25,11 +31,20 @@ logger = logging.getLogger(__name__)
 def get_currencies(
     request: Request, get_currencies_interactor: FromSimpleDi[GetCurrenciesInteractor]
 ) -> Response:
-    logger.info("get currencies %s", request)
+    try:
+        list_currencies = ListCurrencies(
+            limit=parse_limit(request.query_params),
+            after=request.query_params.get("after"),
+            fields=parse_fields(request.query_params),
+        )
+        page = get_currencies_interactor(list_currencies)
+    except ValueError as ex:
+        return Response(400, {"message": str(ex)})
 
-    currencies = get_currencies_interactor()
-    response_body = [asdict(currency) for currency in currencies]
-    return Response(200, response_body)
+    if list_currencies.limit is None:
+        return StreamingResponse(200, rows=page.items, encode_row=item_json)
+    headers = next_page_headers("/currencies", request.query_params, page.next_cursor)
+    return Response(200, array_json(map(item_json, page.items)), headers)
 
 
 @currency_router.route("GET", "/currency/{code}")
@@ -38,8 +53,6 @@ def get_currency(
     request: Request,
     get_currency_interactor: FromSimpleDi[GetCurrencyInteractor],
 ) -> Response:
-    logger.info("get currency %s", request)
-
     code = request.path_params.get("code", "")
 
     try:
@@ -49,8 +62,7 @@ def get_currency(
     except CurrencyNotFoundError as ex:
         return Response(404, {"message": str(ex)})
 
-    response_body = asdict(currency)
-    return Response(200, response_body)
+    return Response(200, currency_json(currency))
 
 
 @currency_router.route("POST", "/currencies")
@@ -59,8 +71,6 @@ def create_currency(
     request: Request,
     create_currency_interactor: FromSimpleDi[CreateCurrencyInteracotor],
 ) -> Response:
-    logger.info("create currency %s", request)
-
     name = request.body.get("name")
     code = request.body.get("code")
     sign = request.body.get("sign")
@@ -90,9 +100,7 @@ def create_currency(
     except CurrencyCodeAlreadyExistsError as ex:
         return Response(409, {"message": str(ex)})
 
-    response_body = asdict(created_currency)
-
-    return Response(201, response_body)
+    return Response(201, currency_json(created_currency))
 
 
 @currency_router.route("DELETE", "/currency/{code}")
@@ -101,8 +109,6 @@ def delete_currency(
     request: Request,
     delete_currency_interactor: FromSimpleDi[DeleteCurrencyInteractor],
 ) -> Response:
-    logger.info("delete currency %s", request)
-
     code = request.path_params.get("code", "")
 
     try:
@@ -1,18 +1,35 @@
 import logging
-from dataclasses import asdict
 from decimal import Decimal, InvalidOperation
 
 from currency_exchange.application.exceptions import ExchangeRateNotFoundError
 from currency_exchange.application.interactors.exchange_rates import (
     ExchangeCurrencyInteractor,
 )
-from currency_exchange.application.models import ExchangeCurrencyDTO
+from currency_exchange.application.models import (
+    ExchangeCurrencyDTO,
+    ExchangedCurrencyDTO,
+    ExchangeErrorDTO,
+)
+from currency_exchange.presentation.serializers import (
+    array_json,
+    exchange_error_json,
+    exchanged_currency_json,
+)
 from simple_di.integration import FromSimpleDi, inject
 from simple_server import Request, Response, Router
 
 exchange_router = Router("exchange_router")
 logger = logging.getLogger(__name__)
 
+MAX_BATCH_SIZE = 10_000
+# Amounts are written to JSON without exponent, so their digits are limited
+MAX_AMOUNT_INTEGER_DIGITS = 18
+MAX_AMOUNT_FRACTION_DIGITS = 18
+AMOUNT_RANGE_MESSAGE = (
+    f"Amount must be a finite number with at most {MAX_AMOUNT_INTEGER_DIGITS}"
+    f" integer and {MAX_AMOUNT_FRACTION_DIGITS} fraction digits"
+)
+
 
 @exchange_router.route("GET", "/exchange")
 @inject
@@ -20,8 +37,6 @@ def exchange_currency(
     request: Request,
     exchange_interactor: FromSimpleDi[ExchangeCurrencyInteractor],
 ) -> Response:
-    logger.info("get exchange rates %s", request)
-
     base_currency_code = request.query_params.get("from")
     target_currency_code = request.query_params.get("to")
     amount = request.query_params.get("amount")
@@ -49,9 +64,11 @@ def exchange_currency(
         return Response(
             400, {"message": f"Amount must be convertable to decimal, got <{amount}>"}
         )
+    if not _is_amount_in_range(amount):
+        return Response(400, {"message": f"{AMOUNT_RANGE_MESSAGE}, got <{amount}>"})
 
     exchange_currency_dto = ExchangeCurrencyDTO(
-        base_currency_code, target_currency_code, Decimal(str(amount))
+        base_currency_code, target_currency_code, amount
     )
 
     try:
@@ -67,5 +84,81 @@ def exchange_currency(
             },
         )
 
-    response_body = asdict(exchanged_currence_dto)
-    return Response(200, response_body)
+    return Response(200, exchanged_currency_json(exchanged_currence_dto))
+
+
+@exchange_router.route("POST", "/exchange/batch")
+@inject
+def exchange_currency_batch(
+    request: Request,
+    exchange_interactor: FromSimpleDi[ExchangeCurrencyInteractor],
+) -> Response:
+    items = request.body.get("items")
+    if not isinstance(items, list):
+        return Response(400, {"message": "Field <items> must be a list"})
+    logger.debug("exchange batch of %s items", len(items))
+    if len(items) > MAX_BATCH_SIZE:
+        return Response(
+            400,
+            {"message": f"Batch must have at most {MAX_BATCH_SIZE} items"},
+        )
+
+    parsed_items = [_parse_batch_item(item) for item in items]
+    exchanged = iter(
+        exchange_interactor.batch(
+            [item for item in parsed_items if isinstance(item, ExchangeCurrencyDTO)]
+        )
+    )
+    results = (
+        item if isinstance(item, ExchangeErrorDTO) else next(exchanged)
+        for item in parsed_items
+    )
+    return Response(200, array_json(map(_result_json, results)))
+
+
+def _result_json(result: ExchangedCurrencyDTO | ExchangeErrorDTO) -> bytes:
+    if isinstance(result, ExchangeErrorDTO):
+        return exchange_error_json(result)
+    return exchanged_currency_json(result)
+
+
+def _parse_batch_item(item: object) -> ExchangeCurrencyDTO | ExchangeErrorDTO:
+    if not isinstance(item, dict):
+        return ExchangeErrorDTO("Item must be an object with <from; to; amount>")
+
+    base_currency_code = item.get("from")
+    target_currency_code = item.get("to")
+    amount = item.get("amount")
+    if base_currency_code is None or target_currency_code is None or amount is None:
+        empty_fields = "; ".join(
+            field_name
+            for field_name, value in (
+                ("from", base_currency_code),
+                ("to", target_currency_code),
+                ("amount", amount),
+            )
+            if value is None
+        )
+        return ExchangeErrorDTO(f"Fields <{empty_fields}> not filled in item")
+
+    try:
+        amount_decimal = Decimal(str(amount))
+    except InvalidOperation:
+        return ExchangeErrorDTO(
+            f"Amount must be convertable to decimal, got <{amount}>"
+        )
+    if not _is_amount_in_range(amount_decimal):
+        return ExchangeErrorDTO(f"{AMOUNT_RANGE_MESSAGE}, got <{amount}>")
+
+    return ExchangeCurrencyDTO(
+        str(base_currency_code), str(target_currency_code), amount_decimal
+    )
+
+
+def _is_amount_in_range(amount: Decimal) -> bool:
+    exponent = amount.as_tuple().exponent
+    return (
+        isinstance(exponent, int)
+        and amount.adjusted() < MAX_AMOUNT_INTEGER_DIGITS
+        and exponent >= -MAX_AMOUNT_FRACTION_DIGITS
+    )
@@ -1,5 +1,4 @@
-import logging
-from dataclasses import asdict
+from datetime import datetime
 from decimal import Decimal, InvalidOperation
 
 from currency_exchange.application.exceptions import (
@@ -12,13 +11,26 @@ from currency_exchange.application.interactors.exchange_rates import (
     GetExchangeRatesInteractor,
     UpdateExchangeRateInteractor,
 )
-from currency_exchange.application.models import CreateExchangeRateDTO, GetExchangeRate
+from currency_exchange.application.models import (
+    CreateExchangeRateDTO,
+    GetExchangeRate,
+    ListExchangeRates,
+)
+from currency_exchange.presentation.handlers.pages import (
+    next_page_headers,
+    parse_fields,
+    parse_limit,
+)
+from currency_exchange.presentation.serializers import (
+    array_json,
+    exchange_rate_json,
+    item_json,
+)
 from simple_di.integration import FromSimpleDi, inject
 from simple_server import Request, Router
-from simple_server.types import Response
+from simple_server.types import Response, StreamingResponse
 
 exchange_rates_router = Router("exchange_rates_router")
-logger = logging.getLogger(__name__)
 
 
 @exchange_rates_router.route("GET", "/exchangeRates")
@@ -27,12 +39,28 @@ def get_exchange_rates(
     request: Request,
     get_exchange_rates_interactor: FromSimpleDi[GetExchangeRatesInteractor],
 ) -> Response:
-    logger.info("get exchange rates %s", request)
-
-    exchange_retes = get_exchange_rates_interactor()
-    response_body = [asdict(exchange_rate) for exchange_rate in exchange_retes]
+    updated_since = request.query_params.get("updated_since")
+    try:
+        list_exchange_rates = ListExchangeRates(
+            limit=parse_limit(request.query_params),
+            after=request.query_params.get("after"),
+            fields=parse_fields(request.query_params),
+            base_code=request.query_params.get("base"),
+            target_code=request.query_params.get("target"),
+            updated_since=(
+                None if updated_since is None else _parse_moment(updated_since)
+            ),
+        )
+        page = get_exchange_rates_interactor(list_exchange_rates)
+    except ValueError as ex:
+        return Response(400, {"message": str(ex)})
 
-    return Response(200, response_body)
+    if list_exchange_rates.limit is None:
+        return StreamingResponse(200, rows=page.items, encode_row=item_json)
+    headers = next_page_headers(
+        "/exchangeRates", request.query_params, page.next_cursor
+    )
+    return Response(200, array_json(map(item_json, page.items)), headers)
 
 
 @exchange_rates_router.route("GET", "/exchangeRate/{pair_code}")
@@ -41,8 +69,6 @@ def get_exchange_rate(
     request: Request,
     get_exchange_rate_interactor: FromSimpleDi[GetExchangeRateInteractor],
 ) -> Response:
-    logger.info("get exchange rate  %s", request)
-
     pair_code = request.path_params.get("pair_code", "")
     base_code = pair_code[:3]
     target_code = pair_code[3:]
@@ -55,9 +81,7 @@ def get_exchange_rate(
     except ExchangeRateNotFoundError as ex:
         return Response(404, {"message": str(ex)})
 
-    response_body = asdict(exchange_rete)
-
-    return Response(200, response_body)
+    return Response(200, exchange_rate_json(exchange_rete))
 
 
 @exchange_rates_router.route("POST", "/exchangeRates")
@@ -66,8 +90,6 @@ def create_exchange_rate(
     request: Request,
     create_exchange_rate_interactor: FromSimpleDi[CreateExchangeRateInteractor],
 ) -> Response:
-    logger.info("create exchange rate %s", request)
-
     base_currency_code = request.body.get("baseCurrencyCode")
     target_currency_code = request.body.get("targetCurrencyCode")
     rate = request.body.get("rate")
@@ -113,9 +135,7 @@ def create_exchange_rate(
     except ExchangeRateAlreadyExistsError as ex:
         return Response(409, {"message": str(ex)})
 
-    response_body = asdict(created_exchange_rate)
-
-    return Response(200, response_body)
+    return Response(200, exchange_rate_json(created_exchange_rate))
 
 
 @exchange_rates_router.route("PATCH", "/exchangeRate/{pair_code}")
@@ -124,8 +144,6 @@ def update_exchange_rate(
     request: Request,
     update_exchange_rate_interactor: FromSimpleDi[UpdateExchangeRateInteractor],
 ) -> Response:
-    logger.info("update exchange rate %s", request)
-
     pair_code = request.path_params.get("pair_code")
     if pair_code is None:
         return Response(400, {"message": "pair code not specified in path params"})
@@ -158,5 +176,11 @@ def update_exchange_rate(
     except ExchangeRateNotFoundError as ex:
         return Response(404, {"message": str(ex)})
 
-    response_body = asdict(updated_exchange_rate)
-    return Response(200, response_body)
+    return Response(200, exchange_rate_json(updated_exchange_rate))
+
+
+def _parse_moment(moment: str) -> datetime:
+    try:
+        return datetime.fromisoformat(moment)
+    except ValueError:
+        raise ValueError(f"Moment must be in ISO 8601 format, got <{moment}>") from None
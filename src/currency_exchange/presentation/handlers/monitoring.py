@@ -0,0 +1,30 @@
+from dataclasses import asdict
+
+from currency_exchange.application.interactors.monitoring import (
+    GetCacheStatsInteractor,
+    GetConnectionPoolStatsInteractor,
+)
+from simple_di.integration import FromSimpleDi, inject
+from simple_server import Request, Response, Router
+
+monitoring_router = Router("monitoring_router")
+
+
+@monitoring_router.route("GET", "/stats/pool")
+@inject
+def get_connection_pool_stats(
+    _: Request,
+    get_pool_stats_interactor: FromSimpleDi[GetConnectionPoolStatsInteractor],
+) -> Response:
+    pool_stats = get_pool_stats_interactor()
+    return Response(200, asdict(pool_stats))
+
+
+@monitoring_router.route("GET", "/stats/cache")
+@inject
+def get_cache_stats(
+    _: Request,
+    get_cache_stats_interactor: FromSimpleDi[GetCacheStatsInteractor],
+) -> Response:
+    cache_stats = get_cache_stats_interactor()
+    return Response(200, asdict(cache_stats))
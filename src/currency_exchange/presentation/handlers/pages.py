@@ -0,0 +1,45 @@
+from typing import Any
+from urllib.parse import urlencode
+
+
+def parse_limit(query_params: dict[str, Any]) -> int | None:
+    """Raise ValueError if limit isn't an integer
+
+    >>> parse_limit({"limit": "20"})
+    20
+    """
+    limit = query_params.get("limit")
+    if limit is None:
+        return None
+    try:
+        return int(limit)
+    except ValueError:
+        raise ValueError(f"Limit must be an integer, got <{limit}>") from None
+
+
+def parse_fields(query_params: dict[str, Any]) -> list[str] | None:
+    """Comma separated fields, None when not requested
+
+    >>> parse_fields({"fields": "code, name"})
+    ['code', 'name']
+    """
+    fields = query_params.get("fields")
+    if fields is None:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def next_page_headers(
+    path: str,
+    query_params: dict[str, Any],
+    next_cursor: str | None,
+) -> dict[str, str]:
+    """Link to the next page with the same parameters, RFC 8288
+
+    >>> next_page_headers("/currencies", {"limit": "2", "after": "EUR"}, "RUB")
+    {'Link': '</currencies?limit=2&after=RUB>; rel="next"'}
+    """
+    if next_cursor is None:
+        return {}
+    query = urlencode({**query_params, "after": next_cursor}, safe=",")
+    return {"Link": f'<{path}?{query}>; rel="next"'}
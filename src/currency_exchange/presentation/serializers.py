@@ -0,0 +1,149 @@
+"""JSON of DTOs and page items written straight to bytes, without JSONEncoder
+
+The output is what json.dumps(asdict(dto)) gives, with the same separators
+and escaping, except that Decimals are written with all their digits
+instead of being rounded to float.
+"""
+
+import json
+from collections.abc import Callable, Iterable, Mapping
+from decimal import Decimal
+from functools import lru_cache
+from json.encoder import encode_basestring_ascii
+from typing import Any
+from uuid import UUID
+
+from currency_exchange.application.models import (
+    CurrencyDTO,
+    ExchangedCurrencyDTO,
+    ExchangeErrorDTO,
+    ExchangeRateDTO,
+)
+
+# Currencies of rates repeat from row to row and response to response
+CURRENCY_FRAGMENTS_SIZE = 4096
+# Decimals further from 1 than this many digits are written with exponent
+DECIMAL_PLAIN_DIGITS = 64
+
+
+def currency_json(currency: CurrencyDTO) -> bytes:
+    return _currency_fragment(currency.id, currency.name, currency.code, currency.sign)
+
+
+def exchange_rate_json(exchange_rate: ExchangeRateDTO) -> bytes:
+    return b'{"baseCurrency": %s, "targetCurrency": %s, "rate": %s}' % (
+        currency_json(exchange_rate.baseCurrency),
+        currency_json(exchange_rate.targetCurrency),
+        decimal_json(exchange_rate.rate),
+    )
+
+
+def exchanged_currency_json(exchanged: ExchangedCurrencyDTO) -> bytes:
+    path = ", ".join(encode_basestring_ascii(code) for code in exchanged.path)
+    return (
+        b'{"baseCurrency": %s, "targetCurrency": %s, "rate": %s, "amount": %s,'
+        b' "convertedAmount": %s, "path": [%s]}'
+        % (
+            currency_json(exchanged.baseCurrency),
+            currency_json(exchanged.targetCurrency),
+            decimal_json(exchanged.rate),
+            decimal_json(exchanged.amount),
+            decimal_json(exchanged.convertedAmount),
+            path.encode(),
+        )
+    )
+
+
+def exchange_error_json(error: ExchangeErrorDTO) -> bytes:
+    return b'{"message": %s}' % encode_basestring_ascii(error.message).encode()
+
+
+def item_json(item: Mapping[str, Any]) -> bytes:
+    """Item of a page projected to fields, nested items included
+
+    >>> item_json({"rate": Decimal("0.920000"), "base": {"code": "USD"}})
+    b'{"rate": 0.92, "base": {"code": "USD"}}'
+    """
+    return b"{%s}" % b", ".join(
+        [
+            b"%s: %s" % (_key_json(name), _value_json(value))
+            for name, value in item.items()
+        ]
+    )
+
+
+def array_json(items: Iterable[bytes]) -> bytes:
+    """
+    >>> array_json([b"1", b"2"])
+    b'[1, 2]'
+    """
+    return b"[%s]" % b", ".join(items)
+
+
+def decimal_json(value: Decimal) -> bytes:
+    """Exact digits of the number, without exponent and trailing zeros
+
+    Beyond DECIMAL_PLAIN_DIGITS the exponent is kept, the plain digits
+    of 1E+999999 would take a megabyte.
+
+    >>> decimal_json(Decimal("0.920000")), decimal_json(Decimal("1E+2"))
+    (b'0.92', b'100')
+    >>> decimal_json(Decimal("1.1111111111111111111111111111"))
+    b'1.1111111111111111111111111111'
+    >>> decimal_json(Decimal("1.5E+999999")), decimal_json(Decimal("1E-100"))
+    (b'1.5E+999999', b'1E-100')
+    """
+    if not value.is_finite():
+        # As json.dumps writes such floats
+        return b"NaN" if value.is_nan() else str(value).encode()
+    digits = str(value)
+    if "E" in digits:
+        if abs(value.adjusted()) > DECIMAL_PLAIN_DIGITS:
+            return digits.encode()
+        digits = format(value, "f")
+    if "." in digits:
+        digits = digits.rstrip("0").rstrip(".")
+    return digits.encode()
+
+
+def _value_json(value: object) -> bytes:
+    encode = _VALUE_ENCODERS.get(type(value))
+    if encode is not None:
+        return encode(value)
+    if isinstance(value, Mapping):
+        return item_json(value)
+    return json.dumps(value).encode()
+
+
+def _str_json(value: str) -> bytes:
+    return encode_basestring_ascii(value).encode()
+
+
+@lru_cache(maxsize=64)
+def _key_json(name: str) -> bytes:
+    return encode_basestring_ascii(name).encode()
+
+
+# str() of a UUID is formatted in Python, ids repeat from response to response
+@lru_cache(maxsize=CURRENCY_FRAGMENTS_SIZE)
+def _uuid_json(value: UUID) -> bytes:
+    return b'"%s"' % str(value).encode()
+
+
+# Exact types of values, the most common first
+_VALUE_ENCODERS: dict[type[Any], Callable[[Any], bytes]] = {
+    str: _str_json,
+    Decimal: decimal_json,
+    UUID: _uuid_json,
+    dict: item_json,
+    CurrencyDTO: currency_json,
+}
+
+
+@lru_cache(maxsize=CURRENCY_FRAGMENTS_SIZE)
+def _currency_fragment(currency_id: UUID, name: str, code: str, sign: str) -> bytes:
+    return (
+        f'{{"id": "{currency_id}", "name": {encode_basestring_ascii(name)},'
+        f' "code": {encode_basestring_ascii(code)},'
+        f' "sign": {encode_basestring_ascii(sign)}}}'
+    ).encode()
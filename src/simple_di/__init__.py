@@ -1,3 +1,3 @@
-__all__ = ["Container", "FromSimpleDi"]
+__all__ = ["Container", "FromSimpleDi", "ScopedContainer"]
 
-from simple_di.container import Container, FromSimpleDi
+from simple_di.container import Container, FromSimpleDi, ScopedContainer
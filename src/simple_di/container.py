@@ -1,9 +1,15 @@
+import threading
 from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
 from typing import Annotated, Any, Final, Literal, get_args, get_origin, get_type_hints
 
+from simple_di.exceptions import DependencyCycleError, NoProviderError
+
 type Scope = Literal["APP", "REQUEST"]
 type Getter = Callable[..., object]
 type Deliter = Callable[[Any], None]
+type Key = tuple[Scope, type[object]]
 
 AVAILIBLE_SCOPES: Final[dict[Scope, list[Scope]]] = {
     "APP": ["APP"],
@@ -18,13 +24,97 @@ def mock_deliter(_: object) -> None:
     pass
 
 
+def dependencies_of(func: Callable[..., object]) -> dict[str, type[object]]:
+    """Return the parameters of func annotated with FromSimpleDi and their types
+
+    >>> def factory(settings: FromSimpleDi[dict], debug: bool) -> str: ...
+    >>> dependencies_of(factory)
+    {'settings': <class 'dict'>}
+    """
+    dependencies = {}
+    for name, type_ in get_type_hints(func).items():
+        if get_origin(type_) is not FromSimpleDi:
+            continue
+        dependencies[name] = get_args(type_)[0]
+    return dependencies
+
+
+@dataclass(frozen=True)
+class Step:
+    """Call of one factory, its arguments are objects created by earlier steps"""
+
+    key: Key
+    getter: Getter
+    bindings: tuple[tuple[str, Key], ...]
+
+
+# Steps in dependency order, the last one creates the requested object
+type Plan = tuple[Step, ...]
+
+
+class ScopedContainer:
+    """Objects of one entered REQUEST scope
+
+    Returned by Container.enter_scope. Owns the REQUEST scoped objects it
+    creates and finalizes them on close(), APP scoped dependencies are taken
+    from the parent container.
+    """
+
+    def __init__(
+        self,
+        scope: Scope,
+        resolve: Callable[[type[object], Scope, dict[Key, object]], object],
+        finalize: Callable[[dict[Key, object]], None],
+    ) -> None:
+        self.scope: Scope = scope
+        self._resolve = resolve
+        self._finalize = finalize
+        self._objects: dict[Key, object] = {}
+
+    def get(self, provide: type[object]) -> object:
+        return self._resolve(provide, self.scope, self._objects)
+
+    def close(self) -> None:
+        self._finalize(self._objects)
+
+    def __enter__(self) -> "ScopedContainer":
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
 class Container:
+    """Dependency container safe to use from many threads at once
+
+    APP scoped objects are shared by all threads and created only once.
+    REQUEST scoped objects live in scopes entered by enter_scope(), so
+    concurrent requests never share them:
+
+    >>> container = Container()
+    >>> container.add(list, list, scope="REQUEST")
+    >>> with container.enter_scope() as first, container.enter_scope() as second:
+    ...     first.get(list) is second.get(list)
+    False
+
+    get(scope="REQUEST") and close(scope="REQUEST") use an implicit scope of
+    the calling context (a thread or an asyncio task).
+
+    Type hints of factories are read once: the first get() of a type, or
+    compile(), builds a plan of factory calls that later gets follow.
+    """
+
     def __init__(self) -> None:
         self._provides: dict[
             tuple[Scope, type[object]],
             tuple[Getter, Deliter],
         ] = {}
-        self._cached_objects: dict[tuple[Scope, type[object]], object] = {}
+        self._plans: dict[Key, Plan] = {}
+        self._app_objects: dict[tuple[Scope, type[object]], object] = {}
+        self._app_lock = threading.RLock()
+        self._context_scope_var: ContextVar[ScopedContainer | None] = ContextVar(
+            f"simple_di_scope_{id(self)}", default=None
+        )
 
     def add(
         self,
@@ -34,50 +124,147 @@ class Container:
         scope: Scope = "APP",
     ) -> None:
         self._provides[(scope, provide)] = getter, deliter
+        self._plans.clear()
+
+    def compile(self, *provides: type[object], scope: Scope = "APP") -> None:
+        """Build plans of all providers and of ``provides`` requested in scope
+
+        Raise NoProviderError or DependencyCycleError before any object
+        is created.
+        """
+        for provider_scope, provider_type in list(self._provides):
+            self._plan(provider_type, provider_scope)
+        for provide in provides:
+            self._plan(provide, scope)
+
+    def enter_scope(self, scope: Scope = "REQUEST") -> ScopedContainer:
+        if scope == "APP":
+            raise ValueError("APP scope is shared, only REQUEST scope can be entered")
+        return ScopedContainer(scope, self._resolve, self._finalize)
 
     def get(self, provide: type[object], scope: Scope = "APP") -> object:
-        active_scope = None
-        getter_deliter = None
+        if scope == "APP":
+            return self._resolve(provide, scope, self._app_objects)
+        return self._context_scope().get(provide)
 
-        for availible_scope in AVAILIBLE_SCOPES[scope]:
-            cached_object = self._cached_objects.get((availible_scope, provide), None)
-            if cached_object is not None:
-                return cached_object
-
-            getter_deliter = self._provides.get((availible_scope, provide))
-            if getter_deliter is not None:
-                active_scope = availible_scope
-                break
-
-        if getter_deliter is None or active_scope is None:
-            raise ValueError
-        getter, _ = getter_deliter
-
-        inject_keyword = {}
-        type_hints = get_type_hints(getter)
-        for name, type_ in type_hints.items():
-            if get_origin(type_) is not FromSimpleDi:
-                continue
-            injected_type = get_args(type_)[0]
-            inject_keyword[name] = self.get(injected_type, scope=active_scope)
-        instance = getter(**inject_keyword)
-        self._cached_objects[(active_scope, provide)] = instance
+    def _context_scope(self) -> ScopedContainer:
+        context_scope = self._context_scope_var.get()
+        if context_scope is None:
+            context_scope = self.enter_scope()
+            self._context_scope_var.set(context_scope)
+        return context_scope
+
+    def _resolve(
+        self,
+        provide: type[object],
+        scope: Scope,
+        scope_objects: dict[Key, object],
+    ) -> object:
+        plan = self._plans.get((scope, provide))
+        if plan is None:
+            plan = self._plan(provide, scope)
+
+        key = plan[-1].key
+        cache = self._app_objects if key[0] == "APP" else scope_objects
+        cached_object = cache.get(key, None)
+        if cached_object is not None:
+            return cached_object
+        return self._run(plan, scope_objects)
+
+    def _run(self, plan: Plan, scope_objects: dict[Key, object]) -> object:
+        objects: dict[Key, object] = {}
+        instance: object = None
+        for step in plan:
+            if step.key[0] == "APP":
+                instance = self._app_objects.get(step.key, None)
+                if instance is None:
+                    with self._app_lock:
+                        instance = self._app_objects.get(step.key, None)
+                        if instance is None:
+                            instance = self._call(step, objects)
+                            self._app_objects[step.key] = instance
+            else:
+                instance = scope_objects.get(step.key, None)
+                if instance is None:
+                    instance = self._call(step, objects)
+                    scope_objects[step.key] = instance
+            objects[step.key] = instance
         return instance
 
+    def _call(self, step: Step, objects: dict[Key, object]) -> object:
+        return step.getter(**{name: objects[key] for name, key in step.bindings})
+
+    def _plan(self, provide: type[object], scope: Scope) -> Plan:
+        steps: dict[Key, Step] = {}
+        self._add_steps(provide, scope, steps, [])
+        plan = tuple(steps.values())
+        self._plans[(scope, provide)] = plan
+        return plan
+
+    def _add_steps(
+        self,
+        provide: type[object],
+        scope: Scope,
+        steps: dict[Key, Step],
+        resolving: list[Key],
+    ) -> Key:
+        key = self._provider_key(provide, scope)
+        if key in resolving:
+            cycle = [type_.__name__ for _, type_ in (*resolving, key)]
+            raise DependencyCycleError(" -> ".join(cycle))
+        if key in steps:
+            return key
+
+        active_scope, _ = key
+        getter, _ = self._provides[key]
+        resolving.append(key)
+        bindings = tuple(
+            (name, self._add_steps(type_, active_scope, steps, resolving))
+            for name, type_ in dependencies_of(getter).items()
+        )
+        resolving.pop()
+        steps[key] = Step(key, getter, bindings)
+        return key
+
+    def _provider_key(self, provide: type[object], scope: Scope) -> Key:
+        for availible_scope in AVAILIBLE_SCOPES[scope]:
+            if (availible_scope, provide) in self._provides:
+                return availible_scope, provide
+        raise NoProviderError(f"No provider of {provide!r} for scope {scope}")
+
     def close(self, scope: Scope = "APP") -> None:
-        outdated_objects = []
-        for (scope_obj, type_obj), created_object in self._cached_objects.items():
-            if scope_obj != scope:
-                continue
+        if scope == "APP":
+            with self._app_lock:
+                self._finalize(self._app_objects)
+            return
 
-            getter_deliter = self._provides.get((scope, type_obj))
-            if getter_deliter is None:
-                raise ValueError
+        context_scope = self._context_scope_var.get()
+        if context_scope is not None:
+            self._context_scope_var.set(None)
+            context_scope.close()
 
-            _, deliter = getter_deliter
-            deliter(created_object)
+    def _finalize(self, cached_objects: dict[Key, object]) -> None:
+        """Finalize objects in reverse order of creation, dependents first
 
-            outdated_objects.append((scope_obj, type_obj))
+        A failed deliter doesn't skip the rest, so every object is released.
+        Its error is raised after all of them, several in an ExceptionGroup.
+        """
+        errors: list[Exception] = []
+        for key, created_object in reversed(list(cached_objects.items())):
+            getter_deliter = self._provides.get(key)
+            if getter_deliter is None:
+                errors.append(
+                    NoProviderError(f"No provider of {key[1]!r} for scope {key[0]}")
+                )
+                continue
+            _, deliter = getter_deliter
+            try:
+                deliter(created_object)
+            except Exception as error:  # noqa: BLE001
+                errors.append(error)
+        cached_objects.clear()
 
-        for scope_obj, type_obj in outdated_objects:
-            del self._cached_objects[(scope_obj, type_obj)]
+        if len(errors) == 1:
+            raise errors[0]
+        if errors:
+            raise ExceptionGroup("Errors while finalizing objects", errors)
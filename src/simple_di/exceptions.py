@@ -0,0 +1,4 @@
+class NoProviderError(ValueError): ...
+
+
+class DependencyCycleError(ValueError): ...
@@ -1,52 +1,119 @@
 __all__ = ["FromSimpleDi"]
 
-from collections.abc import Callable
+import inspect
+from collections.abc import Awaitable, Callable
 from functools import wraps
 from typing import (
+    Any,
     Concatenate,
     ParamSpec,
-    get_args,
-    get_origin,
-    get_type_hints,
+    overload,
     override,
 )
 
-from simple_di.container import Container, FromSimpleDi
+from simple_di.container import (
+    Container,
+    FromSimpleDi,
+    ScopedContainer,
+    dependencies_of,
+)
 from simple_server.app import SimpleApp
 from simple_server.middleware import Middleware
-from simple_server.types import Handler, Request, Response
+from simple_server.types import Handler, Request, Response, StreamingResponse
 
 Params = ParamSpec("Params")
 
+# Attribute of injected handlers with their dependencies
+DEPENDENCIES_ATTRIBUTE = "__simple_di_dependencies__"
+
+
+@overload
+def inject(
+    handler: Callable[Concatenate[Request, Params], Awaitable[Response]],
+) -> Callable[[Request], Awaitable[Response]]: ...
+
+
+@overload
+def inject(
+    handler: Callable[Concatenate[Request, Params], Response],
+) -> Callable[[Request], Response]: ...
+
 
 def inject(
+    handler: Callable[Concatenate[Request, Params], Any],
+) -> Callable[[Request], Any]:
+    dependencies = _Dependencies(handler)
+    injected: Callable[[Request], Response] | Callable[[Request], Awaitable[Response]]
+    if inspect.iscoroutinefunction(handler):
+        injected = _inject_async(handler, dependencies)
+    else:
+        injected = _inject_sync(handler, dependencies)
+    setattr(injected, DEPENDENCIES_ATTRIBUTE, dependencies)
+    return injected
+
+
+class _Dependencies:
+    """Dependencies of a handler, type hints are read on the first request"""
+
+    def __init__(self, handler: Callable[..., object]) -> None:
+        self._handler = handler
+        self._types: tuple[tuple[str, type[object]], ...] | None = None
+
+    @property
+    def types(self) -> tuple[tuple[str, type[object]], ...]:
+        if self._types is None:
+            self._types = tuple(dependencies_of(self._handler).items())
+        return self._types
+
+    def resolve(self, scope: ScopedContainer, kwargs: dict[str, Any]) -> None:
+        for name, type_ in self.types:
+            kwargs[name] = scope.get(type_)
+
+
+def _inject_sync(
     handler: Callable[Concatenate[Request, Params], Response],
+    dependencies: _Dependencies,
 ) -> Callable[[Request], Response]:
     @wraps(handler)
     def wraper(
         request: Request, *args: Params.args, **kwargs: Params.kwargs
     ) -> Response:
-        container: Container | None = request.context.pop("simple_container")
-        if container is None:
+        scope: ScopedContainer | None = request.context.pop("simple_container")
+        if scope is None:
             return handler(request, *args, **kwargs)
 
-        type_hints = get_type_hints(handler)
-        for name, type_ in type_hints.items():
-            if get_origin(type_) is not FromSimpleDi:
-                continue
-            injected_type = get_args(type_)[0]
-            kwargs[name] = container.get(injected_type, scope="REQUEST")
+        dependencies.resolve(scope, kwargs)
+        return handler(request, *args, **kwargs)
 
-        try:
-            result = handler(request, *args, **kwargs)
-        finally:
-            container.close(scope="REQUEST")
-        return result
+    return wraper
+
+
+def _inject_async(
+    handler: Callable[Concatenate[Request, Params], Awaitable[Response]],
+    dependencies: _Dependencies,
+) -> Callable[[Request], Awaitable[Response]]:
+    @wraps(handler)
+    async def wraper(
+        request: Request, *args: Params.args, **kwargs: Params.kwargs
+    ) -> Response:
+        scope: ScopedContainer | None = request.context.pop("simple_container")
+        if scope is None:
+            return await handler(request, *args, **kwargs)
+
+        dependencies.resolve(scope, kwargs)
+        return await handler(request, *args, **kwargs)
 
     return wraper
 
 
 class DiMiddleware(Middleware):
+    """Enter a REQUEST scope for each request, close it after the response
+
+    The scope of a streaming response is closed when the response is,
+    after its rows are written, so the rows may be read from REQUEST
+    scoped objects.
+    """
+
     def __init__(self, container: Container):
         self._container = container
 
@@ -56,9 +123,31 @@ class DiMiddleware(Middleware):
         handler: Handler,
         request: Request,
     ) -> Response:
-        request.context["simple_container"] = self._container
-        return handler(request)
+        scope = self._container.enter_scope("REQUEST")
+        try:
+            request.context["simple_container"] = scope
+            response = handler(request)
+        except BaseException:
+            scope.close()
+            raise
+        if isinstance(response, StreamingResponse):
+            response.on_close.append(scope.close)
+        else:
+            scope.close()
+        return response
 
 
 def setup(app: SimpleApp, container: Container) -> None:
+    """Inject dependencies into the app handlers
+
+    Dependencies of the handlers of routers already included into the app
+    are checked here, so a missing provider fails the start of the app.
+    """
     app.add_middleware(DiMiddleware(container))
+    provides: set[type[object]] = set()
+    for router in app.routers:
+        for route in router.routes:
+            dependencies = getattr(route.handler, DEPENDENCIES_ATTRIBUTE, None)
+            if isinstance(dependencies, _Dependencies):
+                provides.update(type_ for _, type_ in dependencies.types)
+    container.compile(*provides, scope="REQUEST")
@@ -3,11 +3,21 @@ __all__ = [
     "SimpleApp",
     "Request",
     "Response",
+    "StreamingResponse",
     "Middleware",
+    "AsyncMiddleware",
+    "AccessLogMiddleware",
     "CORSMiddleware",
+    "CompressionMiddleware",
+    "ResponseCacheMiddleware",
+    "ServeOptions",
 ]
 
+from simple_server.access_log import AccessLogMiddleware
 from simple_server.app import SimpleApp
-from simple_server.middleware import CORSMiddleware, Middleware
+from simple_server.cache import ResponseCacheMiddleware
+from simple_server.compression import CompressionMiddleware
+from simple_server.middleware import AsyncMiddleware, CORSMiddleware, Middleware
 from simple_server.router import Router
-from simple_server.types import Request, Response
+from simple_server.server import ServeOptions
+from simple_server.types import Request, Response, StreamingResponse
@@ -0,0 +1,100 @@
+import random
+import time
+from collections.abc import Iterator
+from http import HTTPStatus
+from logging import ERROR, INFO, WARNING, Logger, getLogger
+from typing import override
+
+from simple_server.middleware import Middleware
+from simple_server.protocol import BODYLESS_STATUSES, encode_body
+from simple_server.types import Handler, Request, Response, StreamingResponse
+
+access_logger = getLogger("simple_server.access")
+
+
+class AccessLogMiddleware(Middleware):
+    """Log one line per request: method, route template, status, time, bytes
+
+    Responses with status 400 and above and requests whose handler raised
+    are always logged, others with probability ``sample_rate``. The line of
+    a streaming response is logged when it is closed, with the time and
+    bytes of the whole stream. Added first, the middleware times the rest
+    of the chain; bytes are of the body it gets from the middlewares after
+    it, compressed ones included. Requests to paths without a route get
+    404 through app middlewares, their line has the path instead of the
+    route template.
+    """
+
+    def __init__(self, *, sample_rate: float = 1.0, logger: Logger | None = None):
+        self._sample_rate = sample_rate
+        self._logger = logger or access_logger
+
+    @override
+    def __call__(self, handler: Handler, request: Request) -> Response:
+        started = time.perf_counter()
+        try:
+            response = handler(request)
+        except Exception:
+            self._log(request, HTTPStatus.INTERNAL_SERVER_ERROR, started, "-")
+            raise
+        if not self._is_logged(response.status_code):
+            return response
+
+        if isinstance(response, StreamingResponse):
+            counter = _ByteCounter()
+            response.transforms.append(counter)
+            response.on_close.append(
+                lambda: self._log(request, response.status_code, started, counter.size)
+            )
+            return response
+        if response.status_code in BODYLESS_STATUSES or response.body is None:
+            self._log(request, response.status_code, started, 0)
+            return response
+        # Encoded once here, the server sends bytes as they are
+        _, body = encode_body(response)
+        self._log(request, response.status_code, started, len(body))
+        return Response(response.status_code, body, response.headers)
+
+    def _is_logged(self, status_code: int) -> bool:
+        return (
+            status_code >= HTTPStatus.BAD_REQUEST
+            or self._sample_rate >= 1
+            or random.random() < self._sample_rate
+        )
+
+    def _log(
+        self,
+        request: Request,
+        status_code: int,
+        started: float,
+        size: int | str,
+    ) -> None:
+        self._logger.log(
+            self._level(status_code),
+            "method=%s route=%s status=%s duration_ms=%.2f bytes=%s",
+            request.method,
+            request.route or request.path,
+            status_code,
+            (time.perf_counter() - started) * 1000,
+            size,
+        )
+
+    @staticmethod
+    def _level(status_code: int) -> int:
+        if status_code >= HTTPStatus.INTERNAL_SERVER_ERROR:
+            return ERROR
+        if status_code >= HTTPStatus.BAD_REQUEST:
+            return WARNING
+        return INFO
+
+
+class _ByteCounter:
+    """Transform of streamed pieces that counts their bytes"""
+
+    def __init__(self) -> None:
+        self.size = 0
+
+    def __call__(self, pieces: Iterator[bytes]) -> Iterator[bytes]:
+        for piece in pieces:
+            self.size += len(piece)
+            yield piece
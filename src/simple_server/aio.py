@@ -0,0 +1,356 @@
+import asyncio
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass
+from http import HTTPStatus
+from logging import getLogger
+
+from simple_server.app import SimpleApp
+from simple_server.protocol import (
+    BODYLESS_STATUSES,
+    LAST_CHUNK,
+    encode_body,
+    encode_chunk,
+    error_response,
+    parse_body,
+    parse_params,
+    parse_path,
+)
+from simple_server.server import STOP_SIGNALS, ServeOptions
+from simple_server.types import (
+    Method,
+    Path,
+    Request,
+    Response,
+    StreamingResponse,
+)
+
+logger = getLogger(__name__)
+
+HEADERS_END = b"\r\n\r\n"
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus) -> None:
+        super().__init__(status.phrase)
+        self.status = status
+
+
+@dataclass
+class RawRequest:
+    method: Method
+    target: str
+    version: str
+    headers: dict[str, str]
+    body: bytes
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+@dataclass(eq=False)
+class Connection:
+    task: asyncio.Task[None]
+    busy: bool = False
+
+
+def create_listening_socket(host: str, port: int, backlog: int = 1024) -> socket.socket:
+    return socket.create_server((host, port), backlog=backlog)
+
+
+class AsyncHTTPServer:
+    """HTTP/1.1 server on asyncio streams
+
+    Idle keep-alive connections cost only a coroutine waiting for the next
+    request. Async handlers run on the event loop, sync handlers and sync
+    middlewares run in a pool of ``options.threads`` threads.
+    """
+
+    def __init__(
+        self,
+        app: SimpleApp,
+        options: ServeOptions,
+        *,
+        max_header_size: int = 64 * 1024,
+    ) -> None:
+        self._app = app
+        self._executor_threads = options.threads
+        self._keep_alive_timeout = options.keep_alive_timeout
+        self._max_keep_alive_requests = options.max_keep_alive_requests
+        self._max_header_size = max_header_size
+        self._max_body_size = options.max_body_size
+        self._executor: ThreadPoolExecutor | None = None
+        self._connections: set[Connection] = set()
+        self._closing = False
+
+    def run(self, sock: socket.socket) -> None:
+        """Serve on the listening socket until SIGINT or SIGTERM"""
+        # Stop signals may be blocked by a prefork parent, the loop handles them
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+        asyncio.run(self._serve_until_signal(sock))
+
+    async def _serve_until_signal(self, sock: socket.socket) -> None:
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        for signum in STOP_SIGNALS:
+            loop.add_signal_handler(signum, stop.set)
+        try:
+            await self.serve(sock, stop)
+        finally:
+            for signum in STOP_SIGNALS:
+                loop.remove_signal_handler(signum)
+
+    async def serve(self, sock: socket.socket, stop: asyncio.Event) -> None:
+        """Serve on the listening socket until the stop event is set"""
+        self._closing = False
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._executor_threads,
+            thread_name_prefix="simple_server",
+        )
+        asyncio.get_running_loop().set_default_executor(self._executor)
+        server = await asyncio.start_server(
+            self._serve_connection,
+            sock=sock,
+            limit=self._max_header_size,
+        )
+        try:
+            await stop.wait()
+            logger.info("Stopping server")
+        finally:
+            server.close()
+            await self._close_connections()
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _close_connections(self) -> None:
+        """Drop idle connections and wait for in-flight requests"""
+        self._closing = True
+        for connection in self._connections:
+            if not connection.busy:
+                connection.task.cancel()
+        tasks = [connection.task for connection in self._connections]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _serve_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        task = asyncio.current_task()
+        if task is None:
+            raise RuntimeError("Connection must be served by a task")
+        connection = Connection(task)
+        self._connections.add(connection)
+        peer = writer.get_extra_info("peername")
+        served_requests = 0
+        try:
+            while not self._closing:
+                try:
+                    raw_request = await asyncio.wait_for(
+                        self._read_request(reader, writer),
+                        self._keep_alive_timeout,
+                    )
+                except TimeoutError:
+                    break
+                except HTTPError as ex:
+                    await self._write_response(
+                        writer, error_response(ex.status), keep_alive=False
+                    )
+                    break
+                if raw_request is None:
+                    break
+
+                connection.busy = True
+                response = await self._dispatch(raw_request)
+                served_requests += 1
+                keep_alive = (
+                    raw_request.keep_alive
+                    and not self._closing
+                    and served_requests < self._max_keep_alive_requests
+                )
+                if isinstance(response, StreamingResponse):
+                    keep_alive = await self._write_streaming_response(
+                        writer,
+                        response,
+                        keep_alive=keep_alive,
+                        chunked=raw_request.version != "HTTP/1.0",
+                    )
+                else:
+                    await self._write_response(writer, response, keep_alive=keep_alive)
+                connection.busy = False
+                logger.debug(
+                    '%s "%s %s %s" %s',
+                    peer,
+                    raw_request.method,
+                    raw_request.target,
+                    raw_request.version,
+                    response.status_code,
+                )
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(connection)
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _read_request(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> RawRequest | None:
+        """Read the next request, return None if the client closed connection"""
+        try:
+            head = await reader.readuntil(HEADERS_END)
+        except asyncio.IncompleteReadError as ex:
+            if ex.partial.strip():
+                raise HTTPError(HTTPStatus.BAD_REQUEST) from None
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE) from None
+
+        request_line, *header_lines = (
+            head.lstrip(b"\r\n").decode("latin-1").split("\r\n")
+        )
+        method, target, version = _parse_request_line(request_line)
+        headers = _parse_headers(header_lines)
+
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            raise HTTPError(HTTPStatus.NOT_IMPLEMENTED)
+        try:
+            content_length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST) from None
+        if content_length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+        if content_length > self._max_body_size:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+
+        if content_length and headers.get("expect", "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+        body = await reader.readexactly(content_length) if content_length else b""
+        return RawRequest(method, target, version, headers, body)
+
+    async def _dispatch(self, raw_request: RawRequest) -> Response:
+        try:
+            body = parse_body(raw_request.body, raw_request.headers.get("content-type"))
+        except ValueError:
+            return error_response(HTTPStatus.BAD_REQUEST)
+        path: Path = parse_path(raw_request.target)
+        request = Request(
+            body,
+            parse_params(raw_request.target),
+            {},
+            {},
+            raw_request.method,
+            path,
+            raw_request.headers,
+        )
+
+        try:
+            return await self._app.handle_async(request, raw_request.method, path)
+        except Exception:
+            logger.exception("Error while handling request")
+            return error_response(HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    async def _write_response(
+        self,
+        writer: asyncio.StreamWriter,
+        response: Response,
+        *,
+        keep_alive: bool,
+    ) -> None:
+        head: list[str] = []
+        if response.status_code in BODYLESS_STATUSES:
+            body = b""
+        else:
+            content_type, body = encode_body(response)
+            head.append(f"Content-Length: {len(body)}")
+            head.append(f"Content-Type: {content_type}")
+        writer.write(_encode_head(response, head, keep_alive=keep_alive) + body)
+        await writer.drain()
+
+    async def _write_streaming_response(
+        self,
+        writer: asyncio.StreamWriter,
+        response: StreamingResponse,
+        *,
+        keep_alive: bool,
+        chunked: bool,
+    ) -> bool:
+        """Write rows produced in the executor, return if the connection is reusable
+
+        Without chunked encoding, for HTTP/1.0, the body ends with the
+        connection. Headers are gone when the rows fail, so the connection
+        is closed without the last chunk and the client sees a truncated
+        body.
+        """
+        loop = asyncio.get_running_loop()
+        keep_alive = keep_alive and chunked
+        try:
+            head = ["Content-Type: application/json"]
+            if chunked:
+                head.append("Transfer-Encoding: chunked")
+            writer.write(_encode_head(response, head, keep_alive=keep_alive))
+
+            pieces = response.pieces()
+            while True:
+                try:
+                    piece = await loop.run_in_executor(None, next, pieces, None)
+                except Exception:
+                    logger.exception("Error while streaming response")
+                    return False
+                if piece is None:
+                    break
+                writer.write(encode_chunk(piece) if chunked else piece)
+                await writer.drain()
+            if chunked:
+                writer.write(LAST_CHUNK)
+            await writer.drain()
+        finally:
+            await loop.run_in_executor(None, response.close)
+        return keep_alive
+
+
+def _encode_head(response: Response, head: list[str], *, keep_alive: bool) -> bytes:
+    """Status line and headers of the response, ``head`` are headers of the body"""
+    try:
+        reason = HTTPStatus(response.status_code).phrase
+    except ValueError:
+        reason = ""
+
+    lines = [f"HTTP/1.1 {response.status_code} {reason}", *head]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    lines.extend(f"{keyword}: {value}" for keyword, value in response.headers.items())
+    lines.append("\r\n")
+    return "\r\n".join(lines).encode("latin-1")
+
+
+def _parse_request_line(request_line: str) -> tuple[Method, str, str]:
+    parts = request_line.split()
+    if len(parts) != 3:  # noqa: PLR2004
+        raise HTTPError(HTTPStatus.BAD_REQUEST)
+    method, target, version = parts
+    if version not in {"HTTP/1.0", "HTTP/1.1"}:
+        raise HTTPError(HTTPStatus.HTTP_VERSION_NOT_SUPPORTED)
+    return method, target, version
+
+
+def _parse_headers(header_lines: list[str]) -> dict[str, str]:
+    headers: dict[str, str] = {}
+    for line in header_lines:
+        if not line:
+            continue
+        name, separator, value = line.partition(":")
+        if not separator:
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+        headers[name.strip().lower()] = value.strip()
+    return headers
@@ -1,17 +1,39 @@
-import json
 from collections.abc import Callable
 from functools import partial
+from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, HTTPServer
-from logging import getLogger
+from logging import DEBUG, WARNING, getLogger
 from socketserver import BaseServer
-from typing import Any
-from urllib.parse import parse_qsl, urlparse
+from typing import Any, override
 
-from simple_server.encoder import SimpleEncoder
+from simple_server.chain import Chain, compose
 from simple_server.exceptions import RequestNotHandledError
-from simple_server.middleware import Middleware
+from simple_server.middleware import AsyncMiddleware, Middleware
+from simple_server.protocol import (
+    BODYLESS_STATUSES,
+    LAST_CHUNK,
+    encode_body,
+    encode_chunk,
+    error_response,
+    parse_body,
+    parse_params,
+    parse_path,
+)
 from simple_server.router import Router
-from simple_server.types import Handler, Method, Path, Request, Response
+from simple_server.routing import Route, RouteTable
+from simple_server.server import (
+    ServeOptions,
+    create_server,
+    serve_prefork,
+    serve_until_stopped,
+)
+from simple_server.types import (
+    Method,
+    Path,
+    Request,
+    Response,
+    StreamingResponse,
+)
 
 logger = getLogger(__name__)
 
@@ -20,71 +42,175 @@ class SimpleApp:
     def __init__(self, name: str):
         self.name = name
         self._routers: list[Router] = []
-        self._middlewares: list[Middleware] = []
+        self._middlewares: list[Middleware | AsyncMiddleware] = []
+        self._route_table: RouteTable | None = None
+        self._not_found = compose(_not_found, ())
 
     def include_router(self, router: Router) -> None:
         self._routers.append(router)
-
-    def add_middleware(self, middlewere: Middleware) -> None:
+        self._route_table = None
+
+    def compile(self) -> RouteTable:
+        """Build the route table of all included routers
+
+        Middlewares are composed once per route here: app middlewares wrap
+        router middlewares, which wrap route middlewares. Raise
+        RouteConflictError if two handlers, or one handler with other
+        middlewares, are registered for the same method and path, TypeError
+        if middlewares of a route can't be composed. Called by run(), so
+        such errors are reported on start.
+        """
+        routes = [
+            route.with_middlewares(self._middlewares)
+            for router in self._routers
+            for route in router.routes
+        ]
+        for route in routes:
+            route.compile()
+        self._not_found = compose(_not_found, self._middlewares)
+        self._route_table = RouteTable(routes)
+        return self._route_table
+
+    def add_middleware(self, middlewere: Middleware | AsyncMiddleware) -> None:
         self._middlewares.append(middlewere)
+        self._route_table = None
 
     def handle(self, request: Request, method: Method, path: Path) -> Response:
-        handler = self._wrap_middleware(method, path)
+        """Handle the request by its route
+
+        A request without a route gets 404 through the app middlewares,
+        so they see every request.
+        """
+        handler = self._route_chain(request, method, path).handler
+        if handler is None:
+            raise TypeError(
+                f"Route {method} {request.route or path} has async handler or"
+                " middleware, it can be served only by the asyncio engine"
+            )
         return handler(request)
 
-    def _wrap_middleware(self, method: Method, path: Path) -> Handler:
-        def wrapper_handler(request: Request) -> Response:
-            return self._handle(request, method, path)
-
-        middleware = wrapper_handler
-        for m in reversed(self._middlewares):
-            middleware = partial(m, middleware)
-
-        return middleware
+    def resolve(self, method: Method, path: Path) -> tuple[Route, dict[str, str]]:
+        """Find the route for the request, raise RequestNotHandledError"""
+        route_table = self._route_table or self.compile()
+        match = route_table.lookup(method, path)
+        if match is None:
+            raise RequestNotHandledError
+        return match
 
-    def _handle(self, request: Request, method: Method, path: Path) -> Response:
-        for router in self._routers:
-            try:
-                response = router.handle(request, method, path)
-            except RequestNotHandledError:
-                continue
-            return response
-        raise RequestNotHandledError
+    async def handle_async(
+        self,
+        request: Request,
+        method: Method,
+        path: Path,
+    ) -> Response:
+        """Handle the request on the event loop
+
+        Sync handlers and middlewares run in the default executor of the
+        loop. Routes whose handler and middlewares are all sync are handled
+        by one executor call, exactly as the threaded engine handles them.
+        """
+        return await self._route_chain(request, method, path).async_handler(request)
+
+    def _route_chain(self, request: Request, method: Method, path: Path) -> Chain:
+        """Chain of the route, the request gets its template and path params"""
+        try:
+            route, path_params = self.resolve(method, path)
+        except RequestNotHandledError:
+            return self._not_found
+        request.path_params.update(path_params)
+        request.route = route.template
+        return route.chain
 
     @property
     def routers(self) -> list[Router]:
         return self._routers
 
-    def run(self, host: str, port: int) -> None:
-        httpd = HTTPServer((host, port), handler_factory(self))
-
-        logger.info("START SERVE SERVER ON %s:%s", host, port)
-        try:
-            httpd.serve_forever()
-        except KeyboardInterrupt:
-            logger.info("STOP SERVE SERVER.")
+    def run(
+        self,
+        host: str,
+        port: int,
+        options: ServeOptions | None = None,
+    ) -> None:
+        """Serve the app until SIGINT or SIGTERM, see ServeOptions"""
+        options = options or ServeOptions()
+        self.compile()
+        threads = options.threads
+        if options.mode == "single" and options.engine == "threaded":
+            threads = 1
+
+        logger.info(
+            "START SERVE SERVER ON %s:%s (engine=%s, mode=%s, workers=%s, threads=%s)",
+            host,
+            port,
+            options.engine,
+            options.mode,
+            options.workers if options.mode == "processes" else 1,
+            threads,
+        )
+        if options.engine == "asyncio":
+            self._run_asyncio(host, port, options)
+        else:
+            httpd = create_server(host, port, handler_factory(self, options), threads)
+            if options.mode == "processes":
+                run_worker = partial(serve_until_stopped, httpd)
+                serve_prefork(run_worker, httpd.socket, options.workers)
+            else:
+                serve_until_stopped(httpd)
+        logger.info("STOP SERVE SERVER.")
+
+    def _run_asyncio(self, host: str, port: int, options: ServeOptions) -> None:
+        # Imported here, the asyncio engine depends on SimpleApp
+        from simple_server.aio import AsyncHTTPServer, create_listening_socket
+
+        sock = create_listening_socket(host, port)
+        server = AsyncHTTPServer(self, options)
+        if options.mode == "processes":
+            serve_prefork(partial(server.run, sock), sock, options.workers)
+        else:
+            server.run(sock)
 
 
 def handler_factory(
     app: SimpleApp,
+    options: ServeOptions,
 ) -> Callable[[Any, Any, HTTPServer], BaseHTTPRequestHandler]:
+    class OptionsRequestHandler(RequestHandler):
+        # Socket timeout of StreamRequestHandler, a class attribute
+        timeout = options.keep_alive_timeout
+
     def get_handler(
         request: Any, client_address: Any, server: BaseServer
     ) -> BaseHTTPRequestHandler:
-        return RequestHandler(request, client_address, server, app=app)
+        return OptionsRequestHandler(request, client_address, server, app, options)
 
     return get_handler
 
 
 class RequestHandler(BaseHTTPRequestHandler):
+    """Serves HTTP/1.1 keep-alive connections, pipelined requests included
+
+    A connection is closed after ``keep_alive_timeout`` seconds without
+    requests, with the handler class of handler_factory, or after
+    ``max_keep_alive_requests`` responses.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body of a response leave in one write when wfile is flushed
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
     def __init__(
         self,
         request: Any,
         client_address: Any,
         server: BaseServer,
         app: SimpleApp,
+        options: ServeOptions,
     ) -> None:
         self._app: SimpleApp = app
+        self._max_requests = options.max_keep_alive_requests
+        self._max_body_size = options.max_body_size
+        self._served_requests = 0
         super().__init__(request, client_address, server)
 
     def do_GET(self) -> None:
@@ -105,64 +231,149 @@ class RequestHandler(BaseHTTPRequestHandler):
     def do_OPTIONS(self) -> None:
         self._handle_request()
 
+    @override
+    def log_request(self, code: int | str = "-", size: int | str = "-") -> None:
+        # A line per request to stderr, AccessLogMiddleware logs them instead
+        pass
+
+    @override
+    def log_message(self, format: str, *args: Any) -> None:
+        self._log(DEBUG, format, args)
+
+    @override
+    def log_error(self, format: str, *args: Any) -> None:
+        # An idle keep-alive connection closed by its timeout is not an error
+        level = DEBUG if format.startswith("Request timed out") else WARNING
+        self._log(level, format, args)
+
+    @override
+    def send_error(
+        self,
+        code: int,
+        message: str | None = None,
+        explain: str | None = None,
+    ) -> None:
+        # Called by BaseHTTPRequestHandler for requests it can't parse,
+        # the rest of the stream can't be trusted after them.
+        self.log_error("code %d, message %s", code, message)
+        self.close_connection = True
+        self._send_full_response(error_response(HTTPStatus(code), message))
+
     def _handle_request(self) -> None:
-        body = self._parse_body()
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            self.send_error(HTTPStatus.NOT_IMPLEMENTED, "Chunked body not supported")
+            return
+        try:
+            content_len = int(self.headers.get("Content-Length", "0"))
+        except ValueError:
+            self.send_error(HTTPStatus.BAD_REQUEST, "Bad Content-Length")
+            return
+        # read(-1) would wait for the client to close the connection
+        if content_len < 0:
+            self.send_error(HTTPStatus.BAD_REQUEST, "Bad Content-Length")
+            return
+        if content_len > self._max_body_size:
+            self.send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return
+
+        try:
+            body = self._parse_body(content_len)
+        except ValueError:
+            self._send_full_response(error_response(HTTPStatus.BAD_REQUEST))
+            return
         params = self._parse_params()
         path = self._parse_path()
-        request = Request(body, params, {}, {})
         method = self._parse_method()
+        headers = {name.lower(): value for name, value in self.headers.items()}
+        request = Request(body, params, {}, {}, method, path, headers)
 
         try:
             response = self._app.handle(request, method, path)
-        except RequestNotHandledError:
-            self.send_error(404)
-            return
         except Exception:
             logger.exception("Error while handling request")
-            self.send_error(500)
-            return
-        self._send_full_response(response)
+            response = error_response(HTTPStatus.INTERNAL_SERVER_ERROR)
+        if isinstance(response, StreamingResponse):
+            self._send_streaming_response(response)
+        else:
+            self._send_full_response(response)
 
     def _send_full_response(self, response: Response) -> None:
-        if response.body is not None:
-            response_body = json.dumps(response.body, cls=SimpleEncoder)
-            content_type = "application/json"
+        self._count_response()
+        self.send_response(response.status_code)
+        if response.status_code in BODYLESS_STATUSES:
+            response_body = b""
         else:
-            response_body = ""
-            content_type = "text/plain"
+            content_type, response_body = encode_body(response)
+            self.send_header("Content-Length", str(len(response_body)))
+            self.send_header("Content-Type", content_type)
+        self._end_headers(response)
 
-        self.send_response(response.status_code)
-        self.send_header("Content-Length", str(len(response_body)))
-        self.send_header("Content-Type", content_type)
+        self.wfile.write(response_body)
+
+    def _send_streaming_response(self, response: StreamingResponse) -> None:
+        """Write rows in chunks, to HTTP/1.0 clients until the connection closes
+
+        Headers are gone when the rows fail, so the connection is closed
+        without the last chunk and the client sees a truncated body.
+        """
+        try:
+            self._count_response()
+            chunked = self.request_version != "HTTP/1.0"
+            if not chunked:
+                self.close_connection = True
+            self.send_response(response.status_code)
+            self.send_header("Content-Type", "application/json")
+            if chunked:
+                self.send_header("Transfer-Encoding", "chunked")
+            self._end_headers(response)
+
+            pieces = response.pieces()
+            while True:
+                try:
+                    piece = next(pieces, None)
+                except Exception:
+                    logger.exception("Error while streaming response")
+                    self.close_connection = True
+                    return
+                if piece is None:
+                    break
+                self.wfile.write(encode_chunk(piece) if chunked else piece)
+            if chunked:
+                self.wfile.write(LAST_CHUNK)
+        finally:
+            response.close()
+
+    def _count_response(self) -> None:
+        self._served_requests += 1
+        if self._served_requests >= self._max_requests:
+            self.close_connection = True
+
+    def _end_headers(self, response: Response) -> None:
         for keyword, value in response.headers.items():
             self.send_header(keyword, value)
+        if self.close_connection:
+            self.send_header("Connection", "close")
+        elif self.request_version == "HTTP/1.0":
+            self.send_header("Connection", "keep-alive")
         self.end_headers()
 
-        self.wfile.write(response_body.encode())
+    def _log(self, level: int, message: str, args: tuple[Any, ...]) -> None:
+        if logger.isEnabledFor(level):
+            logger.log(level, "%s %s", self.address_string(), message % args)
 
-    def _parse_body(self) -> dict[str, Any]:
-        content_len = int(self.headers.get("Content-Length", "0"))
+    def _parse_body(self, content_len: int) -> dict[str, Any]:
         content = self.rfile.read(content_len)
-        content_text = content.decode()
-        body_type = self.headers.get("Content-Type")
-
-        if body_type and "application/x-www-form-urlencoded" in body_type:
-            body = dict(parse_qsl(content_text))
-
-        elif body_type and "application/json" in body_type:
-            body = json.loads(content_text)
-        else:
-            body = {}
-        return body
+        return parse_body(content, self.headers.get("Content-Type"))
 
     def _parse_params(self) -> dict[str, Any]:
-        parse_result = urlparse(self.path)
-        params = parse_qsl(parse_result.query)
-        return dict(params)
+        return parse_params(self.path)
 
     def _parse_path(self) -> Path:
-        hierarchical_path = urlparse(self.path).path
-        return hierarchical_path
+        return parse_path(self.path)
 
     def _parse_method(self) -> Method:
         return self.command
+
+
+def _not_found(_: Request) -> Response:
+    return error_response(HTTPStatus.NOT_FOUND)
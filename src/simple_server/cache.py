@@ -0,0 +1,168 @@
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from dataclasses import dataclass
+from functools import partial
+from hashlib import blake2b
+from http import HTTPStatus
+from typing import Any, Final, override
+
+from simple_server.middleware import Middleware
+from simple_server.protocol import encode_body
+from simple_server.types import Handler, Path, Request, Response, StreamingResponse
+
+type CacheKey = tuple[Path, tuple[tuple[str, Any], ...], tuple[str | None, ...]]
+
+# Headers a 304 repeats from the 200 response it stands for, RFC 9110 15.4.5
+NOT_MODIFIED_HEADERS: Final = ("Cache-Control", "Content-Location", "Expires", "Vary")
+
+
+@dataclass(frozen=True, slots=True)
+class _Entry:
+    version: Hashable
+    etag: str
+    body: bytes
+    headers: dict[str, str]
+
+    def response(self, if_none_match: str | None) -> Response:
+        if _etag_matches(if_none_match, self.etag):
+            headers = {
+                name: self.headers[name]
+                for name in NOT_MODIFIED_HEADERS
+                if name in self.headers
+            }
+            return Response(
+                HTTPStatus.NOT_MODIFIED,
+                headers={**headers, "ETag": self.etag},
+            )
+        return Response(
+            HTTPStatus.OK,
+            self.body,
+            {**self.headers, "ETag": self.etag},
+        )
+
+
+class ResponseCacheMiddleware(Middleware):
+    """Serve GET responses of route templates ``paths`` from cached bodies
+
+    Bodies are cached by path and query while ``version`` returns the token
+    they were produced at, so a write invalidates all of them by changing
+    the token. Cached responses carry a strong ETag, a request with it in
+    If-None-Match gets 304 Not Modified with the Vary and cache headers of
+    the response, neither calls the handler. Only 200
+    responses with a body are cached, at most ``max_entries`` least recently
+    used ones. A streaming response is cached when it has been written
+    whole and is at most ``max_body_size`` bytes, so the first one goes out
+    without ETag. Values of request headers ``vary`` are a part of the key,
+    like Accept-Encoding when compression is inside this middleware.
+    """
+
+    def __init__(
+        self,
+        version: Callable[[], Hashable],
+        paths: Iterable[Path],
+        *,
+        max_entries: int = 256,
+        max_body_size: int = 4 * 1024 * 1024,
+        vary: Iterable[str] = (),
+    ) -> None:
+        self._version = version
+        self._routes = frozenset(paths)
+        self._vary = tuple(name.lower() for name in vary)
+        self._max_entries = max_entries
+        self._max_body_size = max_body_size
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @override
+    def __call__(self, handler: Handler, request: Request) -> Response:
+        if request.method != "GET" or request.route not in self._routes:
+            return handler(request)
+
+        key = (
+            request.path,
+            tuple(sorted(request.query_params.items())),
+            tuple(request.headers.get(name) for name in self._vary),
+        )
+        # Read before the handler, a write during it leaves the entry stale
+        version = self._version()
+        if_none_match = request.headers.get("if-none-match")
+        entry = self._get(key, version)
+        if entry is not None:
+            return entry.response(if_none_match)
+
+        response = handler(request)
+        if response.status_code != HTTPStatus.OK:
+            return response
+        headers = dict(response.headers)
+        if isinstance(response, StreamingResponse):
+            response.transforms.append(
+                partial(
+                    _store_pieces,
+                    lambda body: self._store(key, version, body, headers),
+                    self._max_body_size,
+                )
+            )
+            return response
+        if response.body is None:
+            return response
+        _, body = encode_body(response)
+        return self._store(key, version, body, headers).response(if_none_match)
+
+    def _get(self, key: CacheKey, version: Hashable) -> _Entry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _store(
+        self,
+        key: CacheKey,
+        version: Hashable,
+        body: bytes,
+        headers: dict[str, str],
+    ) -> _Entry:
+        etag = f'"{blake2b(body, digest_size=16).hexdigest()}"'
+        entry = _Entry(version, etag, body, headers)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+def _store_pieces(
+    store: Callable[[bytes], object],
+    max_body_size: int,
+    pieces: Iterator[bytes],
+) -> Iterator[bytes]:
+    """Pass pieces through, then the body to ``store`` if it isn't too large"""
+    stored: list[bytes] | None = []
+    size = 0
+    for piece in pieces:
+        if stored is not None:
+            size += len(piece)
+            if size <= max_body_size:
+                stored.append(piece)
+            else:
+                stored = None
+        yield piece
+    if stored is not None:
+        store(b"".join(stored))
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match compares entity tags weakly, RFC 9110
+
+    >>> _etag_matches('W/"a1", "b2"', '"a1"')
+    True
+    >>> _etag_matches('"b2"', '"a1"')
+    False
+    """
+    if if_none_match is None:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
@@ -0,0 +1,132 @@
+import asyncio
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import partial
+from typing import cast
+
+from simple_server.middleware import AsyncMiddleware, Middleware
+from simple_server.types import (
+    AsyncHandler,
+    Endpoint,
+    Handler,
+    Request,
+    Response,
+    is_async_callable,
+)
+
+
+@dataclass(frozen=True)
+class Chain:
+    """Handler of a route wrapped by its middlewares
+
+    ``handler`` is None if the handler or any middleware is async, such a
+    chain can be served only by the asyncio engine. ``async_handler`` runs
+    sync parts of the chain in the default executor of the running loop.
+    """
+
+    handler: Handler | None
+    async_handler: AsyncHandler
+
+
+def compose(
+    endpoint: Endpoint,
+    middlewares: Sequence[Middleware | AsyncMiddleware],
+) -> Chain:
+    """Wrap the endpoint by middlewares, the first middleware is the outermost
+
+    >>> def handler(request):
+    ...     return Response(200, {"path": request.path_params["path"]})
+    >>> def trace(handler, request):
+    ...     response = handler(request)
+    ...     response.headers["X-Trace"] = "1"
+    ...     return response
+    >>> chain = compose(handler, [trace])
+    >>> chain.handler(Request({}, {}, {"path": "/"}, {}))
+    Response(status_code=200, body={'path': '/'}, headers={'X-Trace': '1'})
+
+    Sync middlewares of an async chain run in one executor call with the
+    sync handler they wrap. Raise TypeError if a sync middleware wraps an
+    async one with sync code inside, see _run_sync_middlewares.
+
+    Without middlewares the chain calls the handler itself:
+
+    >>> compose(handler, []).handler is handler
+    True
+    """
+    handler: Handler | None = None
+    remaining = list(middlewares)
+    if is_async_callable(endpoint):
+        chain = cast(AsyncHandler, endpoint)
+    else:
+        # Sync middlewares around a sync endpoint run with it in one call
+        handler = cast(Handler, endpoint)
+        while remaining and not is_async_callable(remaining[-1]):
+            handler = partial(cast(Middleware, remaining.pop()), handler)
+        if not remaining:
+            return Chain(handler, _run_in_executor(handler))
+        chain = _run_in_executor(handler)
+    # The chain has sync parts, which need a thread of the executor
+    uses_executor = handler is not None
+
+    sync_middlewares: list[Middleware] = []
+    for middleware in reversed(remaining):
+        if not is_async_callable(middleware):
+            sync_middlewares.insert(0, cast(Middleware, middleware))
+            continue
+        if sync_middlewares:
+            chain = _run_sync_middlewares(
+                sync_middlewares, chain, next_uses_executor=uses_executor
+            )
+            sync_middlewares = []
+            uses_executor = True
+        chain = partial(cast(AsyncMiddleware, middleware), chain)
+
+    if sync_middlewares:
+        chain = _run_sync_middlewares(
+            sync_middlewares, chain, next_uses_executor=uses_executor
+        )
+    return Chain(None, chain)
+
+
+def _run_in_executor(handler: Handler) -> AsyncHandler:
+    async def call(request: Request) -> Response:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, handler, request)
+
+    return call
+
+
+def _run_sync_middlewares(
+    middlewares: list[Middleware],
+    next_handler: AsyncHandler,
+    *,
+    next_uses_executor: bool,
+) -> AsyncHandler:
+    """Adapt consecutive sync middlewares to the async chain
+
+    The middlewares run together by one executor call and call the rest of
+    the chain back on the event loop. Their thread waits for the rest, so
+    it must not need a thread of the executor too: with all of them busy
+    waiting, it would never get one.
+    """
+    if next_uses_executor:
+        raise TypeError(
+            f"Sync middleware {middlewares[-1]!r} wraps an async middleware"
+            " whose chain runs sync code in the executor, it would wait for"
+            " an executor thread while holding one. Add sync middlewares"
+            " after async ones or make it async."
+        )
+
+    async def call(request: Request) -> Response:
+        loop = asyncio.get_running_loop()
+
+        def call_next(request: Request) -> Response:
+            future = asyncio.run_coroutine_threadsafe(next_handler(request), loop)
+            return future.result()
+
+        sync_chain: Handler = call_next
+        for middleware in reversed(middlewares):
+            sync_chain = partial(middleware, sync_chain)
+        return await loop.run_in_executor(None, sync_chain, request)
+
+    return call
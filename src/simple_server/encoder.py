@@ -1,8 +1,12 @@
 import json
+from collections.abc import Callable, Iterable, Iterator
 from decimal import Decimal
 from typing import Any, override
 from uuid import UUID
 
+# Rows of a streaming response are gathered into pieces of about this size
+STREAM_PIECE_SIZE = 16 * 1024
+
 
 class SimpleEncoder(json.JSONEncoder):
     @override
@@ -14,3 +18,42 @@ class SimpleEncoder(json.JSONEncoder):
             return str(o)
 
         return super().default(o)
+
+
+def encode_rows(
+    rows: Iterable[Any],
+    piece_size: int = STREAM_PIECE_SIZE,
+    encode_row: Callable[[Any], bytes] | None = None,
+) -> Iterator[bytes]:
+    """Serialize rows to a JSON array in pieces of about ``piece_size`` bytes
+
+    Rows are encoded by ``encode_row``, by default the array is the same
+    as json.dumps of the list of rows.
+
+    >>> list(encode_rows([{"code": "USD"}, {"code": "EUR"}], piece_size=16))
+    [b'[{"code": "USD"}', b', {"code": "EUR"}', b']']
+    >>> list(encode_rows([]))
+    [b'[]']
+    """
+    encode = encode_row or _encode_row
+    parts = [b"["]
+    size = 1
+    separator = b""
+    for row in rows:
+        part = separator + encode(row)
+        separator = b", "
+        parts.append(part)
+        size += len(part)
+        if size >= piece_size:
+            yield b"".join(parts)
+            parts = []
+            size = 0
+    parts.append(b"]")
+    yield b"".join(parts)
+
+
+_encoder = SimpleEncoder()
+
+
+def _encode_row(row: Any) -> bytes:
+    return _encoder.encode(row).encode()
@@ -2,3 +2,6 @@ class RequestNotHandledError(Exception): ...
 
 
 class PathNotMatchError(Exception): ...
+
+
+class RouteConflictError(Exception): ...
@@ -1,12 +1,18 @@
 from typing import Protocol, override
 
-from simple_server.types import Handler, Request, Response
+from simple_server.types import AsyncHandler, Handler, Request, Response
 
 
 class Middleware(Protocol):
     def __call__(self, handler: Handler, request: Request) -> Response: ...
 
 
+class AsyncMiddleware(Protocol):
+    """Middleware for the asyncio engine, awaits the next handler in the chain"""
+
+    async def __call__(self, handler: AsyncHandler, request: Request) -> Response: ...
+
+
 class CORSMiddleware(Middleware):
     def __init__(
         self,
@@ -0,0 +1,81 @@
+import json
+from http import HTTPStatus
+from typing import Any
+from urllib.parse import parse_qsl, urlparse
+
+from simple_server.encoder import SimpleEncoder
+from simple_server.types import Path, Response
+
+# Responses with these statuses never have a body nor Content-Length
+BODYLESS_STATUSES = frozenset({HTTPStatus.NO_CONTENT, HTTPStatus.NOT_MODIFIED})
+
+LAST_CHUNK = b"0\r\n\r\n"
+
+
+def parse_body(content: bytes, content_type: str | None) -> dict[str, Any]:
+    """Parse the request body according to its content type
+
+    >>> parse_body(b"code=EUR&sign=%E2%82%AC", "application/x-www-form-urlencoded")
+    {'code': 'EUR', 'sign': '€'}
+
+    >>> parse_body(b'{"rate": 1.5}', "application/json; charset=utf-8")
+    {'rate': 1.5}
+
+    >>> parse_body(b"<xml/>", "text/xml")
+    {}
+    """
+    content_text = content.decode()
+
+    if content_type and "application/x-www-form-urlencoded" in content_type:
+        body = dict(parse_qsl(content_text))
+
+    elif content_type and "application/json" in content_type:
+        body = json.loads(content_text)
+    else:
+        body = {}
+    return body
+
+
+def parse_params(target: str) -> dict[str, Any]:
+    """Parse query parameters of the request target
+
+    >>> parse_params("/exchange?from=USD&to=EUR&amount=10")
+    {'from': 'USD', 'to': 'EUR', 'amount': '10'}
+    """
+    parse_result = urlparse(target)
+    params = parse_qsl(parse_result.query)
+    return dict(params)
+
+
+def parse_path(target: str) -> Path:
+    """Return the hierarchical path of the request target
+
+    >>> parse_path("/exchangeRate/USDEUR?fields=rate")
+    '/exchangeRate/USDEUR'
+    """
+    hierarchical_path = urlparse(target).path
+    return hierarchical_path
+
+
+def encode_body(response: Response) -> tuple[str, bytes]:
+    """Serialize the response body, return its content type and bytes"""
+    if response.body is None:
+        return "text/plain", b""
+    if isinstance(response.body, bytes):
+        return "application/json", response.body
+
+    response_body = json.dumps(response.body, cls=SimpleEncoder)
+    return "application/json", response_body.encode()
+
+
+def encode_chunk(piece: bytes) -> bytes:
+    """Frame a piece of the body as a chunk of chunked transfer encoding
+
+    >>> encode_chunk(b'[{"code": "USD"}]')
+    b'11\\r\\n[{"code": "USD"}]\\r\\n'
+    """
+    return b"%x\r\n%s\r\n" % (len(piece), piece)
+
+
+def error_response(status: HTTPStatus, message: str | None = None) -> Response:
+    return Response(int(status), {"message": message or status.phrase})
@@ -1,41 +1,50 @@
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 
-from simple_server.exceptions import PathNotMatchError, RequestNotHandledError
-from simple_server.match_path import match_path
-from simple_server.types import Handler, HandlerRow, Method, Path, Request, Response
+from simple_server.middleware import AsyncMiddleware, Middleware
+from simple_server.routing import Route
+from simple_server.types import (
+    Endpoint,
+    Method,
+    Path,
+    Request,
+    Response,
+)
 
 
 class Router:
     def __init__(self, name: str) -> None:
         self.name = name
-        self._handler_registry: list[HandlerRow] = []
+        self._handler_registry: list[Route] = []
+        self._middlewares: list[Middleware | AsyncMiddleware] = []
 
     def route(
         self,
         method: Method,
         path: Path,
-    ) -> Callable[[Handler], None]:
-        def reigister_handler(func: Handler) -> None:
-            self._handler_registry.append((method, path, func))
-            self._handler_registry.append(("OPTIONS", path, options_handler))
+        *,
+        middlewares: Sequence[Middleware | AsyncMiddleware] = (),
+    ) -> Callable[[Endpoint], None]:
+        """Register the handler, ``middlewares`` wrap only this route"""
+        route_middlewares = tuple(middlewares)
+
+        def reigister_handler(func: Endpoint) -> None:
+            self._handler_registry.append(Route(method, path, func, route_middlewares))
+            self._handler_registry.append(
+                Route("OPTIONS", path, options_handler, route_middlewares)
+            )
 
         return reigister_handler
 
-    def handle(self, request: Request, method: Method, path: Path) -> Response:
-        for registry_method, registry_path, registry_handler in self._handler_registry:
-            if registry_method != method:
-                continue
+    def add_middleware(self, middleware: Middleware | AsyncMiddleware) -> None:
+        """Add middleware wrapping all routes of the router"""
+        self._middlewares.append(middleware)
 
-            try:
-                path_params = match_path(path, registry_path)
-            except PathNotMatchError:
-                continue
-            else:
-                request.path_params.update(path_params)
-
-            return registry_handler(request)
-
-        raise RequestNotHandledError
+    @property
+    def routes(self) -> list[Route]:
+        return [
+            route.with_middlewares(self._middlewares)
+            for route in self._handler_registry
+        ]
 
 
 def options_handler(_: Request) -> Response:
@@ -0,0 +1,180 @@
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+
+from simple_server.chain import Chain, compose
+from simple_server.exceptions import RouteConflictError
+from simple_server.middleware import AsyncMiddleware, Middleware
+from simple_server.types import Endpoint, Method, Path
+
+
+@dataclass(frozen=True)
+class Route:
+    method: Method
+    template: Path
+    handler: Endpoint
+    middlewares: tuple[Middleware | AsyncMiddleware, ...] = ()
+    param_names: tuple[str, ...] = field(init=False)
+
+    def __post_init__(self) -> None:
+        names = tuple(
+            segment[1:-1]
+            for segment in split_path(self.template)
+            if is_param_segment(segment)
+        )
+        object.__setattr__(self, "param_names", names)
+
+    @cached_property
+    def chain(self) -> Chain:
+        """Handler wrapped by the route middlewares, composed on first use"""
+        return compose(self.handler, self.middlewares)
+
+    def compile(self) -> Chain:
+        """Compose the chain now, so errors of composing are raised on start"""
+        return self.chain
+
+    def with_middlewares(
+        self,
+        middlewares: Sequence[Middleware | AsyncMiddleware],
+    ) -> "Route":
+        """Return the route wrapped by outer middlewares"""
+        if not middlewares:
+            return self
+        return replace(self, middlewares=(*middlewares, *self.middlewares))
+
+
+@dataclass
+class _Node:
+    static: dict[str, "_Node"] = field(default_factory=dict)
+    param: "_Node | None" = None
+    routes: dict[Method, Route] = field(default_factory=dict)
+
+
+class RouteTable:
+    """Dispatch structure compiled from routes
+
+    Static paths are found by one dict lookup, templated paths by walking a
+    trie of path segments, so a lookup costs O(path depth) whatever the
+    number of routes. Static segments take precedence over parameters.
+
+    >>> def handler(request): ...
+    >>> table = RouteTable(
+    ...     [
+    ...         Route("GET", "/currencies", handler),
+    ...         Route("GET", "/currency/{code}", handler),
+    ...     ]
+    ... )
+    >>> route, params = table.lookup("GET", "/currency/EUR")
+    >>> route.template, params
+    ('/currency/{code}', {'code': 'EUR'})
+    >>> table.lookup("POST", "/currencies") is None
+    True
+
+    Registering another handler or middlewares for the same method and path
+    is a conflict:
+
+    >>> RouteTable(
+    ...     [
+    ...         Route("GET", "/currency/{code}", handler),
+    ...         Route("GET", "/currency/{name}", lambda request: None),
+    ...     ]
+    ... )
+    Traceback (most recent call last):
+        ...
+    RouteConflictError: GET /currency/{name} conflicts with GET /currency/{code}
+    """
+
+    def __init__(self, routes: Iterable[Route]) -> None:
+        self._static: dict[tuple[Method, Path], Route] = {}
+        self._root = _Node()
+        for route in routes:
+            self._add(route)
+
+    def lookup(self, method: Method, path: Path) -> tuple[Route, dict[str, str]] | None:
+        route = self._static.get((method, path))
+        if route is not None:
+            return route, {}
+
+        values: list[str] = []
+        route = _find(self._root, split_path(path), 0, method, values)
+        if route is None and len(path) > 1 and path.endswith("/"):
+            values.clear()
+            route = _find(self._root, split_path(path.rstrip("/")), 0, method, values)
+        if route is None:
+            return None
+        return route, dict(zip(route.param_names, values, strict=True))
+
+    def _add(self, route: Route) -> None:
+        segments = split_path(route.template)
+        if not route.param_names:
+            self._check_conflict(
+                self._static.get((route.method, route.template)), route
+            )
+            self._static[(route.method, route.template)] = route
+            return
+
+        node = self._root
+        for segment in segments:
+            if is_param_segment(segment):
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                if "{" in segment or "}" in segment:
+                    raise ValueError(
+                        "Path parameter must be a whole segment,"
+                        f" got <{route.template}>"
+                    )
+                node = node.static.setdefault(segment, _Node())
+
+        self._check_conflict(node.routes.get(route.method), route)
+        node.routes[route.method] = route
+
+    def _check_conflict(self, registered: Route | None, route: Route) -> None:
+        # The same route registered again, like a router included twice
+        if registered is None or registered == route:
+            return
+        raise RouteConflictError(
+            f"{route.method} {route.template} conflicts with"
+            f" {registered.method} {registered.template}"
+        )
+
+
+def _find(
+    node: _Node,
+    segments: list[str],
+    index: int,
+    method: Method,
+    values: list[str],
+) -> Route | None:
+    if index == len(segments):
+        return node.routes.get(method)
+
+    segment = segments[index]
+    static_child = node.static.get(segment)
+    if static_child is not None:
+        route = _find(static_child, segments, index + 1, method, values)
+        if route is not None:
+            return route
+
+    if node.param is not None:
+        values.append(segment)
+        route = _find(node.param, segments, index + 1, method, values)
+        if route is not None:
+            return route
+        values.pop()
+    return None
+
+
+def split_path(path: Path) -> list[str]:
+    """
+    >>> split_path("/exchangeRate/USDEUR")
+    ['exchangeRate', 'USDEUR']
+    >>> split_path("/currency/")
+    ['currency', '']
+    """
+    return path.split("/")[1:]
+
+
+def is_param_segment(segment: str) -> bool:
+    return segment.startswith("{") and segment.endswith("}")
@@ -0,0 +1,233 @@
+import os
+import signal
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from logging import getLogger
+from logging import shutdown as shutdown_logging
+from socket import socket
+from typing import Any, Literal, override
+
+logger = getLogger(__name__)
+
+type Engine = Literal["threaded", "asyncio"]
+type ServeMode = Literal["single", "threads", "processes"]
+type HandlerFactory = Callable[[Any, Any, HTTPServer], BaseHTTPRequestHandler]
+
+STOP_SIGNALS = frozenset({signal.SIGINT, signal.SIGTERM})
+
+
+@dataclass(frozen=True)
+class ServeOptions:
+    """How SimpleApp.run serves requests
+
+    The threaded engine handles each connection in a thread:
+
+    - single: one thread handles requests one by one
+    - threads: requests are handled by a pool of ``threads`` threads
+    - processes: ``workers`` forked processes share the listening socket,
+      each one handles requests with a pool of ``threads`` threads
+
+    The asyncio engine serves all connections from one event loop and runs
+    sync handlers in a pool of ``threads`` threads. With the processes mode
+    ``workers`` forked processes run an event loop each.
+
+    Both engines keep HTTP/1.1 connections alive for ``keep_alive_timeout``
+    seconds between requests and close them after
+    ``max_keep_alive_requests`` responses. A request whose body is longer
+    than ``max_body_size`` bytes gets 413, one with a negative
+    Content-Length gets 400.
+    """
+
+    engine: Engine = "threaded"
+    mode: ServeMode = "single"
+    workers: int = 1
+    threads: int = 1
+    keep_alive_timeout: float = 5.0
+    max_keep_alive_requests: int = 1000
+    max_body_size: int = 1024 * 1024
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """HTTPServer that handles requests on a bounded pool of worker threads
+
+    At most ``max_workers`` requests are processed at once and at most
+    ``max_pending`` accepted connections wait for a free worker; after that
+    the accept loop blocks and new clients queue in the listen backlog.
+    """
+
+    def __init__(
+        self,
+        server_address: tuple[str, int],
+        handler_factory: HandlerFactory,
+        *,
+        max_workers: int,
+        max_pending: int | None = None,
+    ) -> None:
+        # server_close() is called by the base class if binding fails
+        self._executor: ThreadPoolExecutor | None = None
+        super().__init__(server_address, handler_factory)
+        self._max_workers = max_workers
+        pending = max_workers if max_pending is None else max_pending
+        self._slots = threading.BoundedSemaphore(max_workers + pending)
+
+    @override
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        # The pool is created lazily so that the server can be forked first.
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._max_workers,
+            thread_name_prefix="simple_server",
+        )
+        super().serve_forever(poll_interval)
+
+    @override
+    def process_request(self, request: Any, client_address: Any) -> None:
+        if self._executor is None:
+            raise RuntimeError("Server is not serving")
+
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._process_request, request, client_address)
+        except RuntimeError:
+            self._slots.release()
+            self.shutdown_request(request)
+            raise
+
+    def _process_request(self, request: Any, client_address: Any) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # noqa: BLE001
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    @override
+    def server_close(self) -> None:
+        super().server_close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def create_server(
+    host: str,
+    port: int,
+    handler_factory: HandlerFactory,
+    threads: int,
+) -> HTTPServer:
+    if threads > 1:
+        return ThreadPoolHTTPServer((host, port), handler_factory, max_workers=threads)
+    return HTTPServer((host, port), handler_factory)
+
+
+def serve_until_stopped(server: HTTPServer) -> None:
+    """Serve in a background thread until SIGINT or SIGTERM is received
+
+    The main thread only waits for a stop signal, so shutdown() is never
+    called from the thread running serve_forever().
+    """
+    signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+    serve_thread = threading.Thread(
+        target=server.serve_forever,
+        name="simple_server_serve",
+    )
+    serve_thread.start()
+    try:
+        received = signal.sigwait(STOP_SIGNALS)
+        logger.info("Received %s, stopping server", signal.Signals(received).name)
+    finally:
+        server.shutdown()
+        serve_thread.join()
+        server.server_close()
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+
+
+def serve_prefork(
+    run_worker: Callable[[], None],
+    listening_socket: socket,
+    workers: int,
+) -> None:
+    """Fork ``workers`` processes that accept on the shared listening socket
+
+    Each worker calls ``run_worker`` which must serve until SIGTERM.
+
+    The parent process only supervises: it restarts workers that exit
+    unexpectedly and forwards SIGINT/SIGTERM to all of them on shutdown.
+    """
+    signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+    children: set[int] = set()
+    children_lock = threading.Lock()
+    stopping = threading.Event()
+
+    def spawn() -> None:
+        with children_lock:
+            if stopping.is_set():
+                return
+            pid = os.fork()
+            if pid == 0:
+                _run_worker(run_worker)
+            children.add(pid)
+
+    def reap() -> None:
+        while True:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                return
+            with children_lock:
+                children.discard(pid)
+            if stopping.is_set():
+                continue
+            logger.warning(
+                "Worker %s exited with code %s, restarting",
+                pid,
+                os.waitstatus_to_exitcode(status),
+            )
+            spawn()
+
+    for _ in range(workers):
+        spawn()
+
+    reaper = threading.Thread(target=reap, name="simple_server_reaper", daemon=True)
+    reaper.start()
+    try:
+        received = signal.sigwait(STOP_SIGNALS)
+        logger.info("Received %s, stopping workers", signal.Signals(received).name)
+    finally:
+        with children_lock:
+            stopping.set()
+            alive = list(children)
+        for pid in alive:
+            _kill(pid)
+        reaper.join()
+        _close_listening_socket(listening_socket)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+
+
+def _run_worker(run_worker: Callable[[], None]) -> None:
+    exit_code = 0
+    try:
+        run_worker()
+    except BaseException:
+        logger.exception("Worker %s crashed", os.getpid())
+        exit_code = 1
+    finally:
+        # os._exit skips atexit, handlers may keep records not written yet
+        shutdown_logging()
+        os._exit(exit_code)
+
+
+def _kill(pid: int) -> None:
+    with suppress(ProcessLookupError):
+        os.kill(pid, signal.SIGTERM)
+
+
+def _close_listening_socket(sock: socket) -> None:
+    try:
+        sock.close()
+    except OSError:
+        logger.exception("Error while closing listening socket")
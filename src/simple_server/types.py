@@ -1,8 +1,14 @@
-from collections.abc import Callable
+import inspect
+from collections.abc import Awaitable, Callable, Iterable, Iterator
 from dataclasses import dataclass, field
 from typing import Any
 
-type ResponseBody = dict[str, Any] | list[dict[str, Any]]
+from simple_server.encoder import encode_rows
+
+# bytes are a body already encoded to JSON
+type ResponseBody = dict[str, Any] | list[dict[str, Any]] | bytes
+type Path = str
+type Method = str
 
 
 @dataclass
@@ -11,6 +17,12 @@ class Request:
     query_params: dict[str, Any]
     path_params: dict[str, Any]
     context: dict[str, Any]
+    method: Method = "GET"
+    path: Path = "/"
+    # Names are lower case
+    headers: dict[str, str] = field(default_factory=dict, repr=False)
+    # Template of the route that handles the request, set by the app
+    route: Path | None = None
 
 
 @dataclass
@@ -20,7 +32,61 @@ class Response:
     headers: dict[str, str] = field(default_factory=dict)
 
 
-type Path = str
-type Method = str
+@dataclass
+class StreamingResponse(Response):
+    """Response with a JSON array of ``rows`` written as they are produced
+
+    The body goes out in chunks of transfer encoding, so the array is never
+    kept whole. The server calls close() after writing, even if the client
+    has gone, which closes ``rows`` and then calls ``on_close`` callbacks,
+    so resources the rows are read from live until then. Middlewares
+    change the encoded body by adding ``transforms`` of its pieces, applied
+    in the order they are added, each must not yield empty pieces. Rows
+    are encoded by ``encode_row`` if it is given, by SimpleEncoder if not.
+    """
+
+    rows: Iterable[Any] = ()
+    on_close: list[Callable[[], None]] = field(default_factory=list)
+    transforms: list[Callable[[Iterator[bytes]], Iterator[bytes]]] = field(
+        default_factory=list
+    )
+    encode_row: Callable[[Any], bytes] | None = None
+
+    def pieces(self) -> Iterator[bytes]:
+        """Encoded body, the server writes pieces as they are produced"""
+        pieces = encode_rows(self.rows, encode_row=self.encode_row)
+        for transform in self.transforms:
+            pieces = transform(pieces)
+        return pieces
+
+    def close(self) -> None:
+        try:
+            close_rows = getattr(self.rows, "close", None)
+            if close_rows is not None:
+                close_rows()
+        finally:
+            callbacks, self.on_close = self.on_close, []
+            for callback in reversed(callbacks):
+                callback()
+
+
 type Handler = Callable[[Request], Response]
-type HandlerRow = tuple[Method, Path, Handler]
+type AsyncHandler = Callable[[Request], Awaitable[Response]]
+type Endpoint = Handler | AsyncHandler
+
+
+def is_async_callable(obj: object) -> bool:
+    """Check that calling obj returns a coroutine
+
+    Works for coroutine functions and for objects with an async __call__.
+
+    >>> async def handler(request: Request) -> Response: ...
+    >>> is_async_callable(handler)
+    True
+    >>> is_async_callable(lambda request: Response())
+    False
+    """
+    if inspect.iscoroutinefunction(obj):
+        return True
+    call = getattr(obj, "__call__", None)  # noqa: B004
+    return inspect.iscoroutinefunction(call)
@@ -5,9 +5,7 @@ from sqlite3 import Connection, connect
 import pytest
 
 from currency_exchange.infrastructure.database.converters import register_decimal
-from currency_exchange.infrastructure.database.migrations import (
-    create_tables_currency_exchange,
-)
+from currency_exchange.infrastructure.database.migrations.runner import migrate
 
 
 @pytest.fixture
@@ -15,7 +13,7 @@ def connection_in_memory_db() -> Iterator[Connection]:
     register_decimal()
     connection = connect(":memory:", detect_types=sqlite3.PARSE_DECLTYPES)
 
-    create_tables_currency_exchange.upgrade(connection)
+    migrate(connection)
     try:
         yield connection
     finally:
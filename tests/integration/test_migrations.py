@@ -0,0 +1,206 @@
+import time
+from decimal import Decimal
+from pathlib import Path
+from sqlite3 import PARSE_DECLTYPES, Connection, OperationalError, connect
+from threading import Thread
+from uuid import uuid4
+
+import pytest
+
+from currency_exchange.domain.models import Currency, ExchangeRate
+from currency_exchange.domain.value_objects import (
+    CurrencyCode,
+    CurrencyName,
+    CurrencySign,
+    Rate,
+)
+from currency_exchange.infrastructure.database.converters import register_decimal
+from currency_exchange.infrastructure.database.exceptions import MigrationError
+from currency_exchange.infrastructure.database.migrations import fixed_point_rates
+from currency_exchange.infrastructure.database.migrations.runner import (
+    MIGRATIONS,
+    Migration,
+    current_version,
+    index_migration,
+    migrate,
+    migration_status,
+)
+from currency_exchange.infrastructure.database.migrations.transactions import (
+    transaction,
+)
+from currency_exchange.infrastructure.database.profile import SQLiteProfile
+from currency_exchange.infrastructure.database.repo import (
+    SQLiteCurrencyRepository,
+    SQLiteExchangeRateRepository,
+)
+
+
+def _objects(connection: Connection) -> set[str]:
+    return {
+        name
+        for (name,) in connection.execute(
+            "SELECT name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%';"
+        )
+    }
+
+
+def test_migrate_up_and_down() -> None:
+    connection = connect(":memory:")
+
+    migrate(connection, 1)
+    first_objects = _objects(connection)
+    migrate(connection, 2)
+    second_objects = _objects(connection)
+    migrate(connection)
+    latest_status = migration_status(connection)
+    migrate(connection, 2)
+    rolled_back_objects = _objects(connection)
+    migrate(connection, 0)
+
+    assert first_objects - second_objects == {"exchange_rates_base_currency"}
+    assert rolled_back_objects == second_objects
+    assert all(applied for _, applied in latest_status)
+    assert _objects(connection) == {"schema_version"}
+    assert current_version(connection) == 0
+
+
+def test_failed_migration_is_rolled_back() -> None:
+    def fail(connection: Connection) -> None:
+        connection.execute("CREATE TABLE half_done (id INTEGER);")
+        connection.execute("INSERT INTO missing_table VALUES (1);")
+
+    connection = connect(":memory:")
+    broken = Migration(len(MIGRATIONS) + 1, "broken", fail, fail)
+
+    with pytest.raises(OperationalError):
+        migrate(connection, migrations=(*MIGRATIONS, broken))
+
+    assert current_version(connection) == len(MIGRATIONS)
+    assert "half_done" not in _objects(connection)
+
+
+def test_unknown_target_version() -> None:
+    connection = connect(":memory:")
+
+    with pytest.raises(MigrationError):
+        migrate(connection, len(MIGRATIONS) + 1)
+
+
+def test_online_index_build_does_not_block_readers(tmp_path: Path) -> None:
+    database = str(tmp_path / "currency_exchange.db")
+    writer = connect(database)
+    reader = connect(database)
+    SQLiteProfile().apply(writer)
+    SQLiteProfile().apply(reader)
+    migrate(writer)
+    writer.execute(
+        "INSERT INTO currencies (id, code, sign, name) VALUES (x'01', 'USD', '$', '');"
+    )
+    writer.commit()
+    index = index_migration(
+        len(MIGRATIONS) + 1,
+        "index currency names",
+        "currencies_name",
+        "ON currencies(name)",
+    )
+
+    # An open read transaction, as of a server in the middle of a request
+    reader.execute("BEGIN;")
+    reader.execute("SELECT code FROM currencies;").fetchall()
+    migrate(writer, migrations=(*MIGRATIONS, index))
+    codes = reader.execute("SELECT code FROM currencies;").fetchall()
+    reader.execute("COMMIT;")
+
+    assert codes == [("USD",)]
+    assert "currencies_name" in _objects(reader)
+    assert current_version(reader) == len(MIGRATIONS) + 1
+
+
+def test_online_index_build_requires_wal(tmp_path: Path) -> None:
+    connection = connect(str(tmp_path / "currency_exchange.db"))
+    SQLiteProfile(journal_mode="DELETE").apply(connection)
+    migrations = (
+        MIGRATIONS[0],
+        index_migration(
+            2, "index currency names", "currencies_name", "ON currencies(name)"
+        ),
+    )
+
+    with pytest.raises(MigrationError, match="WAL"):
+        migrate(connection, migrations=migrations)
+    version = current_version(connection)
+    migrate(connection, migrations=migrations, offline=True)
+
+    assert version == 1
+    assert current_version(connection) == 2  # noqa: PLR2004
+
+
+def test_integer_currency_keys_keep_data() -> None:
+    register_decimal()
+    connection = connect(":memory:", detect_types=PARSE_DECLTYPES)
+    migrate(connection, 2)
+    dollar_id, euro_id, rate_id = uuid4(), uuid4(), uuid4()
+    connection.executemany(
+        "INSERT INTO currencies (id, code, sign, name) VALUES (?, ?, ?, ?);",
+        [(dollar_id.bytes, "USD", "$", "US Dollar"), (euro_id.bytes, "EUR", "E", "")],
+    )
+    connection.execute(
+        """
+        INSERT INTO exchange_rates (id, base_currency, target_currency, rate)
+        VALUES (?, ?, ?, '0.92');
+        """,
+        (rate_id.bytes, dollar_id.bytes, euro_id.bytes),
+    )
+    connection.commit()
+
+    migrate(connection)
+    statements: list[str] = []
+    connection.set_trace_callback(statements.append)
+    exchange_rate = SQLiteExchangeRateRepository(connection).get_by_currency_codes(
+        "USD", "EUR"
+    )
+    connection.set_trace_callback(None)
+    (query,) = statements
+    plan = connection.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+
+    assert exchange_rate.id == rate_id
+    assert exchange_rate.base_currency.id == dollar_id
+    assert exchange_rate.rate == Rate(Decimal("0.92"))
+    assert [detail.split(" USING ")[1] for *_, detail in plan] == [
+        "COVERING INDEX currencies_code_covering (code=?)",
+        "COVERING INDEX currencies_code_covering (code=?)",
+        "PRIMARY KEY (base_currency=? AND target_currency=?)",
+    ]
+
+
+def test_rate_written_during_fixed_point_migration(tmp_path: Path) -> None:
+    register_decimal()
+    database = str(tmp_path / "currency_exchange.db")
+    migrator = connect(database)
+    server = connect(database, detect_types=PARSE_DECLTYPES, check_same_thread=False)
+    SQLiteProfile().apply(migrator)
+    SQLiteProfile().apply(server)
+    migrate(migrator, 5)
+    dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign(""))
+    euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign(""))
+    SQLiteCurrencyRepository(server).add(dollar)
+    SQLiteCurrencyRepository(server).add(euro)
+    exchange_rate_repo = SQLiteExchangeRateRepository(server)
+
+    # The server writes while the column is converted, it waits for the lock
+    with transaction(migrator):
+        fixed_point_rates.upgrade(migrator)
+        writer = Thread(
+            target=exchange_rate_repo.add,
+            args=(ExchangeRate(dollar, euro, Rate(Decimal("0.92"))),),
+        )
+        writer.start()
+        time.sleep(0.1)
+    writer.join()
+
+    assert migrator.execute("SELECT rate FROM exchange_rates;").fetchall() == [
+        (920000,)
+    ]
+    assert exchange_rate_repo.get_by_currency_codes("USD", "EUR").rate == Rate(
+        Decimal("0.92")
+    )
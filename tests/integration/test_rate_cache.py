@@ -0,0 +1,108 @@
+from decimal import Decimal
+from sqlite3 import Connection
+
+import pytest
+
+from currency_exchange.application.exceptions import ExchangeRateNotFoundError
+from currency_exchange.domain.models import Currency, ExchangeRate
+from currency_exchange.domain.value_objects import (
+    CurrencyCode,
+    CurrencyName,
+    CurrencySign,
+    Rate,
+)
+from currency_exchange.infrastructure.cache import (
+    CachingExchangeRateRepository,
+    ExchangeRateCache,
+)
+from currency_exchange.infrastructure.database.repo import (
+    SQLiteCurrencyRepository,
+    SQLiteExchangeRateRepository,
+)
+
+
+@pytest.fixture
+def currencies(connection_in_memory_db: Connection) -> tuple[Currency, Currency]:
+    dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign(""))
+    euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign(""))
+    currency_repo = SQLiteCurrencyRepository(connection_in_memory_db)
+    currency_repo.add(dollar)
+    currency_repo.add(euro)
+    return dollar, euro
+
+
+def test_reads_are_served_from_cache(
+    connection_in_memory_db: Connection,
+    currencies: tuple[Currency, Currency],
+) -> None:
+    dollar, euro = currencies
+    cache = ExchangeRateCache(check_interval=0)
+    repo = CachingExchangeRateRepository(
+        SQLiteExchangeRateRepository(connection_in_memory_db), cache
+    )
+    dollar_euro_rate = ExchangeRate(dollar, euro, rate=Rate(Decimal("1.5")))
+
+    repo.add(dollar_euro_rate)
+    first = repo.get_by_currency_codes("USD", "EUR")
+    second = repo.get_by_currency_codes("USD", "EUR")
+    with pytest.raises(ExchangeRateNotFoundError):
+        repo.get_by_currency_codes("EUR", "USD")
+
+    stats = cache.stats()
+    assert first == dollar_euro_rate
+    assert second.rate == dollar_euro_rate.rate
+    assert first is not second
+    assert (stats.size, stats.hits, stats.misses, stats.reloads) == (1, 2, 1, 1)
+
+
+def test_write_through_and_changes_of_other_writers(
+    connection_in_memory_db: Connection,
+    currencies: tuple[Currency, Currency],
+) -> None:
+    dollar, euro = currencies
+    cache = ExchangeRateCache(check_interval=0)
+    sqlite_repo = SQLiteExchangeRateRepository(connection_in_memory_db)
+    repo = CachingExchangeRateRepository(sqlite_repo, cache)
+    dollar_euro_rate = ExchangeRate(dollar, euro, rate=Rate(Decimal("1.5")))
+    repo.add(dollar_euro_rate)
+    assert repo.get_all() == [dollar_euro_rate]
+
+    dollar_euro_rate.rate = Rate(Decimal("2"))
+    repo.add(dollar_euro_rate)
+    written_through = repo.get_by_currency_codes("USD", "EUR").rate
+    reloads_after_write = cache.stats().reloads
+
+    dollar_euro_rate.rate = Rate(Decimal("3"))
+    sqlite_repo.add(dollar_euro_rate)
+    changed_by_other = repo.get_by_currency_codes("USD", "EUR").rate
+
+    assert written_through == Rate(Decimal("2"))
+    assert reloads_after_write == 1
+    assert changed_by_other == Rate(Decimal("3"))
+    assert cache.stats().invalidations == 1
+
+
+def test_cross_rates_follow_writes(
+    connection_in_memory_db: Connection,
+    currencies: tuple[Currency, Currency],
+) -> None:
+    dollar, euro = currencies
+    cache = ExchangeRateCache(check_interval=0)
+    repo = CachingExchangeRateRepository(
+        SQLiteExchangeRateRepository(connection_in_memory_db), cache
+    )
+    dollar_euro_rate = ExchangeRate(dollar, euro, rate=Rate(Decimal("1.5")))
+    repo.add(dollar_euro_rate)
+    cross_rates = repo.get_cross_rates("fewest_hops")
+
+    dollar_euro_rate.rate = Rate(Decimal("2"))
+    repo.add(dollar_euro_rate)
+    updated = repo.get_cross_rates("fewest_hops")
+    path = updated.find_path("EUR", "USD")
+
+    assert cross_rates.find_path("USD", "EUR") is not None
+    assert updated is not cross_rates
+    assert updated is repo.get_cross_rates("fewest_hops")
+    assert path is not None
+    assert path.exchange_rate.rate == Rate(Decimal("0.5"))
+    assert cache.stats().reloads == 1
@@ -0,0 +1,125 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+
+from currency_exchange.infrastructure.database.exceptions import (
+    ConnectionPoolTimeoutError,
+)
+from currency_exchange.infrastructure.database.migrations.runner import migrate
+from currency_exchange.infrastructure.database.pool import SQLiteConnectionPool
+from currency_exchange.infrastructure.database.profile import SQLiteProfile
+from currency_exchange.infrastructure.database.versions import (
+    ResponseVersion,
+    SQLiteDataVersion,
+)
+
+
+@pytest.fixture
+def database(tmp_path: Path) -> str:
+    return str(tmp_path / "currency_exchange.db")
+
+
+def test_connections_are_reused(database: str) -> None:
+    setup_calls: list[sqlite3.Connection] = []
+    pool = SQLiteConnectionPool(database, max_size=2, setup=setup_calls.append)
+
+    count_checkouts = 3
+    connections = []
+    for _ in range(count_checkouts):
+        connection = pool.acquire()
+        connections.append(connection)
+        pool.release(connection)
+    pool.close()
+
+    stats = pool.stats()
+    assert len(set(map(id, connections))) == 1
+    assert setup_calls == connections[:1]
+    assert stats.checkouts == count_checkouts
+    assert stats.creations == 1
+    assert stats.size == 0
+
+
+def test_acquire_waits_for_released_connection(database: str) -> None:
+    pool = SQLiteConnectionPool(database, max_size=1, timeout=5)
+    connection = pool.acquire()
+    acquired = []
+
+    thread = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    thread.start()
+    pool.release(connection)
+    thread.join()
+
+    assert acquired == [connection]
+    assert pool.stats().creations == 1
+    pool.release(acquired[0])
+    pool.close()
+
+
+def test_acquire_timeout(database: str) -> None:
+    pool = SQLiteConnectionPool(database, max_size=1, timeout=0.01)
+    connection = pool.acquire()
+
+    with pytest.raises(ConnectionPoolTimeoutError):
+        pool.acquire()
+
+    assert pool.stats().timeouts == 1
+    pool.release(connection)
+    pool.close()
+
+
+def test_open_transaction_is_rolled_back_and_broken_connection_discarded(
+    database: str,
+) -> None:
+    pool = SQLiteConnectionPool(database, max_size=1)
+    connection = pool.acquire()
+    connection.execute("CREATE TABLE rates (rate TEXT);")
+    connection.execute("INSERT INTO rates VALUES ('1.5');")
+    pool.release(connection)
+
+    connection = pool.acquire()
+    rows = connection.execute("SELECT * FROM rates;").fetchall()
+    connection.close()
+    pool.release(connection)
+
+    assert rows == []
+    assert pool.stats().discards == 1
+    assert pool.stats().size == 0
+    pool.close()
+
+
+def test_profile_is_applied_and_wal_truncated_on_close(database: str) -> None:
+    pool = SQLiteConnectionPool(database, setup=SQLiteProfile(synchronous="FULL").apply)
+    connection = pool.acquire()
+    journal_mode = connection.execute("PRAGMA journal_mode;").fetchone()
+    synchronous = connection.execute("PRAGMA synchronous;").fetchone()
+    with connection:
+        connection.execute("CREATE TABLE rates (rate TEXT);")
+        connection.execute("INSERT INTO rates VALUES ('1.5');")
+    pool.release(connection)
+    pool.close()
+
+    assert journal_mode == ("wal",)
+    assert synchronous == (2,)  # FULL
+    wal = Path(f"{database}-wal")
+    assert not wal.exists() or wal.stat().st_size == 0
+
+
+def test_response_version_is_bumped_by_writes(database: str) -> None:
+    pool = SQLiteConnectionPool(database, max_size=2)
+    connection = pool.acquire()
+    migrate(connection, offline=True)
+    version = ResponseVersion(pool, check_interval=60)
+    other_process = ResponseVersion(pool, check_interval=0)
+
+    before = version.current()
+    SQLiteDataVersion(connection, version).bump()
+    bumped = version.current()
+    SQLiteDataVersion(connection, other_process).bump()
+    pool.release(connection)
+
+    assert (before, bumped) == (0, 1)
+    assert version.current() == 1
+    assert other_process.current() == 2  # noqa: PLR2004
+    pool.close()
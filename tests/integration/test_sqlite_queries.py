@@ -0,0 +1,180 @@
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from sqlite3 import Connection
+
+import pytest
+
+from currency_exchange.application.interactors.currencies import (
+    GetCurrenciesInteractor,
+)
+from currency_exchange.application.interactors.exchange_rates import (
+    GetExchangeRatesInteractor,
+)
+from currency_exchange.application.models import (
+    CurrencyDTO,
+    ListCurrencies,
+    ListExchangeRates,
+)
+from currency_exchange.domain.models import Currency, ExchangeRate
+from currency_exchange.domain.value_objects import (
+    CurrencyCode,
+    CurrencyName,
+    CurrencySign,
+    Rate,
+)
+from currency_exchange.infrastructure.database.queries import (
+    SQLiteCurrencyQueries,
+    SQLiteExchangeRateQueries,
+)
+from currency_exchange.infrastructure.database.repo import (
+    SQLiteCurrencyRepository,
+    SQLiteExchangeRateRepository,
+)
+
+
+@pytest.fixture
+def currencies(connection_in_memory_db: Connection) -> list[Currency]:
+    ruble = Currency(
+        CurrencyName("Russian Ruble"), CurrencyCode("RUB"), CurrencySign("")
+    )
+    dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign("$"))
+    euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign(""))
+
+    currency_repo = SQLiteCurrencyRepository(connection_in_memory_db)
+    exchange_rate_repo = SQLiteExchangeRateRepository(connection_in_memory_db)
+    for currency in (ruble, dollar, euro):
+        currency_repo.add(currency)
+    exchange_rate_repo.add(ExchangeRate(ruble, dollar, Rate(Decimal("0.011"))))
+    exchange_rate_repo.add(ExchangeRate(ruble, euro, Rate(Decimal("0.01"))))
+    exchange_rate_repo.add(ExchangeRate(dollar, euro, Rate(Decimal("0.92"))))
+    return [ruble, dollar, euro]
+
+
+def test_currencies_pages(
+    connection_in_memory_db: Connection,
+    currencies: list[Currency],
+) -> None:
+    get_currencies = GetCurrenciesInteractor(
+        SQLiteCurrencyQueries(connection_in_memory_db)
+    )
+
+    first_page = get_currencies(ListCurrencies(limit=2, fields=["code", "id"]))
+    last_page = get_currencies(
+        ListCurrencies(limit=2, after=first_page.next_cursor, fields=["code", "id"])
+    )
+    everything = list(get_currencies(ListCurrencies()).items)
+
+    ruble, dollar, euro = currencies
+    assert first_page.items == [
+        {"id": euro.id, "code": "EUR"},
+        {"id": ruble.id, "code": "RUB"},
+    ]
+    assert first_page.next_cursor == "RUB"
+    assert last_page.items == [{"id": dollar.id, "code": "USD"}]
+    assert last_page.next_cursor is None
+    assert everything[2] == {
+        "id": dollar.id,
+        "name": "US Dollar",
+        "code": "USD",
+        "sign": "$",
+    }
+
+
+@pytest.mark.usefixtures("currencies")
+def test_exchange_rates_pages_and_filters(
+    connection_in_memory_db: Connection,
+) -> None:
+    get_exchange_rates = GetExchangeRatesInteractor(
+        SQLiteExchangeRateQueries(connection_in_memory_db)
+    )
+    fields = ["baseCurrency.code", "targetCurrency.code", "rate"]
+
+    pages = [get_exchange_rates(ListExchangeRates(limit=2, fields=fields))]
+    while pages[-1].next_cursor is not None:
+        pages.append(
+            get_exchange_rates(
+                ListExchangeRates(limit=2, after=pages[-1].next_cursor, fields=fields)
+            )
+        )
+    from_ruble = list(get_exchange_rates(ListExchangeRates(base_code="RUB")).items)
+    to_euro = list(
+        get_exchange_rates(ListExchangeRates(target_code="EUR", fields=["rate"])).items
+    )
+
+    assert [len(list(page.items)) for page in pages] == [2, 1]
+    assert list(pages[1].items) == [
+        {
+            "baseCurrency": {"code": "USD"},
+            "targetCurrency": {"code": "EUR"},
+            "rate": Decimal("0.92"),
+        }
+    ]
+    assert [item["targetCurrency"].code for item in from_ruble] == [
+        "USD",
+        "EUR",
+    ]
+    assert set(from_ruble[0]) == {"baseCurrency", "targetCurrency", "rate"}
+    assert to_euro == [{"rate": Decimal("0.01")}, {"rate": Decimal("0.92")}]
+
+
+def test_exchange_rates_share_currencies_of_registry(
+    connection_in_memory_db: Connection,
+    currencies: list[Currency],
+) -> None:
+    get_exchange_rates = GetExchangeRatesInteractor(
+        SQLiteExchangeRateQueries(connection_in_memory_db)
+    )
+
+    first, second = (
+        list(get_exchange_rates(ListExchangeRates(base_code="RUB")).items)
+        for _ in range(2)
+    )
+
+    ruble = currencies[0]
+    assert first[0]["baseCurrency"] == CurrencyDTO.from_domain(ruble)
+    assert first[0]["baseCurrency"] is first[1]["baseCurrency"]
+    assert second[0]["baseCurrency"] is first[0]["baseCurrency"]
+
+
+@pytest.mark.usefixtures("currencies")
+def test_exchange_rates_updated_since(connection_in_memory_db: Connection) -> None:
+    get_exchange_rates = GetExchangeRatesInteractor(
+        SQLiteExchangeRateQueries(connection_in_memory_db)
+    )
+    hour_ago = datetime.now(UTC) - timedelta(hours=1)
+
+    recent = list(
+        get_exchange_rates(
+            ListExchangeRates(updated_since=hour_ago, fields=["updatedAt"])
+        ).items
+    )
+    future = list(
+        get_exchange_rates(
+            ListExchangeRates(updated_since=hour_ago + timedelta(hours=2))
+        ).items
+    )
+
+    assert len(recent) == 3  # noqa: PLR2004
+    assert all(datetime.fromisoformat(item["updatedAt"]) > hour_ago for item in recent)
+    assert future == []
+
+
+@pytest.mark.parametrize(
+    "list_exchange_rates",
+    [
+        ListExchangeRates(limit=0),
+        ListExchangeRates(after="not a cursor"),
+        ListExchangeRates(fields=["baseCurrency.country"]),
+        ListExchangeRates(base_code="DOLLAR"),
+    ],
+)
+def test_exchange_rates_invalid_query(
+    connection_in_memory_db: Connection,
+    list_exchange_rates: ListExchangeRates,
+) -> None:
+    get_exchange_rates = GetExchangeRatesInteractor(
+        SQLiteExchangeRateQueries(connection_in_memory_db)
+    )
+
+    with pytest.raises(ValueError):  # noqa: PT011
+        get_exchange_rates(list_exchange_rates)
@@ -7,6 +7,7 @@ from currency_exchange.application.exceptions import (
     CurrencyCodeAlreadyExistsError,
     ExchangeRateAlreadyExistsError,
 )
+from currency_exchange.application.repo import ConversionLegs
 from currency_exchange.domain.models import Currency, ExchangeRate
 from currency_exchange.domain.value_objects import (
     CurrencyCode,
@@ -14,6 +15,9 @@ from currency_exchange.domain.value_objects import (
     CurrencySign,
     Rate,
 )
+from currency_exchange.infrastructure.database.migrations.runner import migrate
+from currency_exchange.infrastructure.database.rates import RateColumn
+from currency_exchange.infrastructure.database.registry import CurrencyRegistry
 from currency_exchange.infrastructure.database.repo import (
     SQLiteCurrencyRepository,
     SQLiteExchangeRateRepository,
@@ -113,7 +117,7 @@ def test_get_by_currency_codes_exchange_rate(
     assert result.rate == dollar_euro_rate.rate
 
 
-def test_related_exchanges_by_currency_codes(
+def test_conversion_legs_by_one_query(
     connection_in_memory_db: Connection,
 ) -> None:
     ruble = Currency(
@@ -123,6 +127,7 @@ def test_related_exchanges_by_currency_codes(
     euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign(""))
     ruble_dollar_rate = ExchangeRate(ruble, dollar, rate=Rate(Decimal("30")))
     dollar_euro_rate = ExchangeRate(dollar, euro, rate=Rate(Decimal("1.5")))
+    euro_ruble_rate = ExchangeRate(euro, ruble, rate=Rate(Decimal("0.01")))
 
     currency_repo = SQLiteCurrencyRepository(connection_in_memory_db)
     currency_repo.add(ruble)
@@ -131,13 +136,19 @@ def test_related_exchanges_by_currency_codes(
     exchange_rate_repo = SQLiteExchangeRateRepository(connection_in_memory_db)
     exchange_rate_repo.add(ruble_dollar_rate)
     exchange_rate_repo.add(dollar_euro_rate)
-    result = exchange_rate_repo.get_related_exchanges_by_currency_codes(
-        "RUB",
-        "EUR",
-        "USD",
+    exchange_rate_repo.add(euro_ruble_rate)
+    statements: list[str] = []
+    connection_in_memory_db.set_trace_callback(statements.append)
+    result = exchange_rate_repo.get_conversion_legs("RUB", "EUR", "USD")
+    connection_in_memory_db.set_trace_callback(None)
+
+    assert result == ConversionLegs(
+        direct=None,
+        reverse=euro_ruble_rate,
+        to_pivot=ruble_dollar_rate,
+        from_pivot=dollar_euro_rate,
     )
-
-    assert result == (ruble_dollar_rate, dollar_euro_rate)
+    assert len([sql for sql in statements if "SELECT" in sql]) == 1
 
 
 def test_get_all_exchanges(
@@ -182,3 +193,88 @@ def test_failed_adding_existing_exchange_rate(
 
     with pytest.raises(ExchangeRateAlreadyExistsError):
         exchange_rate_repo.add(dollar_euro_rate)
+
+
+def test_fixed_point_rates_migration(
+    connection_in_memory_db: Connection,
+) -> None:
+    ruble = Currency(
+        CurrencyName("Russian Ruble"), CurrencyCode("RUB"), CurrencySign("")
+    )
+    dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign(""))
+    euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign(""))
+    ruble_dollar_rate = ExchangeRate(ruble, dollar, rate=Rate(Decimal("0.0105")))
+    dollar_euro_rate = ExchangeRate(dollar, euro, rate=Rate(Decimal("0.9200004")))
+
+    # Repositories of a running server outlive the migration
+    migrate(connection_in_memory_db, 5)
+    currency_repo = SQLiteCurrencyRepository(connection_in_memory_db)
+    exchange_rate_repo = SQLiteExchangeRateRepository(connection_in_memory_db)
+    currency_repo.add(ruble)
+    currency_repo.add(dollar)
+    currency_repo.add(euro)
+    exchange_rate_repo.add(ruble_dollar_rate)
+    exchange_rate_repo.add(dollar_euro_rate)
+    decimal_column = RateColumn.detect(connection_in_memory_db)
+
+    migrate(connection_in_memory_db, 6)
+    exchange_rate_repo.add(ExchangeRate(euro, ruble, rate=Rate(Decimal("95.5"))))
+    stored = connection_in_memory_db.execute(
+        "SELECT rate FROM exchange_rates ORDER BY rate;"
+    ).fetchall()
+    result = exchange_rate_repo.get_by_currency_codes("USD", "EUR")
+    legs = exchange_rate_repo.get_conversion_legs("RUB", "EUR", "USD")
+    version = exchange_rate_repo.get_data_version()
+    exchange_rate_repo.add(ExchangeRate(ruble, euro, rate=Rate(Decimal("0.01"))))
+
+    assert decimal_column == RateColumn()
+    assert RateColumn.detect(connection_in_memory_db) == RateColumn(6)
+    assert stored == [(10500,), (920000,), (95500000,)]
+    assert result == dollar_euro_rate
+    assert result.rate == Rate(Decimal("0.920000"))
+    assert legs.to_pivot is not None
+    assert legs.to_pivot.rate == Rate(Decimal("0.0105"))
+    assert exchange_rate_repo.get_data_version() == version + 1
+    with pytest.raises(ValueError, match="at least"):
+        exchange_rate_repo.add(
+            ExchangeRate(dollar, ruble, rate=Rate(Decimal("0.0000004")))
+        )
+
+    migrate(connection_in_memory_db, 5)
+    exchange_rate_repo.add(ExchangeRate(dollar, ruble, rate=Rate(Decimal("95.25"))))
+
+    assert RateColumn.detect(connection_in_memory_db) == RateColumn()
+    assert exchange_rate_repo.get_by_currency_codes("RUB", "USD").rate == Rate(
+        Decimal("0.0105")
+    )
+    assert exchange_rate_repo.get_by_currency_codes("USD", "RUB").rate == Rate(
+        Decimal("95.25")
+    )
+
+
+def test_currencies_of_rows_are_interned(connection_in_memory_db: Connection) -> None:
+    ruble = Currency(
+        CurrencyName("Russian Ruble"), CurrencyCode("RUB"), CurrencySign("")
+    )
+    dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign(""))
+    euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign(""))
+    currencies = CurrencyRegistry()
+    currency_repo = SQLiteCurrencyRepository(connection_in_memory_db, currencies)
+    exchange_rate_repo = SQLiteExchangeRateRepository(
+        connection_in_memory_db, currencies=currencies
+    )
+    for currency in (ruble, dollar, euro):
+        currency_repo.add(currency)
+    exchange_rate_repo.add(ExchangeRate(dollar, ruble, Rate(Decimal("95"))))
+    exchange_rate_repo.add(ExchangeRate(dollar, euro, Rate(Decimal("0.92"))))
+
+    to_ruble, to_euro = exchange_rate_repo.get_all()
+    found_dollar = currency_repo.get_by_code("USD")
+    currency_repo.add(
+        Currency(CurrencyName("Dollar"), dollar.code, dollar.sign, dollar.id)
+    )
+    renamed_dollar = currency_repo.get_by_code("USD")
+
+    assert to_ruble.base_currency is to_euro.base_currency is found_dollar
+    assert renamed_dollar is not found_dollar
+    assert renamed_dollar.name == CurrencyName("Dollar")
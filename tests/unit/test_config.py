@@ -0,0 +1,30 @@
+import pytest
+
+from currency_exchange.config import CacheConfig, Config, ExchangeConfig
+
+
+@pytest.mark.parametrize(
+    ("strategy", "exchange_rates", "expected"),
+    [
+        ("matrix", True, "matrix"),
+        ("matrix", False, "graph"),
+        ("pivot", False, "pivot"),
+    ],
+)
+def test_matrix_strategy_needs_rate_cache(
+    strategy: str,
+    exchange_rates: bool,  # noqa: FBT001
+    expected: str,
+) -> None:
+    config = Config(
+        host="127.0.0.1",
+        port=8000,
+        allow_origins=[],
+        allow_methods=[],
+        allow_headers=[],
+        allow_credentials=False,
+        cache=CacheConfig(exchange_rates=exchange_rates),
+        exchange=ExchangeConfig(strategy=strategy),  # type: ignore[arg-type]
+    )
+
+    assert config.exchange.strategy == expected
@@ -1,10 +1,23 @@
-from decimal import Decimal
+import random
+from decimal import ROUND_HALF_EVEN, Decimal
 
 import pytest
 
+from currency_exchange.domain.bulk import (
+    RATE_SCALE,
+    FixedPointColumn,
+    exchange_fixed,
+    exchange_float,
+)
+from currency_exchange.domain.cross_rates import CrossRateMatrix
 from currency_exchange.domain.exceptions import (
     ExchangeRateCantBeMergeError,
 )
+from currency_exchange.domain.graph import (
+    ConversionPath,
+    ExchangeRateGraph,
+    PathPolicy,
+)
 from currency_exchange.domain.models import Currency, ExchangeRate
 from currency_exchange.domain.services import (
     exchange_currency,
@@ -109,6 +122,222 @@ def test_cant_merge_non_related_exchange_rate() -> None:
         merge_exchange_rate(exchange_rate_ruble_dollar, exchange_rate_euro_sterling)
 
 
+def make_exchange_rates() -> list[ExchangeRate]:
+    ruble = Currency(
+        CurrencyName("Russian Ruble"), CurrencyCode("RUB"), CurrencySign("")
+    )
+    dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign(""))
+    euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign(""))
+    sterling = Currency(
+        CurrencyName("Pound Sterling"), CurrencyCode("GBP"), CurrencySign("")
+    )
+    yen = Currency(CurrencyName("Japanese Yen"), CurrencyCode("JPY"), CurrencySign(""))
+    return [
+        ExchangeRate(ruble, dollar, Rate(Decimal("0.01"))),
+        ExchangeRate(dollar, euro, Rate(Decimal("0.9"))),
+        ExchangeRate(euro, sterling, Rate(Decimal("0.85"))),
+        ExchangeRate(sterling, ruble, Rate(Decimal(130))),
+        ExchangeRate(yen, yen, Rate(Decimal(1))),
+    ]
+
+
+def make_rate_graph() -> ExchangeRateGraph:
+    return ExchangeRateGraph(make_exchange_rates())
+
+
+def test_find_path_of_many_hops() -> None:
+    graph = make_rate_graph()
+
+    path = graph.find_path("USD", "GBP")
+
+    assert path is not None
+    assert path.codes == ("USD", "EUR", "GBP")
+    assert path.exchange_rate.rate == Rate(Decimal("0.765"))
+    assert path.exchange_rate.base_currency.code.value == "USD"
+    assert path.exchange_rate.target_currency.code.value == "GBP"
+
+
+def test_find_path_reverses_rates() -> None:
+    graph = make_rate_graph()
+
+    path = graph.find_path("GBP", "USD")
+
+    assert path is not None
+    assert path.codes == ("GBP", "RUB", "USD")
+    assert path.exchange_rate.rate == Rate(Decimal("1.3"))
+
+
+@pytest.mark.parametrize(
+    ("policy", "expected_codes"),
+    [
+        ("fewest_hops", ("RUB", "GBP")),
+        ("precision", ("RUB", "USD", "EUR", "GBP")),
+    ],
+)
+def test_find_path_by_policy(
+    policy: PathPolicy, expected_codes: tuple[str, ...]
+) -> None:
+    graph = make_rate_graph()
+
+    path = graph.find_path("RUB", "GBP", policy)
+
+    assert path is not None
+    assert path.codes == expected_codes
+
+
+@pytest.mark.parametrize(
+    ("base_code", "target_code"),
+    [
+        ("RUB", "JPY"),
+        ("RUB", "AUD"),
+        ("RUB", "RUB"),
+    ],
+)
+def test_find_no_path(base_code: str, target_code: str) -> None:
+    graph = make_rate_graph()
+
+    assert graph.find_path(base_code, target_code) is None
+
+
+def test_find_path_is_memoized() -> None:
+    graph = make_rate_graph()
+
+    assert graph.find_path("USD", "GBP") is graph.find_path("USD", "GBP")
+
+
+def summary(path: ConversionPath | None) -> tuple[tuple[str, ...], Rate] | None:
+    if path is None:
+        return None
+    return path.codes, path.exchange_rate.rate
+
+
+@pytest.mark.parametrize("policy", ["fewest_hops", "precision"])
+def test_cross_rates_match_graph(policy: PathPolicy) -> None:
+    graph = make_rate_graph()
+
+    cross_rates = CrossRateMatrix.from_graph(graph, policy)
+
+    for base_code in graph.codes:
+        for target_code in graph.codes:
+            path = cross_rates.find_path(base_code, target_code)
+            expected = graph.find_path(base_code, target_code, policy)
+            assert summary(path) == summary(expected)
+
+
+def test_cross_rates_with_updated_rate() -> None:
+    exchange_rates = make_exchange_rates()
+    cross_rates = CrossRateMatrix.from_graph(ExchangeRateGraph(exchange_rates))
+    dollar_euro = exchange_rates[1]
+    updated_rate = ExchangeRate(
+        dollar_euro.base_currency,
+        dollar_euro.target_currency,
+        Rate(Decimal("0.8")),
+        dollar_euro.id,
+    )
+
+    updated = cross_rates.with_rate(updated_rate)
+
+    path = updated.find_path("USD", "GBP")
+    assert path is not None
+    assert path.exchange_rate.rate == Rate(Decimal("0.68"))
+    assert summary(updated.find_path("RUB", "USD")) == summary(
+        cross_rates.find_path("RUB", "USD")
+    )
+    old_path = cross_rates.find_path("USD", "GBP")
+    assert old_path is not None
+    assert old_path.exchange_rate.rate == Rate(Decimal("0.765"))
+
+
+@pytest.mark.parametrize("policy", ["fewest_hops", "precision"])
+def test_cross_rates_with_created_rate(policy: PathPolicy) -> None:
+    exchange_rates = make_exchange_rates()
+    ruble, dollar = exchange_rates[0].base_currency, exchange_rates[0].target_currency
+    euro = exchange_rates[1].target_currency
+    yen = exchange_rates[4].base_currency
+    franc = Currency(CurrencyName("Swiss Franc"), CurrencyCode("CHF"), CurrencySign(""))
+    cross_rates = CrossRateMatrix.from_graph(ExchangeRateGraph(exchange_rates), policy)
+
+    for created_rate in (
+        ExchangeRate(euro, ruble, Rate(Decimal(95))),
+        ExchangeRate(yen, dollar, Rate(Decimal("0.0067"))),
+        ExchangeRate(franc, yen, Rate(Decimal(170))),
+    ):
+        exchange_rates.append(created_rate)
+        cross_rates = cross_rates.with_rate(created_rate)
+        graph = ExchangeRateGraph(exchange_rates)
+
+        for base_code in graph.codes:
+            for target_code in graph.codes:
+                path = cross_rates.find_path(base_code, target_code)
+                expected = graph.find_path(base_code, target_code, policy)
+                assert (path is None) == (expected is None)
+                if path is None or expected is None:
+                    continue
+                assert path.codes[0] == base_code
+                assert path.codes[-1] == target_code
+                assert len(path.codes) == len(expected.codes)
+
+
+def make_amounts_and_rates() -> tuple[list[Decimal], list[Decimal]]:
+    generator = random.Random(42)
+    amounts = [
+        Decimal(generator.randint(-(10**9), 10**9)).scaleb(-2) for _ in range(1000)
+    ]
+    amounts += [Decimal("0.05"), Decimal("0.15"), Decimal("-0.05")]
+    rates = [
+        Decimal(generator.randint(1, 10**10)).scaleb(-RATE_SCALE)
+        for _ in range(len(amounts) - 3)
+    ]
+    rates += [Decimal("0.5"), Decimal("0.5"), Decimal("0.5")]
+    return amounts, rates
+
+
+def test_exchange_fixed_matches_decimal() -> None:
+    dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign(""))
+    euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign(""))
+    amounts, rates = make_amounts_and_rates()
+    expected = [
+        exchange_currency(ExchangeRate(dollar, euro, Rate(rate)), amount).quantize(
+            Decimal("0.01"), ROUND_HALF_EVEN
+        )
+        for amount, rate in zip(amounts, rates, strict=True)
+    ]
+
+    result = exchange_fixed(
+        FixedPointColumn.from_decimals(amounts, 2),
+        FixedPointColumn.from_decimals(rates, RATE_SCALE),
+    )
+
+    assert result.to_decimals() == expected
+    assert expected[-3:] == [Decimal("0.02"), Decimal("0.08"), Decimal("-0.02")]
+
+
+def test_exchange_float_is_close_to_decimal() -> None:
+    amounts, rates = make_amounts_and_rates()
+    distinct_rates = sorted(set(rates))
+    indices = [distinct_rates.index(rate) for rate in rates]
+
+    result = exchange_float(
+        [float(amount) for amount in amounts],
+        [float(rate) for rate in distinct_rates],
+        indices,
+    )
+
+    for amount, rate, converted in zip(amounts, rates, result, strict=True):
+        exact = amount * rate
+        assert abs(Decimal(converted) - exact) <= abs(exact) * Decimal("3.4e-16")
+
+
+def test_bulk_exchange_needs_rate_per_amount() -> None:
+    amounts = FixedPointColumn([100, 200], 2)
+    rates = FixedPointColumn([500_000], RATE_SCALE)
+
+    with pytest.raises(ValueError, match="2 amounts and 1 rates"):
+        exchange_fixed(amounts, rates)
+    with pytest.raises(ValueError, match="Every amount must have a rate"):
+        exchange_float([1.0, 2.0], [0.5])
+
+
 @pytest.mark.parametrize(
     ("currency_code"),
     [
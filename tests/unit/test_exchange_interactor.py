@@ -0,0 +1,91 @@
+from decimal import Decimal
+from typing import override
+
+from currency_exchange.application.interactors.exchange_rates import (
+    ExchangeCurrencyInteractor,
+)
+from currency_exchange.application.models import (
+    ExchangeCurrencyDTO,
+    ExchangedCurrencyDTO,
+    ExchangeErrorDTO,
+)
+from currency_exchange.application.resolvers import GraphExchangeRateResolver
+from currency_exchange.domain.graph import ConversionPath
+from currency_exchange.domain.models import Currency, ExchangeRate
+from currency_exchange.domain.value_objects import (
+    CurrencyCode,
+    CurrencyName,
+    CurrencySign,
+    Rate,
+)
+from currency_exchange.infrastructure.in_memory_repo import (
+    InMemoryExchangeRateRepository,
+)
+
+
+class CountingResolver(GraphExchangeRateResolver):
+    def __init__(self, exchange_rate_repo: InMemoryExchangeRateRepository) -> None:
+        super().__init__(exchange_rate_repo)
+        self.calls: list[tuple[str, str]] = []
+
+    @override
+    def resolve(self, base_code: str, target_code: str) -> ConversionPath:
+        self.calls.append((base_code, target_code))
+        return super().resolve(base_code, target_code)
+
+
+def test_batch_resolves_each_pair_once() -> None:
+    dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign(""))
+    euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign(""))
+    exchange_rate_repo = InMemoryExchangeRateRepository()
+    exchange_rate_repo.add(ExchangeRate(dollar, euro, Rate(Decimal("0.5"))))
+    resolver = CountingResolver(exchange_rate_repo)
+    interactor = ExchangeCurrencyInteractor(resolver)
+
+    results = interactor.batch(
+        [
+            ExchangeCurrencyDTO("USD", "EUR", Decimal(10)),
+            ExchangeCurrencyDTO("EUR", "GBP", Decimal(1)),
+            ExchangeCurrencyDTO("EUR", "USD", Decimal(3)),
+            ExchangeCurrencyDTO("USD", "EUR", Decimal(4)),
+            ExchangeCurrencyDTO("USD", "DOLLAR", Decimal(1)),
+        ]
+    )
+
+    converted = [
+        result.convertedAmount if isinstance(result, ExchangedCurrencyDTO) else None
+        for result in results
+    ]
+    assert converted == [Decimal(5), None, Decimal(6), Decimal(2), None]
+    assert results[1] == ExchangeErrorDTO("Can't exchange from EUR to GBP")
+    assert isinstance(results[4], ExchangeErrorDTO)
+    assert resolver.calls == [("USD", "EUR"), ("EUR", "GBP"), ("EUR", "USD")]
+
+
+def test_batch_groups_pairs_by_normalized_codes() -> None:
+    dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign(""))
+    euro = Currency(CurrencyName("Euro"), CurrencyCode("EUR"), CurrencySign(""))
+    exchange_rate_repo = InMemoryExchangeRateRepository()
+    exchange_rate_repo.add(ExchangeRate(dollar, euro, Rate(Decimal("0.5"))))
+    resolver = CountingResolver(exchange_rate_repo)
+    interactor = ExchangeCurrencyInteractor(resolver)
+
+    results = interactor.batch(
+        [
+            ExchangeCurrencyDTO("usd", "eur", Decimal(2)),
+            ExchangeCurrencyDTO("USD", "EUR", Decimal(4)),
+            ExchangeCurrencyDTO("Usd", "eUR", Decimal(6)),
+            ExchangeCurrencyDTO("eur", "gbp", Decimal(1)),
+            ExchangeCurrencyDTO("EUR", "GBP", Decimal(1)),
+        ]
+    )
+
+    assert [
+        result.convertedAmount
+        for result in results
+        if isinstance(result, ExchangedCurrencyDTO)
+    ] == [Decimal(1), Decimal(2), Decimal(3)]
+    assert (
+        results[3] == results[4] == ExchangeErrorDTO("Can't exchange from EUR to GBP")
+    )
+    assert resolver.calls == [("USD", "EUR"), ("EUR", "GBP")]
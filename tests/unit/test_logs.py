@@ -0,0 +1,47 @@
+import logging
+import os
+import warnings
+from pathlib import Path
+
+from currency_exchange.logs import QueueLogHandler
+
+
+def test_queue_handler_writes_records_of_parent_and_forked_child(
+    tmp_path: Path,
+) -> None:
+    log_path = tmp_path / "log.txt"
+    file_handler = logging.FileHandler(log_path)
+    file_handler.setFormatter(logging.Formatter("%(process)d %(message)s"))
+    handler = QueueLogHandler(file_handler)
+    logger = logging.getLogger("test_queue_handler")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning("before fork %s", 1)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            pid = os.fork()
+        if pid == 0:
+            # The child must not return into pytest, whatever happens
+            exit_code = 1
+            try:
+                logger.warning("in child %s", 2)
+                handler.close()
+                exit_code = 0
+            finally:
+                os._exit(exit_code)
+        _, status = os.waitpid(pid, 0)
+        logger.warning("after fork %s", 3)
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+
+    lines = sorted(log_path.read_text().splitlines(), key=lambda line: line[-1])
+    assert os.waitstatus_to_exitcode(status) == 0
+    # The listener thread is stopped before fork
+    assert not [warning for warning in caught if "fork()" in str(warning.message)]
+    assert lines == [
+        f"{os.getpid()} before fork 1",
+        f"{pid} in child 2",
+        f"{os.getpid()} after fork 3",
+    ]
@@ -0,0 +1,111 @@
+import json
+from dataclasses import asdict
+from decimal import Decimal
+
+from currency_exchange.application.models import (
+    CurrencyDTO,
+    ExchangedCurrencyDTO,
+    ExchangeRateDTO,
+)
+from currency_exchange.domain.models import Currency, ExchangeRate
+from currency_exchange.domain.value_objects import (
+    CurrencyCode,
+    CurrencyName,
+    CurrencySign,
+    Rate,
+)
+from currency_exchange.presentation.serializers import (
+    currency_json,
+    exchange_rate_json,
+    exchanged_currency_json,
+    item_json,
+)
+from simple_server.encoder import SimpleEncoder
+
+dollar = Currency(CurrencyName("US Dollar"), CurrencyCode("USD"), CurrencySign("$"))
+euro = Currency(CurrencyName('Euro "€"'), CurrencyCode("EUR"), CurrencySign("€"))
+
+
+def test_same_json_as_asdict_and_encoder() -> None:
+    currency = CurrencyDTO.from_domain(euro)
+    exchange_rate = ExchangeRateDTO.from_domain(
+        ExchangeRate(dollar, euro, Rate(Decimal("0.920000")))
+    )
+
+    assert (
+        currency_json(currency)
+        == json.dumps(asdict(currency), cls=SimpleEncoder).encode()
+    )
+    assert (
+        exchange_rate_json(exchange_rate)
+        == json.dumps(asdict(exchange_rate), cls=SimpleEncoder).encode()
+    )
+
+
+def test_decimals_keep_all_digits() -> None:
+    rate = Decimal(1) / Decimal("0.92")
+    exchanged = ExchangedCurrencyDTO(
+        CurrencyDTO.from_domain(euro),
+        CurrencyDTO.from_domain(dollar),
+        rate,
+        Decimal(10),
+        Decimal(10) * rate,
+        ["EUR", "USD"],
+    )
+
+    body = json.loads(exchanged_currency_json(exchanged), parse_float=Decimal)
+
+    assert body["rate"] == rate
+    assert body["convertedAmount"] == Decimal(10) * rate
+    assert body["amount"] == Decimal(10)
+    assert body["path"] == ["EUR", "USD"]
+    assert body["baseCurrency"]["name"] == 'Euro "€"'
+
+
+def test_far_decimals_keep_exponent() -> None:
+    amount = Decimal("1E+999999")
+    exchanged = ExchangedCurrencyDTO(
+        CurrencyDTO.from_domain(euro),
+        CurrencyDTO.from_domain(dollar),
+        Decimal("1E-999"),
+        amount,
+        amount * Decimal("1E-999"),
+        ["EUR", "USD"],
+    )
+
+    raw = exchanged_currency_json(exchanged)
+    body = json.loads(raw, parse_float=Decimal)
+
+    assert len(raw) < 1000  # noqa: PLR2004
+    assert body["amount"] == amount
+    assert body["rate"] == Decimal("1E-999")
+    assert body["convertedAmount"] == Decimal("1E+999000")
+
+
+def test_page_items_keep_decimal_digits() -> None:
+    rate = Decimal(1) / Decimal("0.92")
+    item = {
+        "baseCurrency": {"id": euro.id, "name": euro.name.value},
+        "rate": rate,
+        "updatedAt": "2024-05-01T12:30:00.250Z",
+    }
+
+    raw = item_json(item)
+
+    assert json.loads(raw, parse_float=Decimal) == {
+        "baseCurrency": {"id": str(euro.id), "name": 'Euro "€"'},
+        "rate": rate,
+        "updatedAt": "2024-05-01T12:30:00.250Z",
+    }
+    # Exactly as the encoder writes items whose decimals fit a float
+    assert item_json({**item, "rate": Decimal("0.5")}) == (
+        json.dumps({**item, "rate": Decimal("0.5")}, cls=SimpleEncoder).encode()
+    )
+
+
+def test_page_items_write_currency_dtos_as_fragments() -> None:
+    currency = CurrencyDTO.from_domain(euro)
+
+    raw = item_json({"targetCurrency": currency, "rate": Decimal("0.5")})
+
+    assert raw == b'{"targetCurrency": %s, "rate": 0.5}' % currency_json(currency)
@@ -0,0 +1,195 @@
+import threading
+
+import pytest
+
+from simple_di import Container, FromSimpleDi
+from simple_di.exceptions import DependencyCycleError, NoProviderError
+from simple_di.integration import DiMiddleware, inject
+from simple_server import Request, Response, StreamingResponse
+
+
+class Settings: ...
+
+
+class Session:
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.closed = False
+
+
+def factory_session(settings: FromSimpleDi[Settings]) -> Session:
+    return Session(settings)
+
+
+def close_session(session: Session) -> None:
+    session.closed = True
+
+
+def make_container() -> Container:
+    container = Container()
+    container.add(Settings, Settings)
+    container.add(Session, factory_session, close_session, scope="REQUEST")
+    return container
+
+
+def test_request_scope_is_cached_per_request() -> None:
+    container = make_container()
+
+    first = container.get(Session, scope="REQUEST")
+    second = container.get(Session, scope="REQUEST")
+    container.close(scope="REQUEST")
+    third = container.get(Session, scope="REQUEST")
+
+    assert first is second
+    assert isinstance(first, Session)
+    assert first.closed
+    assert third is not first
+
+
+def test_request_scope_is_not_shared_between_threads() -> None:
+    container = make_container()
+    count_threads = 4
+    barrier = threading.Barrier(count_threads)
+    sessions: dict[int, Session] = {}
+    closed_by_other_thread: list[bool] = []
+
+    def handle_request(number: int) -> None:
+        session = container.get(Session, scope="REQUEST")
+        assert isinstance(session, Session)
+        sessions[number] = session
+        barrier.wait()
+        if number == 0:
+            container.close(scope="REQUEST")
+        barrier.wait()
+        if number != 0:
+            closed_by_other_thread.append(session.closed)
+            container.close(scope="REQUEST")
+
+    threads = [
+        threading.Thread(target=handle_request, args=(number,))
+        for number in range(count_threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(session) for session in sessions.values()}) == count_threads
+    assert closed_by_other_thread == [False] * (count_threads - 1)
+    assert all(session.closed for session in sessions.values())
+
+
+def test_app_scope_is_shared_between_threads() -> None:
+    container = make_container()
+    settings: list[Settings] = []
+
+    def handle_request() -> None:
+        session = container.get(Session, scope="REQUEST")
+        assert isinstance(session, Session)
+        settings.append(session.settings)
+        container.close(scope="REQUEST")
+
+    threads = [threading.Thread(target=handle_request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(obj) for obj in settings}) == 1
+
+
+class Repository:
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+
+def factory_repository(session: FromSimpleDi[Session]) -> Repository:
+    return Repository(session)
+
+
+def test_compile_detects_missing_provider() -> None:
+    container = Container()
+    container.add(Session, factory_session, close_session, scope="REQUEST")
+
+    with pytest.raises(NoProviderError):
+        container.compile()
+
+
+def test_compile_detects_cycle() -> None:
+    def factory_settings(_repository: FromSimpleDi[Repository]) -> Settings:
+        return Settings()
+
+    container = make_container()
+    container.add(Settings, factory_settings, scope="REQUEST")
+    container.add(Repository, factory_repository, scope="REQUEST")
+
+    with pytest.raises(DependencyCycleError):
+        container.compile()
+
+
+def test_plan_creates_shared_dependency_once() -> None:
+    container = make_container()
+    container.add(Repository, factory_repository, scope="REQUEST")
+    container.compile()
+
+    repository = container.get(Repository, scope="REQUEST")
+    session = container.get(Session, scope="REQUEST")
+
+    assert isinstance(repository, Repository)
+    assert container.get(Repository, scope="REQUEST") is repository
+    assert repository.session is session
+    assert isinstance(session, Session)
+    assert session.settings is container.get(Settings)
+
+
+def test_entered_scopes_own_their_objects() -> None:
+    container = make_container()
+
+    with container.enter_scope() as first:
+        with container.enter_scope() as second:
+            first_session = first.get(Session)
+            second_session = second.get(Session)
+            assert first.get(Session) is first_session
+        assert isinstance(second_session, Session)
+        assert second_session.closed
+        assert isinstance(first_session, Session)
+        first_closed_in_scope = first_session.closed
+
+    assert not first_closed_in_scope
+    assert first_session.closed
+    assert first_session.settings is second_session.settings
+
+
+def test_failed_deliter_does_not_skip_the_rest() -> None:
+    def fail_to_close(_: Repository) -> None:
+        raise RuntimeError
+
+    container = make_container()
+    container.add(Repository, factory_repository, fail_to_close, scope="REQUEST")
+
+    scope = container.enter_scope()
+    repository = scope.get(Repository)
+    with pytest.raises(RuntimeError):
+        scope.close()
+
+    assert isinstance(repository, Repository)
+    assert repository.session.closed
+
+
+def test_streaming_response_keeps_request_scope() -> None:
+    container = make_container()
+    sessions: list[Session] = []
+
+    @inject
+    def stream_rows(_: Request, session: FromSimpleDi[Session]) -> Response:
+        sessions.append(session)
+        rows = ({"closed": session.closed} for _ in range(2))
+        return StreamingResponse(200, rows=rows)
+
+    response = DiMiddleware(container)(stream_rows, Request({}, {}, {}, {}))
+    assert isinstance(response, StreamingResponse)
+    rows = list(response.rows)
+    response.close()
+
+    assert rows == [{"closed": False}, {"closed": False}]
+    assert sessions[0].closed
@@ -0,0 +1,481 @@
+import gzip
+import json
+import logging
+import socket
+import threading
+import zlib
+from collections.abc import Iterator
+
+import pytest
+
+from simple_server import (
+    AccessLogMiddleware,
+    CompressionMiddleware,
+    Request,
+    Response,
+    ResponseCacheMiddleware,
+    Router,
+    ServeOptions,
+    SimpleApp,
+    StreamingResponse,
+)
+from simple_server.app import handler_factory
+from simple_server.exceptions import RouteConflictError
+from simple_server.middleware import Middleware
+from simple_server.server import create_server
+from simple_server.types import Handler
+
+router = Router("test_router")
+
+
+@router.route("GET", "/currency/{code}")
+def get_currency(request: Request) -> Response:
+    return Response(200, {"code": request.path_params["code"], "sign": "€"})
+
+
+@router.route("DELETE", "/currency/{code}")
+def delete_currency(_: Request) -> Response:
+    return Response(204)
+
+
+STREAMED_ROWS = 5000
+streamed_rows_closed = threading.Event()
+
+
+@router.route("GET", "/codes")
+def stream_codes(_: Request) -> Response:
+    rows = ({"code": f"{number:04}"} for number in range(STREAMED_ROWS))
+    response = StreamingResponse(200, rows=rows)
+    response.on_close.append(streamed_rows_closed.set)
+    return response
+
+
+@pytest.fixture
+def server_address() -> Iterator[tuple[str, int]]:
+    app = SimpleApp("test")
+    app.include_router(router)
+    options = ServeOptions(threads=2, max_keep_alive_requests=4)
+    httpd = create_server("127.0.0.1", 0, handler_factory(app, options), 2)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.start()
+    try:
+        yield httpd.server_address  # type: ignore[misc]
+    finally:
+        httpd.shutdown()
+        thread.join()
+        httpd.server_close()
+
+
+def read_responses(
+    sock: socket.socket, count: int
+) -> list[tuple[str, dict[str, str], bytes]]:
+    reader = sock.makefile("rb")
+    responses = []
+    for _ in range(count):
+        status_line = reader.readline().decode().strip()
+        headers = {}
+        while (line := reader.readline().decode().strip()) != "":
+            name, _, value = line.partition(":")
+            headers[name.lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            body = b""
+            while size := int(reader.readline(), 16):
+                body += reader.read(size)
+                reader.readline()
+            reader.readline()
+        else:
+            body = reader.read(int(headers.get("content-length", "0")))
+        responses.append((status_line, headers, body))
+    return responses
+
+
+def test_pipelined_requests_on_keep_alive_connection(
+    server_address: tuple[str, int],
+) -> None:
+    with socket.create_connection(server_address) as sock:
+        sock.sendall(
+            b"GET /currency/EUR HTTP/1.1\r\nHost: test\r\n\r\n"
+            b"GET /missing HTTP/1.1\r\nHost: test\r\n\r\n"
+            b"DELETE /currency/EUR HTTP/1.1\r\nHost: test\r\n\r\n"
+        )
+        (found, missing, deleted) = read_responses(sock, 3)
+
+    status, headers, body = found
+    assert status == "HTTP/1.1 200 OK"
+    assert int(headers["content-length"]) == len(body)
+    assert body.decode() == '{"code": "EUR", "sign": "\\u20ac"}'
+    assert "connection" not in headers
+
+    status, headers, body = missing
+    assert status == "HTTP/1.1 404 Not Found"
+    assert body == b'{"message": "Not Found"}'
+    assert "connection" not in headers
+
+    status, headers, _ = deleted
+    assert status == "HTTP/1.1 204 No Content"
+    assert "content-length" not in headers
+
+
+def test_streaming_response_is_chunked(server_address: tuple[str, int]) -> None:
+    with socket.create_connection(server_address) as sock:
+        sock.sendall(
+            b"GET /codes HTTP/1.1\r\nHost: test\r\n\r\n"
+            b"GET /currency/EUR HTTP/1.1\r\nHost: test\r\n\r\n"
+        )
+        (streamed, found) = read_responses(sock, 2)
+
+    status, headers, body = streamed
+    assert status == "HTTP/1.1 200 OK"
+    assert headers["content-type"] == "application/json"
+    assert "content-length" not in headers
+    assert json.loads(body) == [
+        {"code": f"{number:04}"} for number in range(STREAMED_ROWS)
+    ]
+    assert streamed_rows_closed.is_set()
+    assert found[0] == "HTTP/1.1 200 OK"
+
+
+def test_connection_closed_after_max_requests(
+    server_address: tuple[str, int],
+) -> None:
+    with socket.create_connection(server_address) as sock:
+        sock.sendall(b"GET /currency/EUR HTTP/1.1\r\nHost: test\r\n\r\n" * 4)
+        responses = read_responses(sock, 4)
+        assert sock.recv(1) == b""
+
+    assert [headers.get("connection") for _, headers, _ in responses] == [
+        None,
+        None,
+        None,
+        "close",
+    ]
+
+
+def test_malformed_request_closes_connection(
+    server_address: tuple[str, int],
+) -> None:
+    with socket.create_connection(server_address) as sock:
+        sock.sendall(
+            b"GET /currency/EUR HTTP/1.1\r\nX-Long: " + b"a" * 70_000 + b"\r\n\r\n"
+        )
+        ((status, headers, body),) = read_responses(sock, 1)
+        assert sock.recv(1) == b""
+
+    assert status == "HTTP/1.1 431 Request Header Fields Too Large"
+    assert headers["connection"] == "close"
+    assert int(headers["content-length"]) == len(body)
+
+
+@pytest.mark.parametrize(
+    ("content_length", "expected_status"),
+    [
+        (b"-1", "HTTP/1.1 400 Bad Request"),
+        (b"2000000", "HTTP/1.1 413 Request Entity Too Large"),
+    ],
+)
+def test_bad_content_length_is_rejected(
+    server_address: tuple[str, int],
+    content_length: bytes,
+    expected_status: str,
+) -> None:
+    with socket.create_connection(server_address, timeout=2) as sock:
+        sock.sendall(
+            b"POST /currency/EUR HTTP/1.1\r\nHost: test\r\n"
+            b"Content-Length: " + content_length + b"\r\n\r\n"
+        )
+        ((status, headers, _),) = read_responses(sock, 1)
+        assert sock.recv(1) == b""
+
+    assert status == expected_status
+    assert headers["connection"] == "close"
+
+
+def test_idle_connection_timeout_is_not_a_warning(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    app = SimpleApp("test")
+    app.include_router(router)
+    options = ServeOptions(threads=1, keep_alive_timeout=0.1)
+    httpd = create_server("127.0.0.1", 0, handler_factory(app, options), 1)
+    thread = threading.Thread(target=httpd.serve_forever)
+    thread.start()
+    try:
+        with (
+            caplog.at_level(logging.DEBUG, logger="simple_server.app"),
+            socket.create_connection(httpd.server_address, timeout=2) as sock,  # type: ignore[arg-type]
+        ):
+            sock.sendall(b"GET /currency/EUR HTTP/1.1\r\nHost: test\r\n\r\n")
+            read_responses(sock, 1)
+            assert sock.recv(1) == b""
+    finally:
+        httpd.shutdown()
+        thread.join()
+        httpd.server_close()
+
+    timeouts = [
+        record for record in caplog.records if "timed out" in record.getMessage()
+    ]
+    assert [record.levelno for record in timeouts] == [logging.DEBUG]
+
+
+def get_currencies(_: Request) -> Response:
+    return Response(200, [])
+
+
+def test_resolve_by_route_table() -> None:
+    currencies_router = Router("currencies_router")
+    currencies_router.route("GET", "/currencies")(get_currencies)
+    app = SimpleApp("test")
+    app.include_router(router)
+    app.include_router(currencies_router)
+
+    route, path_params = app.resolve("GET", "/currencies")
+    assert route.chain.handler is get_currencies
+    assert path_params == {}
+    _, path_params = app.resolve("GET", "/currency/EUR/")
+    assert path_params == {"code": "EUR"}
+
+
+def tag(name: str) -> Middleware:
+    def middleware(handler: Handler, request: Request) -> Response:
+        response = handler(request)
+        response.headers["X-Tags"] = f"{name} {response.headers.get('X-Tags', '')}"
+        return response
+
+    return middleware
+
+
+def test_middlewares_of_app_router_and_route() -> None:
+    tagged_router = Router("tagged_router")
+    tagged_router.add_middleware(tag("router"))
+    tagged_router.route("GET", "/tagged", middlewares=[tag("route")])(get_currencies)
+    tagged_router.route("GET", "/currencies")(get_currencies)
+    app = SimpleApp("test")
+    app.add_middleware(tag("app"))
+    app.include_router(tagged_router)
+    app.include_router(router)
+
+    tagged = app.handle(Request({}, {}, {}, {}), "GET", "/tagged")
+    untagged = app.handle(Request({}, {}, {}, {}), "GET", "/currencies")
+    other_router = app.handle(Request({}, {}, {}, {}), "GET", "/currency/EUR")
+
+    assert tagged.headers["X-Tags"].split() == ["app", "router", "route"]
+    assert untagged.headers["X-Tags"].split() == ["app", "router"]
+    assert other_router.headers["X-Tags"].split() == ["app"]
+
+
+def test_conflicting_routes_fail_compile() -> None:
+    other_router = Router("other_router")
+    other_router.route("GET", "/currency/{name}")(get_currencies)
+    app = SimpleApp("test")
+    app.include_router(router)
+    app.include_router(other_router)
+
+    with pytest.raises(RouteConflictError):
+        app.compile()
+
+
+def test_same_handler_with_other_middlewares_conflicts() -> None:
+    first_router = Router("first_router")
+    first_router.route("GET", "/tagged", middlewares=[tag("first")])(get_currencies)
+    second_router = Router("second_router")
+    second_router.route("GET", "/tagged")(get_currencies)
+    app = SimpleApp("test")
+    app.include_router(first_router)
+    app.include_router(first_router)
+    app.compile()
+    app.include_router(second_router)
+
+    with pytest.raises(RouteConflictError):
+        app.compile()
+
+
+def test_response_cache_until_version_changes() -> None:
+    version = [1]
+    calls = []
+
+    def handler(request: Request) -> Response:
+        calls.append(request.path)
+        if request.path == "/codes":
+            return StreamingResponse(200, rows=[{"code": "EUR"}])
+        return Response(200, {"code": "EUR"}, {"Link": "</next>"})
+
+    cache = ResponseCacheMiddleware(lambda: version[0], ["/currency/{code}", "/codes"])
+
+    first = cache(
+        handler,
+        Request({}, {}, {}, {}, "GET", "/currency/EUR", route="/currency/{code}"),
+    )
+    etag = first.headers["ETag"]
+    revalidated = cache(
+        handler,
+        Request(
+            {},
+            {},
+            {},
+            {},
+            "GET",
+            "/currency/EUR",
+            {"if-none-match": etag},
+            route="/currency/{code}",
+        ),
+    )
+    version[0] += 1
+    changed = cache(
+        handler,
+        Request(
+            {},
+            {},
+            {},
+            {},
+            "GET",
+            "/currency/EUR",
+            {"if-none-match": etag},
+            route="/currency/{code}",
+        ),
+    )
+    cache(
+        handler,
+        Request({}, {}, {}, {}, "DELETE", "/currency/EUR", route="/currency/{code}"),
+    )
+
+    assert first.body == b'{"code": "EUR"}'
+    assert first.headers["Link"] == "</next>"
+    assert etag.startswith('"')
+    assert (revalidated.status_code, revalidated.body) == (304, None)
+    assert revalidated.headers == {"ETag": etag}
+    # Produced again, but the body and so the ETag are the same
+    assert (changed.status_code, changed.headers["ETag"]) == (304, etag)
+    assert len(calls) == 3  # noqa: PLR2004
+
+    streamed = cache(handler, Request({}, {}, {}, {}, "GET", "/codes", route="/codes"))
+    assert isinstance(streamed, StreamingResponse)
+    assert "ETag" not in streamed.headers
+    body = b"".join(streamed.pieces())
+    stored = cache(handler, Request({}, {}, {}, {}, "GET", "/codes", route="/codes"))
+    assert stored.body == body == b'[{"code": "EUR"}]'
+    assert "ETag" in stored.headers
+    assert calls[3:] == ["/codes"]
+
+
+def test_compression_negotiated_and_cached() -> None:
+    rows = [{"code": f"{number:03}", "name": "Currency"} for number in range(100)]
+    calls = []
+
+    def handler(request: Request) -> Response:
+        calls.append(request.path)
+        if request.path == "/codes":
+            return StreamingResponse(200, rows=iter(rows))
+        if request.path == "/small":
+            return Response(200, {"code": "EUR"})
+        return Response(200, rows)
+
+    def chain(request: Request) -> Response:
+        return cache(lambda request: compression(handler, request), request)
+
+    compression = CompressionMiddleware(minimum_size=100)
+    cache = ResponseCacheMiddleware(
+        lambda: 1, ["/rows", "/codes"], vary=["Accept-Encoding"]
+    )
+    gzip_headers = {"accept-encoding": "gzip, deflate"}
+
+    compressed = chain(
+        Request({}, {}, {}, {}, "GET", "/rows", gzip_headers, route="/rows")
+    )
+    cached = chain(Request({}, {}, {}, {}, "GET", "/rows", gzip_headers, route="/rows"))
+    identity = chain(Request({}, {}, {}, {}, "GET", "/rows", route="/rows"))
+    revalidated = chain(
+        Request(
+            {},
+            {},
+            {},
+            {},
+            "GET",
+            "/rows",
+            {**gzip_headers, "if-none-match": compressed.headers["ETag"]},
+            route="/rows",
+        )
+    )
+    small = chain(
+        Request({}, {}, {}, {}, "GET", "/small", gzip_headers, route="/small")
+    )
+    streamed = chain(
+        Request(
+            {},
+            {},
+            {},
+            {},
+            "GET",
+            "/codes",
+            {"accept-encoding": "deflate"},
+            route="/codes",
+        )
+    )
+    assert isinstance(streamed, StreamingResponse)
+    streamed_body = b"".join(streamed.pieces())
+
+    assert isinstance(compressed.body, bytes)
+    assert json.loads(gzip.decompress(compressed.body)) == rows
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    assert cached.body is compressed.body
+    assert revalidated.status_code == 304  # noqa: PLR2004
+    assert revalidated.headers == {
+        "Vary": "Accept-Encoding",
+        "ETag": compressed.headers["ETag"],
+    }
+    assert cached.headers["ETag"] != identity.headers["ETag"]
+    assert "Content-Encoding" not in identity.headers
+    assert json.loads(identity.body) == rows  # type: ignore[arg-type]
+    assert small.body == b'{"code": "EUR"}'
+    assert "Content-Encoding" not in small.headers
+    assert streamed.headers["Content-Encoding"] == "deflate"
+    assert json.loads(zlib.decompress(streamed_body)) == rows
+    assert calls == ["/rows", "/rows", "/small", "/codes"]
+
+
+def test_access_log_samples_successes_and_logs_errors(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    failing_router = Router("failing_router")
+
+    @failing_router.route("GET", "/fail/{code}")
+    def fail(_: Request) -> Response:
+        raise RuntimeError
+
+    app = SimpleApp("test")
+    app.add_middleware(AccessLogMiddleware(sample_rate=0))
+    app.include_router(router)
+    app.include_router(failing_router)
+    streaming_app = SimpleApp("test")
+    streaming_app.add_middleware(AccessLogMiddleware())
+    streaming_app.include_router(router)
+
+    with caplog.at_level(logging.INFO, logger="simple_server.access"):
+        app.handle(Request({}, {}, {}, {}), "GET", "/currency/EUR")
+        with pytest.raises(RuntimeError):
+            app.handle(Request({}, {}, {}, {}, "GET", "/fail/EUR"), "GET", "/fail/EUR")
+        not_found = app.handle(
+            Request({}, {}, {}, {}, "GET", "/missing"), "GET", "/missing"
+        )
+        encoded = streaming_app.handle(Request({}, {}, {}, {}), "GET", "/currency/EUR")
+        streamed = streaming_app.handle(Request({}, {}, {}, {}), "GET", "/codes")
+        assert isinstance(streamed, StreamingResponse)
+        streamed_size = len(b"".join(streamed.pieces()))
+        streamed.close()
+
+    lines = [
+        record.getMessage().rsplit(" duration_ms=", 1) for record in caplog.records
+    ]
+    assert [line[0] for line in lines] == [
+        "method=GET route=/fail/{code} status=500",
+        "method=GET route=/missing status=404",
+        "method=GET route=/currency/{code} status=200",
+        "method=GET route=/codes status=200",
+    ]
+    assert caplog.records[0].levelno == logging.ERROR
+    assert not_found.status_code == 404  # noqa: PLR2004
+    assert caplog.records[1].levelno == logging.WARNING
+    assert encoded.body == b'{"code": "EUR", "sign": "\\u20ac"}'
+    assert lines[2][1].endswith(f" bytes={len(encoded.body)}")
+    assert lines[3][1].endswith(f" bytes={streamed_size}")
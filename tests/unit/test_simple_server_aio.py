@@ -0,0 +1,186 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from simple_server import (
+    CORSMiddleware,
+    Request,
+    Response,
+    Router,
+    ServeOptions,
+    SimpleApp,
+    StreamingResponse,
+)
+from simple_server.aio import AsyncHTTPServer, create_listening_socket
+from simple_server.chain import compose
+from simple_server.types import AsyncHandler, Handler
+
+router = Router("test_router")
+
+
+@router.route("GET", "/async/{name}")
+async def async_handler(request: Request) -> Response:
+    await asyncio.sleep(0)
+    return Response(200, {"name": request.path_params["name"]})
+
+
+@router.route("GET", "/sync")
+def sync_handler(_: Request) -> Response:
+    return Response(200, {"thread": threading.current_thread().name})
+
+
+@router.route("GET", "/codes")
+def stream_codes(_: Request) -> Response:
+    return StreamingResponse(
+        200, rows=({"code": f"{number:04}"} for number in range(5000))
+    )
+
+
+def make_app() -> SimpleApp:
+    app = SimpleApp("test")
+    app.add_middleware(
+        CORSMiddleware(
+            allow_origins=["*"],
+            allow_methods=["*"],
+            allow_headers=["*"],
+            allow_credentials=False,
+        )
+    )
+    app.include_router(router)
+    return app
+
+
+async def read_response(
+    reader: asyncio.StreamReader,
+) -> tuple[str, dict[str, str], bytes]:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").strip().split("\r\n")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        body = b""
+        while size := int(await reader.readline(), 16):
+            body += await reader.readexactly(size)
+            await reader.readline()
+        await reader.readline()
+    else:
+        body = await reader.readexactly(int(headers["content-length"]))
+    return status_line, headers, body
+
+
+async def request_pipelined(
+    requests: list[bytes],
+) -> list[tuple[str, dict[str, str], bytes]]:
+    sock = create_listening_socket("127.0.0.1", 0)
+    port = sock.getsockname()[1]
+    server = AsyncHTTPServer(make_app(), ServeOptions(threads=2))
+    stop = asyncio.Event()
+    serve_task = asyncio.create_task(server.serve(sock, stop))
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"".join(requests))
+    await writer.drain()
+    responses = [await read_response(reader) for _ in requests]
+    writer.close()
+
+    stop.set()
+    await serve_task
+    return responses
+
+
+def test_async_and_sync_handlers_on_one_keep_alive_connection() -> None:
+    responses = asyncio.run(
+        request_pipelined(
+            [
+                b"GET /async/EUR HTTP/1.1\r\nHost: test\r\n\r\n",
+                b"GET /sync HTTP/1.1\r\nHost: test\r\n\r\n",
+                b"GET /missing HTTP/1.1\r\nHost: test\r\n\r\n",
+            ]
+        )
+    )
+
+    (async_status, async_headers, async_body) = responses[0]
+    assert async_status == "HTTP/1.1 200 OK"
+    assert async_body == b'{"name": "EUR"}'
+    assert async_headers["access-control-allow-origin"] == "*"
+    assert async_headers["connection"] == "keep-alive"
+
+    sync_status, sync_headers, sync_body = responses[1]
+    assert sync_status == "HTTP/1.1 200 OK"
+    assert b"simple_server" in sync_body
+    assert sync_headers["access-control-allow-origin"] == "*"
+
+    missing_status, _, _ = responses[2]
+    assert missing_status == "HTTP/1.1 404 Not Found"
+
+
+def test_connection_close_is_respected() -> None:
+    responses = asyncio.run(
+        request_pipelined([b"GET /sync HTTP/1.1\r\nConnection: close\r\n\r\n"])
+    )
+
+    _, headers, _ = responses[0]
+    assert headers["connection"] == "close"
+
+
+def test_streaming_response_is_chunked() -> None:
+    responses = asyncio.run(
+        request_pipelined(
+            [
+                b"GET /codes HTTP/1.1\r\nHost: test\r\n\r\n",
+                b"GET /sync HTTP/1.1\r\nHost: test\r\n\r\n",
+            ]
+        )
+    )
+
+    status, headers, body = responses[0]
+    assert status == "HTTP/1.1 200 OK"
+    assert headers["connection"] == "keep-alive"
+    assert headers["access-control-allow-origin"] == "*"
+    assert len(json.loads(body)) == 5000  # noqa: PLR2004
+    assert responses[1][0] == "HTTP/1.1 200 OK"
+
+
+async def async_tag(handler: AsyncHandler, request: Request) -> Response:
+    response = await handler(request)
+    response.headers["X-Tags"] = response.headers.get("X-Tags", "") + " async"
+    return response
+
+
+def sync_tag(handler: Handler, request: Request) -> Response:
+    response = handler(request)
+    response.headers["X-Tags"] = response.headers.get("X-Tags", "") + " sync"
+    return response
+
+
+def test_mixed_chains_with_one_executor_thread() -> None:
+    def sync_endpoint(_: Request) -> Response:
+        return Response(200)
+
+    async def async_endpoint(_: Request) -> Response:
+        return Response(200)
+
+    sync_inside = compose(sync_endpoint, [async_tag, sync_tag])
+    sync_outside = compose(async_endpoint, [sync_tag, async_tag])
+
+    async def handle() -> list[Response]:
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(1))
+        return [
+            await asyncio.wait_for(chain.async_handler(request), 5)
+            for chain, request in [
+                (sync_inside, Request({}, {}, {}, {})),
+                (sync_outside, Request({}, {}, {}, {})),
+            ]
+        ]
+
+    inside, outside = asyncio.run(handle())
+
+    assert inside.headers["X-Tags"].split() == ["sync", "async"]
+    assert outside.headers["X-Tags"].split() == ["async", "sync"]
+    with pytest.raises(TypeError, match="executor"):
+        compose(sync_endpoint, [sync_tag, async_tag])